@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset manifest - publishes scraped images under content-hashed names for
+immutable caching, records their size, dimensions and a blur placeholder in
+one manifest for the build, and precompresses text artifacts
+"""
+
+import argparse
+import base64
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+
+from image_cache import file_sha256
+from image_variants import fallback_src, srcset_entries
+from records import write_json
+
+try:
+    from PIL import Image, ImageOps, features
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+ASSET_MANIFEST_FILE = 'asset_manifest.json'
+PUBLIC_DIR = 'public'
+ASSET_DIR = 'assets'  # Under PUBLIC_DIR; every file in it is named by its content
+HASH_CHARS = 12  # Hex digits of the SHA-256 kept in a hashed name
+SLUG_LENGTH = 60
+BLUR_SIZE = 10  # Longest side of the placeholder thumbnail, in pixels
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif')
+FORMAT_EXTENSIONS = {'jpeg': '.jpg', 'png': '.png', 'webp': '.webp', 'gif': '.gif', 'avif': '.avif'}
+TEXT_EXTENSIONS = ('.json', '.js', '.mjs', '.css', '.html', '.svg', '.txt', '.xml', '.map', '.webmanifest')
+MIN_COMPRESS_BYTES = 1024  # Smaller files gain less than the extra request costs
+
+def asset_slug(text, max_length=SLUG_LENGTH):
+    """Lowercase ASCII slug of text, shortened at a word boundary rather than mid-word"""
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    if len(slug) > max_length:
+        cut = slug.rfind('-', 0, max_length + 1)
+        slug = slug[:cut if cut > 0 else max_length]
+    return slug or 'asset'
+
+def hashed_name(slug, sha256, ext):
+    return f"{slug}-{sha256[:HASH_CHARS]}{ext}"
+
+def source_path(public_path, public_dir=PUBLIC_DIR):
+    """Map a public URL path back to the file under public_dir"""
+    return os.path.join(public_dir, *public_path.strip('/').split('/'))
+
+def blur_placeholder(img):
+    """Encode a BLUR_SIZE thumbnail of an open image as a data: URI"""
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info else 'RGB')
+    img.thumbnail((BLUR_SIZE, BLUR_SIZE))
+    buffer = io.BytesIO()
+    if features.check('webp'):
+        img.save(buffer, 'WEBP', quality=40)
+        mime = 'image/webp'
+    else:
+        img.save(buffer, 'PNG', optimize=True)
+        mime = 'image/png'
+    return f"data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+def inspect_image(path, placeholder=True):
+    """Return the lowercase format, width, height and blur placeholder of an image file
+
+    Files Pillow cannot decode (or every file, without Pillow) get None
+    for all four, so a broken download never stops the manifest.
+    """
+    if not HAS_PILLOW:
+        return None, None, None, None
+    try:
+        with Image.open(path) as img:
+            fmt = img.format.lower() if img.format else None
+            width, height = img.size
+            # Ask the JPEG decoder for a reduced-size draft; the placeholder is tiny
+            img.draft('RGB', (BLUR_SIZE * 8, BLUR_SIZE * 8))
+            blur = blur_placeholder(img) if placeholder else None
+    except Exception as e:
+        print(f"    Cannot decode {path}: {e}")
+        return None, None, None, None
+    return fmt, width, height, blur
+
+def disk_variants(public_path, public_dir=PUBLIC_DIR):
+    """Find the responsive variants image_variants wrote for an image without a saved record
+
+    They sit in the variants/ folder next to the original as <stem>-<width>w.<format>.
+    """
+    folder, filename = os.path.split(public_path)
+    variant_dir = source_path(f"{folder}/variants", public_dir)
+    if not os.path.isdir(variant_dir):
+        return []
+    name_re = re.compile(re.escape(os.path.splitext(filename)[0]) + r'-(\d+)w\.(webp|avif)$')
+    found = []
+    for name in sorted(os.listdir(variant_dir)):
+        match = name_re.match(name)
+        if match:
+            found.append({'format': match.group(2), 'width': int(match.group(1)),
+                          'public_path': f"{folder}/variants/{name}"})
+    return found
+
+def publish(path, name, asset_dir):
+    """Place the file at asset_dir/name, as a hard link when the filesystem allows it
+
+    The name carries the content hash, so an existing file is already right.
+    """
+    target = os.path.join(asset_dir, name)
+    if os.path.exists(target):
+        return False
+    os.makedirs(asset_dir, exist_ok=True)
+    tmp_path = f"{target}.tmp"
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, target)
+    return True
+
+class AssetManifest:
+    """The manifest file plus the hashed copies it points to"""
+
+    def __init__(self, manifest_file=ASSET_MANIFEST_FILE, public_dir=PUBLIC_DIR, asset_dir=ASSET_DIR):
+        self.manifest_file = manifest_file
+        self.public_dir = public_dir
+        self.asset_dir = asset_dir
+        self.images = {}
+        self.published = 0
+        self.decoded = 0
+        if os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    self.images = json.load(f).get('images', {})
+            except (OSError, ValueError) as e:
+                print(f"    Rewriting unreadable asset manifest {manifest_file}: {e}")
+        # Entries are looked up by content so a renamed or re-saved file is not decoded again
+        self.by_sha = {entry['sha256']: entry for entry in self.images.values()}
+
+    def asset_file(self, path, slug, placeholder=True):
+        """Publish one file under its hashed name and describe it"""
+        sha = file_sha256(path)
+        known = self.by_sha.get(sha)
+        if known and (known.get('placeholder') or not placeholder):
+            fmt, width, height, blur = known['format'], known['width'], known['height'], known.get('placeholder')
+        else:
+            fmt, width, height, blur = inspect_image(path, placeholder)
+            self.decoded += 1
+        ext = FORMAT_EXTENSIONS.get(fmt) or os.path.splitext(path)[1].lower()
+        name = hashed_name(slug, sha, ext)
+        if publish(path, name, os.path.join(self.public_dir, self.asset_dir)):
+            self.published += 1
+        entry = {
+            'src': f"/{self.asset_dir}/{name}",
+            'sha256': sha,
+            'bytes': os.path.getsize(path),
+            'format': fmt,
+            'width': width,
+            'height': height,
+        }
+        if placeholder:
+            entry['placeholder'] = blur
+        return entry
+
+    def add_image(self, image, product=None):
+        """Add one saved image record (and its variants) keyed by its current public path"""
+        public_path = image['public_path']
+        path = source_path(public_path, self.public_dir)
+        if not os.path.exists(path):
+            path = image.get('local_path', '').replace('\\', os.sep)
+            if not os.path.exists(path):
+                print(f"    Missing {public_path} - left out of the manifest")
+                return None
+        # Named after the product folder, not the product name, so a build that only has the
+        # public/ tree (no data files) publishes the same names the scraper put in the kits
+        folder, filename = os.path.split(public_path.strip('/'))
+        slug = asset_slug(os.path.basename(folder) or os.path.splitext(filename)[0])
+        entry = self.asset_file(path, slug)
+        if product:
+            entry['product'] = product
+
+        variants = []
+        for variant in image.get('variants') or disk_variants(public_path, self.public_dir):
+            variant_path = source_path(variant['public_path'], self.public_dir)
+            if not os.path.exists(variant_path):
+                continue
+            hashed = self.asset_file(variant_path, f"{slug}-{variant['width']}w", placeholder=False)
+            variants.append({'format': variant['format'], 'width': variant['width'],
+                             'height': variant.get('height') or hashed['height'], 'bytes': hashed['bytes'],
+                             'sha256': hashed['sha256'], 'source': variant['public_path'],
+                             'public_path': hashed['src']})
+        if variants:
+            # Every hashed file a page can load is recorded with its hash so verify_assets can check it
+            entry['variants'] = variants
+            entry['srcset'] = srcset_entries(variants)
+            entry['fallback'] = fallback_src({'public_path': entry['src'], 'width': entry['width'],
+                                              'bytes': entry['bytes'], 'variants': variants})
+
+        self.images[public_path] = entry
+        self.by_sha[entry['sha256']] = entry
+        return entry
+
+    def add_products(self, products):
+        """Add the saved images of (product name, saved images) pairs
+
+        Each image record gains an 'asset' key with its hashed src, srcset
+        and placeholder, which generate_kit_data emits instead of the
+        unhashed paths.
+        """
+        for name, saved_images in products:
+            for image in saved_images:
+                entry = self.add_image(image, name)
+                if entry:
+                    image['asset'] = asset_reference(entry)
+
+    def add_tree(self):
+        """Add every image under public_dir not yet in the manifest (static art, badges, ...)"""
+        for root, dirs, files in os.walk(self.public_dir):
+            top = os.path.samefile(root, self.public_dir)
+            dirs[:] = sorted(d for d in dirs if d != 'variants' and not (top and d == self.asset_dir))
+            for filename in sorted(files):
+                if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, filename)
+                public_path = '/' + os.path.relpath(path, self.public_dir).replace(os.sep, '/')
+                entry = self.images.get(public_path)
+                if entry is None or entry['bytes'] != os.path.getsize(path):
+                    self.add_image({'public_path': public_path}, entry and entry.get('product'))
+
+    def prune(self):
+        """Drop entries whose source is gone and delete hashed files nothing points to"""
+        for public_path in [p for p in self.images if not os.path.exists(source_path(p, self.public_dir))]:
+            del self.images[public_path]
+        referenced = set()
+        for entry in self.images.values():
+            referenced.add(entry['src'].rsplit('/', 1)[1])
+            for srcset in entry.get('srcset', {}).values():
+                referenced.update(item.split(' ')[0].rsplit('/', 1)[1] for item in srcset.split(', '))
+        asset_dir = os.path.join(self.public_dir, self.asset_dir)
+        removed = 0
+        if os.path.isdir(asset_dir):
+            for filename in os.listdir(asset_dir):
+                if filename not in referenced:
+                    os.remove(os.path.join(asset_dir, filename))
+                    removed += 1
+        return removed
+
+    def save(self):
+        images = dict(sorted(self.images.items()))
+        # No timestamp: an unchanged image set writes a byte-identical manifest
+        written = write_json(self.manifest_file, {
+            'asset_dir': f"/{self.asset_dir}/",
+            'images': images,
+        })
+        placeholder_bytes = sum(len(entry.get('placeholder') or '') for entry in images.values())
+        print(f"{self.manifest_file} - {len(images)} images, {self.published} files published, "
+              f"{self.decoded} decoded, {placeholder_bytes / 1024:.1f} KB of placeholders "
+              f"({written / 1024:.1f} KB)")
+        return written
+
+def asset_reference(entry):
+    """What a page needs to show one manifest image: hashed src (the responsive fallback
+    when variants exist), hashed srcset per format and blur placeholder"""
+    reference = {'src': entry.get('fallback', entry['src'])}
+    if entry.get('srcset'):
+        reference['srcset'] = entry['srcset']
+    if entry.get('placeholder'):
+        reference['placeholder'] = entry['placeholder']
+    return reference
+
+def update_asset_manifest(products, manifest_file=ASSET_MANIFEST_FILE, public_dir=PUBLIC_DIR):
+    """Merge the saved images of (product name, saved images) pairs into the manifest"""
+    manifest = AssetManifest(manifest_file, public_dir)
+    manifest.add_products(products)
+    manifest.save()
+    return manifest
+
+def compressors():
+    """Return (suffix, compress) pairs for the encoders available here"""
+    pairs = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if HAS_BROTLI:
+        pairs.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return pairs
+
+def text_artifacts(root):
+    """Return every text file under root worth serving precompressed"""
+    found = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        found.extend(os.path.join(dirpath, name) for name in sorted(files) if name.lower().endswith(TEXT_EXTENSIONS))
+    return found
+
+def precompress(paths, min_bytes=MIN_COMPRESS_BYTES):
+    """Write .gz (and .br with brotli installed) next to each text file
+
+    Files already compressed since their last change are left alone, and an
+    encoding that does not shrink a file is not kept. Returns the original
+    and compressed byte totals per suffix.
+    """
+    totals = {}
+    encoders = compressors()
+    for path in paths:
+        size = os.path.getsize(path)
+        if size < min_bytes:
+            continue
+        source_mtime = os.path.getmtime(path)
+        data = None
+        for suffix, compress in encoders:
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                packed_size = os.path.getsize(target)
+            else:
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                packed = compress(data)
+                if len(packed) >= size:
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                tmp_path = f"{target}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(packed)
+                os.replace(tmp_path, target)
+                packed_size = len(packed)
+            original, compressed = totals.get(suffix, (0, 0))
+            totals[suffix] = (original + size, compressed + packed_size)
+    return totals
+
+def products_from_data(data):
+    """Yield (product name, saved images) from a single-page or batch data file"""
+    if 'products' in data:
+        for product in data['products'].values():
+            yield product['product_info']['name'], product.get('saved_images', [])
+    elif 'saved_images' in data:
+        yield data['product_info']['name'], data['saved_images']
+
+def read_data_file(data_file):
+    """Yield (product name, saved images) from a JSON data file or a streamed JSON-lines one"""
+    with open(data_file, 'r', encoding='utf-8') as f:
+        if not data_file.endswith('.jsonl'):
+            yield from products_from_data(json.load(f))
+            return
+        for line in f:
+            record = json.loads(line) if line.strip() else {}
+            if 'product_info' in record:
+                yield record['product_info']['name'], record.get('saved_images', [])
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish content-hashed images, write the asset manifest "
+                                                 "and precompress text artifacts")
+    parser.add_argument('data_files', nargs='*', default=['extracted_product_data.json'],
+                        help="scraper data files whose saved images go in the manifest")
+    parser.add_argument('--public', default=PUBLIC_DIR, help="static directory holding the images")
+    parser.add_argument('--manifest', default=ASSET_MANIFEST_FILE, help="manifest file to write")
+    parser.add_argument('--no-scan', action='store_true',
+                        help="only list images from the data files, not every other image under --public")
+    parser.add_argument('--prune', action='store_true',
+                        help="drop entries whose source is gone and delete unreferenced hashed files")
+    parser.add_argument('--precompress', nargs='*', metavar='DIR', default=None,
+                        help="directories of text artifacts to precompress (default: --public)")
+    parser.add_argument('--no-precompress', action='store_true', help="skip writing .gz/.br files")
+    args = parser.parse_args()
+
+    manifest = AssetManifest(args.manifest, args.public)
+    for data_file in args.data_files:
+        if not os.path.exists(data_file):
+            print(f"Skipping {data_file} - not found")
+            continue
+        manifest.add_products(read_data_file(data_file))
+    if not args.no_scan:
+        manifest.add_tree()
+    if args.prune:
+        print(f"Pruned {manifest.prune()} unreferenced hashed files")
+    manifest.save()
+
+    if not args.no_precompress:
+        paths = []
+        for root in args.precompress or [args.public]:
+            paths.extend(text_artifacts(root))
+        for suffix, (original, compressed) in precompress(paths).items():
+            print(f"Precompressed {suffix}: {original / 1024:.1f} KB -> {compressed / 1024:.1f} KB")
+        if not HAS_BROTLI:
+            print("brotli is not installed - wrote gzip only")
+
+if __name__ == "__main__":
+    main()
@@ -1,128 +1,275 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Auto WWE Scraper - Monitors html.html for changes and runs scraper automatically
+Auto WWE Scraper - Monitors HTML files for changes and runs scraper automatically
 """
 
+import argparse
+import fnmatch
 import os
+import queue
+import re
 import time
 import subprocess
 import sys
+import threading
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-class HTMLFileHandler(FileSystemEventHandler):
-    """Handler for HTML file changes"""
-    
-    def __init__(self):
-        self.last_processed = 0
-        self.debounce_time = 2  # Wait 2 seconds after last change
-        
-    def on_modified(self, event):
-        """Called when a file is modified"""
-        if event.is_directory:
+DEBOUNCE_SECONDS = 2  # Quiet period after the last event before a run starts
+MAX_QUEUED_RUNS = 32  # Pending runs kept before new saves are dropped
+GLOB_CHARS_RE = re.compile(r'[*?[]')
+
+def output_files(html_file):
+    """Return the (data file, code file) a watched HTML file is scraped into"""
+    if os.path.basename(html_file) == 'html.html':
+        return 'extracted_product_data.json', 'kit_code.ts'
+    stem = Path(html_file).stem
+    return f'extracted_{stem}.json', f'kit_code_{stem}.ts'
+
+def watch_root(pattern):
+    """Return (directory, recursive) to watch for one file or glob pattern
+
+    The directory is the leading part of the pattern without glob
+    characters. It is watched recursively only when a glob appears in a
+    directory component, as in data/*/page.html or data/**/*.html.
+    """
+    parts = Path(pattern).parts
+    fixed = []
+    for part in parts[:-1]:
+        if GLOB_CHARS_RE.search(part):
+            break
+        fixed.append(part)
+    return os.path.join(*fixed) if fixed else '.', len(fixed) < len(parts) - 1
+
+def watch_roots(patterns):
+    """Merge the watch roots of all patterns into {directory: recursive}
+
+    A directory already covered by a recursive watch on one of its parents
+    is left out, so each save raises its events once.
+    """
+    roots = {}
+    for pattern in patterns:
+        directory, recursive = watch_root(pattern)
+        directory = os.path.normpath(directory)
+        roots[directory] = roots.get(directory, False) or recursive
+    covered = {os.path.join(os.path.abspath(directory), '') for directory, recursive in roots.items() if recursive}
+    return {directory: recursive for directory, recursive in roots.items()
+            if not any(os.path.abspath(directory).startswith(parent) for parent in covered)}
+
+class ScraperWorker:
+    """Runs the scraper in-process for queued HTML files, one at a time"""
+
+    def __init__(self, max_queued=MAX_QUEUED_RUNS):
+        # Imported once here instead of paying interpreter start-up and imports on every save
+        import scraper
+        self.scraper = scraper
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.generations = {}  # Latest save generation per path
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, path, first_event, last_event):
+        """Queue a run for path, superseding any older queued or running one"""
+        if self.stopping.is_set():
             return
-            
-        # Check if it's the html.html file
-        if event.src_path.endswith('html.html'):
-            current_time = time.time()
-            
-            # Debounce - wait a bit to avoid multiple triggers
-            if current_time - self.last_processed > self.debounce_time:
-                self.last_processed = current_time
-                print(f"\n🔄 DETECTED CHANGE: {event.src_path}")
-                print("⏳ Waiting 2 seconds for file to be fully saved...")
-                time.sleep(2)
-                self.run_scraper()
-    
-    def run_scraper(self):
-        """Run the scraper script"""
+        with self.lock:
+            generation = self.generations.get(path, 0) + 1
+            self.generations[path] = generation
+        try:
+            self.queue.put_nowait((path, generation, first_event, last_event))
+        except queue.Full:
+            print(f"⚠️ Run queue full, dropping save of {path}")
+
+    def is_superseded(self, path, generation):
+        with self.lock:
+            return self.generations.get(path) != generation
+
+    def run(self):
+        while not self.stopping.is_set():
+            job = self.queue.get()
+            if job is None or self.stopping.is_set():
+                break
+            path, generation, first_event, last_event = job
+            try:
+                if self.is_superseded(path, generation):
+                    print(f"⏭️ Skipping superseded run for {path}")
+                    continue
+                self.run_scraper(path, generation, first_event, last_event)
+            finally:
+                self.queue.task_done()
+
+    def stop(self):
+        """Stop after the current run; queued runs are dropped
+
+        The running scrape is cancelled at its next stage boundary. The
+        sentinel only wakes an idle worker, so a full queue cannot block it.
+        """
+        self.stopping.set()
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.thread.join()
+
+    def run_scraper(self, path, generation, first_event, last_event):
+        """Run the scraper for one HTML file"""
+        data_file, code_file = output_files(path)
         try:
             print("\n" + "="*60)
-            print("🚀 AUTO-RUNNING WWE SCRAPER...")
+            print(f"🚀 AUTO-RUNNING WWE SCRAPER ON {path}...")
             print("="*60)
-            
-            # Run the scraper
-            result = subprocess.run([sys.executable, 'scraper.py'], 
-                                  capture_output=True, 
-                                  text=True, 
-                                  cwd=os.getcwd())
-            
-            if result.returncode == 0:
+
+            started = time.time()
+            kit_data = self.scraper.main(
+                incremental=True,
+                html_file=path,
+                data_file=data_file,
+                code_file=code_file,
+                cancel_check=lambda: self.stopping.is_set() or self.is_superseded(path, generation),
+            )
+            finished = time.time()
+
+            if kit_data is not None:
                 print("✅ SCRAPER COMPLETED SUCCESSFULLY!")
-                print("\n📋 SCRAPER OUTPUT:")
-                print(result.stdout)
-                
+
                 # Check if files were generated
-                if os.path.exists('kit_code.ts'):
-                    print("\n🎯 NEW KIT CODE GENERATED!")
-                    print("📄 Check kit_code.ts for the updated code")
-                    
+                if os.path.exists(code_file):
+                    print(f"\n🎯 KIT CODE READY: {code_file}")
+
                     # Show the generated code
                     try:
-                        with open('kit_code.ts', 'r', encoding='utf-8') as f:
+                        with open(code_file, 'r', encoding='utf-8') as f:
                             code_content = f.read()
                             print("\n📝 GENERATED CODE:")
                             print("-" * 40)
                             print(code_content)
                             print("-" * 40)
                     except Exception as e:
-                        print(f"❌ Error reading kit_code.ts: {e}")
-                        
-                if os.path.exists('extracted_product_data.json'):
-                    print("📄 extracted_product_data.json updated")
-                    
-            else:
-                print("❌ SCRAPER FAILED!")
-                print("📋 ERROR OUTPUT:")
-                print(result.stderr)
-                
+                        print(f"❌ Error reading {code_file}: {e}")
+
+                if os.path.exists(data_file):
+                    print(f"📄 {data_file} updated")
+
+            print(f"⏱️ Save-to-output latency: {finished - last_event:.2f}s "
+                  f"(first event {finished - first_event:.2f}s ago, scraper ran {finished - started:.2f}s)")
+
         except Exception as e:
             print(f"❌ Error running scraper: {e}")
-        
+
         print("\n" + "="*60)
         print("👀 MONITORING FOR NEXT CHANGE...")
-        print("💡 Save html.html again to run scraper")
+        print("💡 Save a watched HTML file again to run scraper")
         print("🛑 Press Ctrl+C to stop monitoring")
         print("="*60)
 
+class HTMLFileHandler(FileSystemEventHandler):
+    """Handler for HTML file changes"""
+
+    def __init__(self, worker, patterns=('html.html',), debounce_time=DEBOUNCE_SECONDS):
+        self.worker = worker
+        # fnmatch's '*' already spans directories; as in glob, '**/' may also match none
+        self.patterns = tuple(patterns) + tuple(pattern.replace('**/', '') for pattern in patterns if '**/' in pattern)
+        self.debounce_time = debounce_time  # Wait this long after the last change
+        self.timers = {}
+        self.first_events = {}
+        self.lock = threading.Lock()
+
+    def matches(self, path):
+        relative = os.path.relpath(path)
+        return any(fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern)
+                   for pattern in self.patterns)
+
+    def on_modified(self, event):
+        """Called when a file is modified"""
+        if event.is_directory:
+            return
+        self.schedule(event.src_path)
+
+    def on_created(self, event):
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        # Editors often save by writing a temp file and renaming it over the original
+        if not event.is_directory:
+            self.schedule(event.dest_path)
+
+    def schedule(self, src_path):
+        """Trailing-edge debounce: (re)start the quiet-period timer for this file"""
+        if not self.matches(src_path):
+            return
+        path = os.path.relpath(src_path)
+        now = time.time()
+        with self.lock:
+            timer = self.timers.get(path)
+            if timer:
+                timer.cancel()
+            else:
+                print(f"\n🔄 DETECTED CHANGE: {path}")
+            self.first_events.setdefault(path, now)
+            timer = threading.Timer(self.debounce_time, self.fire, args=(path, now))
+            timer.daemon = True
+            self.timers[path] = timer
+            timer.start()
+
+    def fire(self, path, last_event):
+        with self.lock:
+            if self.timers.get(path) is None or self.timers[path].args[1] != last_event:
+                return
+            del self.timers[path]
+            first_event = self.first_events.pop(path, last_event)
+        self.worker.submit(path, first_event, last_event)
+
 def main():
     """Main function to start file monitoring"""
-    
+    parser = argparse.ArgumentParser(description="Watch HTML files and re-run the WWE scraper on save")
+    parser.add_argument('patterns', nargs='*', default=['html.html'],
+                        help="HTML files or glob patterns to watch (default: html.html)")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help="seconds of quiet after the last save before scraping")
+    args = parser.parse_args()
+
     # Check if scraper.py exists
     if not os.path.exists('scraper.py'):
         print("❌ scraper.py not found!")
         print("📝 Please make sure scraper.py is in the same directory")
         return
-    
+
     print("🎯 WWE AUTO-SCRAPER STARTED!")
     print("="*50)
-    print("👀 Monitoring html.html for changes...")
-    print("💾 Save html.html to automatically run scraper")
+    print(f"👀 Monitoring {', '.join(args.patterns)} for changes...")
+    print("💾 Save a watched file to automatically run scraper")
     print("🛑 Press Ctrl+C to stop")
     print("="*50)
-    
+
     # Set up file monitoring
-    event_handler = HTMLFileHandler()
+    worker = ScraperWorker()
+    event_handler = HTMLFileHandler(worker, patterns=tuple(args.patterns), debounce_time=args.debounce)
     observer = Observer()
-    
-    # Monitor current directory
-    watch_path = "."
-    observer.schedule(event_handler, watch_path, recursive=False)
-    
+
+    # Monitor every directory that can hold a watched file
+    for watch_path, recursive in sorted(watch_roots(args.patterns).items()):
+        if not os.path.isdir(watch_path):
+            print(f"⚠️ {watch_path} is not a directory, not watching it")
+            continue
+        observer.schedule(event_handler, watch_path, recursive=recursive)
+
     try:
         observer.start()
-        
+
         # Keep the script running
         while True:
             time.sleep(1)
-            
+
     except KeyboardInterrupt:
         print("\n\n🛑 STOPPING AUTO-SCRAPER...")
         observer.stop()
+        worker.stop()
         print("✅ Auto-scraper stopped successfully!")
-        
+
     observer.join()
 
 if __name__ == "__main__":
@@ -141,5 +288,5 @@ if __name__ == "__main__":
             print(f"❌ Failed to install watchdog: {e}")
             print("💡 Please install manually: pip install watchdog")
         sys.exit(1)
-    
-    main() 
\ No newline at end of file
+
+    main()
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scraper benchmarks - compares extractors and parser backends on saved product
+pages, and runs a recorded-fixture suite against a local fake image server
+with JSON results that can be compared for regressions
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+import records
+import scraper
+from extractor import (FINAL_SKIP, IMG_KEEP, IMG_SKIP, PARSER_BACKENDS, dedupe_image_variants, get_backend,
+                       has_token, scan_image_urls)
+from image_cache import file_sha256
+from scraper import extract_product_info, extract_product_info_multipass, find_html_files
+
+FAKE_IMAGE_MIN_BYTES = 20 * 1024
+FAKE_IMAGE_MAX_BYTES = 120 * 1024
+REGRESSION_THRESHOLD = 0.10  # Flag metrics that get more than 10% worse
+
+# The raw-HTML image scan as it was before scan_image_urls, kept as the reference
+LEGACY_RAW_IMAGE_RES = [
+    re.compile(r'https://[^"\'\s>]+\.(?:jpg|jpeg|png|webp|gif)(?:\?[^"\'\s>]*)?', re.IGNORECASE),
+    re.compile(r'//[^"\'\s>]+\.(?:jpg|jpeg|png|webp|gif)(?:\?[^"\'\s>]*)?', re.IGNORECASE),
+]
+
+# Suite metrics and whether a lower or higher value is better
+SUITE_METRICS = {
+    'parse_ms': 'lower',
+    'parse_peak_kb': 'lower',
+    'images_per_second': 'higher',
+    'download_bytes': 'lower',
+    'main_seconds': 'lower',
+    'main_peak_kb': 'lower',
+}
+
+def time_call(func, html_content, repeat, **kwargs):
+    """Return the best-of-N wall time of func(html_content) in seconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(html_content, max_images=None, **kwargs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_parity(html_content, parser=None):
+    """Return a list of fields where the two extractors disagree"""
+    old = extract_product_info_multipass(html_content, max_images=None)
+    new = extract_product_info(html_content, max_images=None, parser=parser, structured=False)
+    mismatches = [key for key in old if key != 'images' and old[key] != new[key]]
+    # The multi-pass extractor collects images in a set, so only membership is comparable
+    if set(dedupe_image_variants(old['images'])) != set(new['images']):
+        mismatches.append('images')
+    return mismatches
+
+def bench_extraction(html_files, repeat=5):
+    """Benchmark extraction per page and print the speedup
+
+    The structured-data shortcut is disabled so both sides walk the DOM.
+    """
+    results = []
+    print(f"{'page':40} {'multi-pass':>12} {'single-pass':>12} {'speedup':>8}  parity")
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        old_time = time_call(extract_product_info_multipass, html_content, repeat)
+        new_time = time_call(extract_product_info, html_content, repeat, structured=False)
+        mismatches = check_parity(html_content)
+        speedup = old_time / new_time if new_time else 0.0
+
+        print(f"{html_file[-40:]:40} {old_time * 1000:10.1f}ms {new_time * 1000:10.1f}ms "
+              f"{speedup:7.2f}x  {'OK' if not mismatches else 'MISMATCH: ' + ', '.join(mismatches)}")
+        results.append({
+            'file': html_file,
+            'multipass_ms': round(old_time * 1000, 2),
+            'singlepass_ms': round(new_time * 1000, 2),
+            'speedup': round(speedup, 2),
+            'mismatches': mismatches,
+        })
+    return results
+
+def bench_backends(html_files, repeat=5):
+    """Time every installed parser backend and check it against the multi-pass reference"""
+    results = []
+    print(f"{'page':40} {'backend':>12} {'time':>10}  parity")
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        for backend in PARSER_BACKENDS:
+            elapsed = time_call(extract_product_info, html_content, repeat, parser=backend, structured=False)
+            mismatches = check_parity(html_content, parser=backend)
+            print(f"{html_file[-40:]:40} {backend:>12} {elapsed * 1000:8.1f}ms  "
+                  f"{'OK' if not mismatches else 'MISMATCH: ' + ', '.join(mismatches)}")
+            results.append({
+                'file': html_file,
+                'backend': backend,
+                'ms': round(elapsed * 1000, 2),
+                'mismatches': mismatches,
+            })
+    return results
+
+def legacy_scan_image_urls(html_content):
+    """Two findall passes, as collect_image_urls used to do"""
+    urls = {}
+    for pattern in LEGACY_RAW_IMAGE_RES:
+        for img_url in pattern.findall(html_content):
+            if img_url.startswith('//'):
+                img_url = 'https:' + img_url
+            urls[img_url] = None
+    return list(urls)
+
+def legacy_token_filter(urls):
+    """Skip/keep/final-skip checks with per-token substring tests"""
+    kept = []
+    for url in urls:
+        lowered = url.lower()
+        if any(skip in lowered for skip in IMG_SKIP) or not any(keyword in lowered for keyword in IMG_KEEP):
+            continue
+        if any(skip in lowered for skip in FINAL_SKIP):
+            continue
+        kept.append(url)
+    return kept
+
+def compiled_token_filter(urls):
+    """The same checks with the early-exit has_token loops the extractor uses"""
+    kept = []
+    for url in urls:
+        lowered = url.lower()
+        if not has_token(lowered, IMG_SKIP) and has_token(lowered, IMG_KEEP) and not has_token(lowered, FINAL_SKIP):
+            kept.append(url)
+    return kept
+
+def best_time(func, arg, repeat):
+    """Return the best-of-N wall time of func(arg) in seconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_scan(html_files, repeat=20):
+    """Micro-benchmark the raw-HTML image URL scan and the skip-token filters per page
+
+    The legacy scan runs its two patterns one after the other, so scan
+    parity compares the set of URLs found, not their order.
+    """
+    results = []
+    print(f"{'page':40} {'stage':>8} {'legacy':>10} {'compiled':>10} {'speedup':>8}  parity")
+    for html_file in html_files:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        old_urls = legacy_scan_image_urls(html_content)
+        scan_ok = set(old_urls) == set(scan_image_urls(html_content))
+        # Filter over every URL-ish token on the page so the skip lists get real work
+        candidates = old_urls + re.findall(r'(?:https?:)?//[^"\'\s>]+', html_content)
+        filter_ok = legacy_token_filter(candidates) == compiled_token_filter(candidates)
+
+        for stage, old_func, new_func, arg, ok in (
+                ('scan', legacy_scan_image_urls, scan_image_urls, html_content, scan_ok),
+                ('filter', legacy_token_filter, compiled_token_filter, candidates, filter_ok)):
+            old_time = best_time(old_func, arg, repeat)
+            new_time = best_time(new_func, arg, repeat)
+            speedup = old_time / new_time if new_time else 0.0
+            print(f"{html_file[-40:]:40} {stage:>8} {old_time * 1000:8.2f}ms {new_time * 1000:8.2f}ms "
+                  f"{speedup:7.2f}x  {'OK' if ok else 'MISMATCH'}")
+            results.append({
+                'file': html_file,
+                'stage': stage,
+                'legacy_ms': round(old_time * 1000, 3),
+                'compiled_ms': round(new_time * 1000, 3),
+                'speedup': round(speedup, 2),
+                'parity': ok,
+            })
+    return results
+
+def sample_product(product_info, n, record):
+    """Build one product entry (info, saved images with variants, kit) as records or plain dicts
+
+    Every string is built fresh for product n, as it would be when parsed
+    from its own page, so the dict and record layouts hold the same data.
+    """
+    make = (lambda cls, **fields: cls(**fields)) if record else (lambda cls, **fields: fields)
+    name = f"{product_info['name']} #{n}"
+    images = [f"{url}&p={n}" for url in product_info['images']]
+    saved_images = []
+    for i, url in enumerate(images):
+        public_path = f"/product-{n}/product-{n}-{i + 1:02d}.jpg"
+        variants = [make(records.ImageVariant, format=fmt, width=width, height=width, bytes=width * 40,
+                         local_path=f"public/product-{n}/variants/{i}-{width}w.{fmt}",
+                         public_path=f"/product-{n}/variants/{i}-{width}w.{fmt}")
+                    for fmt in ('webp', 'avif') for width in (320, 640, 960)]
+        saved_images.append(make(records.SavedImage, original_url=url, local_path=f"public{public_path}",
+                                 public_path=public_path, filename=public_path.rsplit('/', 1)[1],
+                                 width=1200, height=1200, bytes=90000, variants=variants,
+                                 srcset={'webp': f"{public_path} 320w", 'avif': f"{public_path} 320w"}))
+    info = make(records.ProductInfo, name=name, price=product_info['price'],
+                original_price=product_info['original_price'], description=str(product_info['description']),
+                brand=str(product_info['brand']), category=str(product_info['category']), images=images,
+                details=[str(detail) for detail in product_info['details']])
+    kit = make(records.KitData, id=f"kit-{n}", name=name, wrestler='Cody Rhodes', price=49.99,
+               originalPrice=149.99, savings=66, description=name[:50], items=[name, 'Poster'],
+               images=[img['public_path'] for img in saved_images[:5]])
+    return {'source': f"page-{n}.html", 'product_info': info, 'saved_images': saved_images, 'kit_data': kit}
+
+def traced_size_kb(build):
+    """Build a structure and return it with the KB of Python memory it keeps alive"""
+    tracemalloc.start()
+    try:
+        value = build()
+        return value, round(tracemalloc.get_traced_memory()[0] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def bench_records(html_file, count=2000, repeat=3):
+    """Compare memory and JSON write time of plain dicts against the compact records"""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        product_info = extract_product_info(f.read())
+
+    dicts, dict_kb = traced_size_kb(lambda: {f"p{n}": sample_product(product_info, n, False) for n in range(count)})
+    recs, record_kb = traced_size_kb(lambda: {f"p{n}": sample_product(product_info, n, True) for n in range(count)})
+    if json.loads(json.dumps(dicts)) != json.loads(records.dumps(recs)):
+        print("MISMATCH: records serialize differently from the dicts")
+        return None
+
+    timings = {
+        'json.dump indent=2 (dicts)': lambda: json.dumps(dicts, indent=2, ensure_ascii=False),
+        'records.dumps indent (dicts)': lambda: records.dumps(dicts, indent=True),
+        'records.dumps indent (records)': lambda: records.dumps(recs, indent=True),
+        'records.dumps compact (records)': lambda: records.dumps(recs),
+    }
+    print(f"{count} products from {html_file} (orjson {'on' if records.HAS_ORJSON else 'not installed'})")
+    print(f"  memory: dicts {dict_kb:.0f} KB, records {record_kb:.0f} KB ({record_kb / dict_kb * 100:.0f}%)")
+    results = {'count': count, 'dict_kb': dict_kb, 'record_kb': record_kb}
+    for label, func in timings.items():
+        elapsed = min(time_once(func) for _ in range(repeat))
+        print(f"  {label:34} {elapsed * 1000:8.1f}ms")
+        results[label] = round(elapsed * 1000, 2)
+    return results
+
+def build_image_library(root, count, per_folder=20):
+    """Write count copies of a few distinct JPEGs into product folders; returns the products and manifest images"""
+    from PIL import Image
+
+    bases = []
+    for n in range(8):
+        img = Image.effect_noise((480, 480), 40 + n * 10).convert('RGB')
+        path = os.path.join(root, f"base-{n}.jpg")
+        img.save(path, 'JPEG', quality=85)
+        bases.append((path, file_sha256(path), os.path.getsize(path)))
+
+    products = []
+    manifest_images = {}
+    for folder_number in range(0, count, per_folder):
+        name = f"Product {folder_number // per_folder:04d}"
+        folder = os.path.join(root, 'public', name.replace(' ', '-'))
+        os.makedirs(folder)
+        saved_images = []
+        for n in range(folder_number, min(count, folder_number + per_folder)):
+            base_path, sha, size = bases[n % len(bases)]
+            filename = f"{name.replace(' ', '-')}-{n:05d}.jpg"
+            shutil.copyfile(base_path, os.path.join(folder, filename))
+            public_path = f"/{name.replace(' ', '-')}/{filename}"
+            saved_images.append({'public_path': public_path, 'original_url': f"https://images.example.com/{n}.jpg"})
+            manifest_images[public_path] = {'sha256': sha, 'bytes': size, 'width': 480, 'height': 480}
+        products.append((name, saved_images))
+    return products, manifest_images
+
+def damage_library(root, products, every=97):
+    """Truncate, bit-flip, delete or overwrite every Nth image; returns {public path: kind of damage}"""
+    damaged = {}
+    images = [image for _, saved_images in products for image in saved_images]
+    for n, image in enumerate(images[::every]):
+        path = os.path.join(root, 'public', *image['public_path'].strip('/').split('/'))
+        kind = ('truncated', 'flipped', 'deleted', 'replaced')[n % 4]
+        if kind == 'truncated':
+            os.truncate(path, os.path.getsize(path) // 2)
+        elif kind == 'flipped':
+            with open(path, 'r+b') as f:
+                f.seek(4096)
+                byte = f.read(1)
+                f.seek(4096)
+                f.write(bytes([byte[0] ^ 0xFF]))
+        elif kind == 'deleted':
+            os.remove(path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(b'<html><body>503 Service Unavailable</body></html>')
+        damaged[image['public_path']] = kind
+    return damaged
+
+def bench_verify(count=2000, repeat=3, workers=None):
+    """Time verify_assets over a synthetic library with known damage and check it finds exactly that damage"""
+    import verify_assets
+
+    if not verify_assets.HAS_PILLOW:
+        print("Pillow is not installed - skipping the verify benchmark")
+        return None
+    root = tempfile.mkdtemp(prefix='verify-bench-')
+    try:
+        products, manifest_images = build_image_library(root, count)
+        damaged = damage_library(root, products)
+        items = verify_assets.expected_images(products, os.path.join(root, 'public'), manifest_images)
+        total_bytes = sum(entry['bytes'] for entry in manifest_images.values())
+        print(f"{count} images ({total_bytes / 1024 / 1024:.1f} MB), {len(damaged)} damaged")
+        results = {'count': count, 'damaged': len(damaged), 'parity': True}
+        for label, full_hash in (('full (sizes, headers, hashes)', True), ('quick (sizes, headers)', False)):
+            elapsed = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                bad, strays, folders = verify_assets.verify_images(items, workers or verify_assets.VERIFY_WORKERS,
+                                                                   full_hash)
+                run = time.perf_counter() - started
+                elapsed = run if elapsed is None else min(elapsed, run)
+            found = {item['public_path'] for item, problems in bad}
+            # A same-size bit flip only shows up in the hash
+            parity = found == {path for path, kind in damaged.items() if full_hash or kind != 'flipped'}
+            results['parity'] = results['parity'] and parity
+            results[label] = round(elapsed * 1000, 1)
+            print(f"  {label:32} {elapsed * 1000:8.1f}ms  {count / elapsed:8.0f} img/s  "
+                  f"{len(found)} found  {'OK' if parity else 'MISMATCH'}")
+        return results
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def time_once(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+def fake_image_bytes(path):
+    """Deterministic pseudo-image payload for a request path"""
+    seed = hashlib.sha256(path.encode('utf-8')).digest()
+    size = FAKE_IMAGE_MIN_BYTES + int.from_bytes(seed[:4], 'big') % (FAKE_IMAGE_MAX_BYTES - FAKE_IMAGE_MIN_BYTES)
+    return (seed * (size // len(seed) + 1))[:size]
+
+class FakeImageHandler(BaseHTTPRequestHandler):
+    """Serves a stable payload with an ETag for any image path"""
+
+    def do_GET(self):
+        body = fake_image_bytes(self.path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def fake_image_server(handler=FakeImageHandler):
+    """Run handler (FakeImageHandler by default) on a free local port and yield its base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to the fake server, keeping the original host in the path"""
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+        return super().send(request, **kwargs)
+
+@contextlib.contextmanager
+def replay_downloads(base_url):
+    """Route the scraper's shared download session to the fake image server"""
+    session = scraper.get_session()
+    saved_adapters = dict(session.adapters)
+    adapter = ReplayAdapter(base_url, pool_maxsize=scraper.MAX_DOWNLOAD_WORKERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    try:
+        yield
+    finally:
+        session.adapters.clear()
+        session.adapters.update(saved_adapters)
+
+def peak_memory_kb(func, *args, **kwargs):
+    """Run func and return its peak traced Python allocation in KB"""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def bench_page(html_file, repeat):
+    """Run the parse, download and full main() benchmarks for one fixture page"""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        html_content = f.read()
+
+    parse_time = time_call(extract_product_info, html_content, repeat)
+    parse_peak = peak_memory_kb(extract_product_info, html_content)
+    product_info = extract_product_info(html_content)
+
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    cwd = os.getcwd()
+    try:
+        summary = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.save_product_images(product_info, base_dir=os.path.join(workdir, 'download'), summary=summary)
+
+        shutil.copyfile(html_file, os.path.join(workdir, 'html.html'))
+        os.chdir(workdir)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            main_peak = peak_memory_kb(scraper.main, use_cache=False, variants=False, manifest=False)
+        main_time = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'parse_ms': round(parse_time * 1000, 2),
+        'parse_peak_kb': parse_peak,
+        'download_images': summary.get('images', 0),
+        'images_per_second': summary.get('images_per_second', 0.0),
+        'download_bytes': summary.get('bytes', 0),
+        'download_seconds': summary.get('wall_seconds', 0.0),
+        'main_seconds': round(main_time, 3),
+        'main_peak_kb': main_peak,
+    }
+
+def run_suite(html_files, repeat=5, output=None):
+    """Benchmark every fixture page and optionally store the results as JSON"""
+    results = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'parser': get_backend().name,
+        'pages': {},
+    }
+    with fake_image_server() as base_url, replay_downloads(base_url):
+        for html_file in html_files:
+            page = bench_page(html_file, repeat)
+            results['pages'][html_file] = page
+            print(f"{html_file}: parse {page['parse_ms']}ms (peak {page['parse_peak_kb']} KB), "
+                  f"{page['download_images']} images at {page['images_per_second']} img/s "
+                  f"({page['download_bytes'] / 1024:.1f} KB), main() {page['main_seconds']}s "
+                  f"(peak {page['main_peak_kb']} KB)")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    return results
+
+def compare_results(base_file, new_file, threshold=REGRESSION_THRESHOLD):
+    """Print metric changes between two suite runs and return the regressions"""
+    with open(base_file, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_file, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    regressions = []
+    for page, new_metrics in new['pages'].items():
+        base_metrics = base['pages'].get(page)
+        if not base_metrics:
+            print(f"{page}: no baseline, skipped")
+            continue
+        for metric, direction in SUITE_METRICS.items():
+            old_value, new_value = base_metrics.get(metric), new_metrics.get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = change > threshold if direction == 'lower' else change < -threshold
+            flag = 'REGRESSION' if worse else 'ok'
+            print(f"{page[-30:]:30} {metric:18} {old_value:>12} -> {new_value:>12} {change * 100:+7.1f}%  {flag}")
+            if worse:
+                regressions.append({'page': page, 'metric': metric, 'base': old_value,
+                                    'new': new_value, 'change': round(change, 4)})
+
+    print(f"{len(regressions)} regression(s) beyond {threshold * 100:.0f}%")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WWE product scraper")
+    commands = parser.add_subparsers(dest='command')
+
+    extract = commands.add_parser('extract', help="single-pass vs multi-pass extraction per page (default)")
+    backends = commands.add_parser('backends', help="compare every installed parser backend; exits 1 on any parity mismatch")
+    suite = commands.add_parser('suite', help="parse, download and main() benchmarks against a fake image server")
+    records_command = commands.add_parser('records', help="memory and JSON write time of compact records vs dicts")
+    records_command.add_argument('source', nargs='?', default='html.html', help="fixture HTML file")
+    records_command.add_argument('--count', type=int, default=2000, help="products to build")
+    records_command.add_argument('--repeat', type=int, default=3, help="runs per serializer (best time is kept)")
+    verify = commands.add_parser('verify', help="verify_assets over a synthetic damaged image library; "
+                                                "exits 1 unless exactly the damaged images are found")
+    verify.add_argument('--count', type=int, default=2000, help="images in the library")
+    verify.add_argument('--repeat', type=int, default=3, help="runs per mode (best time is kept)")
+    verify.add_argument('--workers', type=int, default=None, help="folders checked concurrently")
+    scan = commands.add_parser('scan', help="raw-HTML image URL scan and skip-token filter micro-benchmarks; "
+                                            "exits 1 on any parity mismatch")
+    for command in (extract, backends, suite, scan):
+        command.add_argument('source', nargs='?', default='html.html', help="fixture HTML file, directory or glob")
+        command.add_argument('--repeat', type=int, default=20 if command is scan else 5,
+                             help="runs per page (best time is kept)")
+    suite.add_argument('--output', help="write results to this JSON file")
+
+    compare = commands.add_parser('compare', help="compare two suite result files; exits 1 on regressions")
+    compare.add_argument('base', help="baseline results JSON")
+    compare.add_argument('new', help="new results JSON")
+    compare.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                         help="relative change that counts as a regression (default 0.10)")
+
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        results = bench_verify(count=args.count, repeat=args.repeat, workers=args.workers)
+        if results is not None and not results['parity']:
+            sys.exit(1)
+        return
+
+    if args.command == 'compare':
+        if compare_results(args.base, args.new, args.threshold):
+            sys.exit(1)
+        return
+
+    source = getattr(args, 'source', 'html.html')
+    repeat = getattr(args, 'repeat', 5)
+    html_files = find_html_files(source)
+    if not html_files:
+        print(f"No HTML files found for {source}")
+        return
+    if args.command == 'backends':
+        results = bench_backends(html_files, repeat=repeat)
+        if any(result['mismatches'] for result in results):
+            sys.exit(1)
+    elif args.command == 'records':
+        if bench_records(html_files[0], count=args.count, repeat=repeat) is None:
+            sys.exit(1)
+    elif args.command == 'scan':
+        results = bench_scan(html_files, repeat=repeat)
+        if not all(result['parity'] for result in results):
+            sys.exit(1)
+    elif args.command == 'suite':
+        run_suite(html_files, repeat=repeat, output=args.output)
+    else:
+        bench_extraction(html_files, repeat=repeat)
+
+if __name__ == "__main__":
+    main()
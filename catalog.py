@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Product catalog - append-only SQLite store of every scraped product, its
+images, kit data and price snapshots, with history queries and JSON export
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+
+from records import dumps
+
+CATALOG_FILE = 'catalog.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    name TEXT,
+    brand TEXT,
+    category TEXT,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS scrapes (
+    scrape_id INTEGER PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    source TEXT,
+    product_info TEXT,
+    download_summary TEXT
+);
+CREATE INDEX IF NOT EXISTS scrapes_product ON scrapes (product_id, scraped_at);
+CREATE INDEX IF NOT EXISTS scrapes_time ON scrapes (scraped_at);
+CREATE TABLE IF NOT EXISTS price_snapshots (
+    scrape_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    price REAL,
+    original_price REAL
+);
+CREATE INDEX IF NOT EXISTS prices_product ON price_snapshots (product_id, scraped_at);
+CREATE INDEX IF NOT EXISTS prices_time ON price_snapshots (scraped_at);
+CREATE TABLE IF NOT EXISTS images (
+    scrape_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    position INTEGER,
+    original_url TEXT,
+    public_path TEXT,
+    local_path TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS images_product ON images (product_id, scrape_id);
+CREATE TABLE IF NOT EXISTS kits (
+    scrape_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    kit_id TEXT,
+    wrestler_name TEXT,
+    price REAL,
+    original_price REAL,
+    scraped_at TEXT NOT NULL,
+    kit_data TEXT
+);
+CREATE INDEX IF NOT EXISTS kits_wrestler ON kits (wrestler_name COLLATE NOCASE, scraped_at);
+CREATE INDEX IF NOT EXISTS kits_product ON kits (product_id, scraped_at);
+"""
+
+def to_json(value):
+    return dumps(value).decode('utf-8')
+
+class Catalog:
+    """Append-only product history in a single SQLite file
+
+    Every scrape adds a row to scrapes plus its price snapshot, images and
+    kit; products keeps one row per product id with first/last seen times.
+    """
+
+    def __init__(self, db_file=CATALOG_FILE):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_products(self, records):
+        """Bulk insert scraped products in one transaction
+
+        Each record is a dict with product_id, product_info, saved_images,
+        kit_data and optionally source, download_summary and scraped_at.
+        Returns the number of scrapes added.
+        """
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self.conn:
+            for record in records:
+                product_id = record['product_id']
+                product_info = record['product_info']
+                kit_data = record.get('kit_data') or {}
+                scraped_at = record.get('scraped_at') or now
+
+                self.conn.execute(
+                    'INSERT INTO products (product_id, name, brand, category, first_seen, last_seen) '
+                    'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(product_id) DO UPDATE SET '
+                    'name = excluded.name, brand = excluded.brand, category = excluded.category, '
+                    'last_seen = excluded.last_seen',
+                    (product_id, product_info.get('name'), product_info.get('brand'),
+                     product_info.get('category'), scraped_at, scraped_at))
+                scrape_id = self.conn.execute(
+                    'INSERT INTO scrapes (product_id, scraped_at, source, product_info, download_summary) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (product_id, scraped_at, record.get('source'), to_json(product_info),
+                     to_json(record.get('download_summary') or {}))).lastrowid
+                self.conn.execute(
+                    'INSERT INTO price_snapshots (scrape_id, product_id, scraped_at, price, original_price) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (scrape_id, product_id, scraped_at, product_info.get('price'),
+                     product_info.get('original_price')))
+                self.conn.executemany(
+                    'INSERT INTO images (scrape_id, product_id, position, original_url, public_path, '
+                    'local_path, record) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(scrape_id, product_id, position, img.get('original_url'), img.get('public_path'),
+                      img.get('local_path'), to_json(img))
+                     for position, img in enumerate(record.get('saved_images') or [])])
+                if kit_data:
+                    self.conn.execute(
+                        'INSERT INTO kits (scrape_id, product_id, kit_id, wrestler_name, price, original_price, '
+                        'scraped_at, kit_data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (scrape_id, product_id, kit_data.get('id'), kit_data.get('wrestler'),
+                         kit_data.get('price'), kit_data.get('originalPrice'), scraped_at, to_json(kit_data)))
+        return len(records)
+
+    def add_price_snapshot(self, product_id, price, original_price, scraped_at=None):
+        """Record a price seen without a full scrape against the product's latest scrape
+
+        Returns False when the product has never been scraped into the catalog.
+        """
+        scraped_at = scraped_at or time.strftime('%Y-%m-%d %H:%M:%S')
+        with self.conn:
+            row = self.conn.execute(
+                'SELECT scrape_id FROM scrapes WHERE product_id = ? ORDER BY scraped_at DESC, scrape_id DESC LIMIT 1',
+                (product_id,)).fetchone()
+            if row is None:
+                return False
+            self.conn.execute(
+                'INSERT INTO price_snapshots (scrape_id, product_id, scraped_at, price, original_price) '
+                'VALUES (?, ?, ?, ?, ?)', (row['scrape_id'], product_id, scraped_at, price, original_price))
+            self.conn.execute('UPDATE products SET last_seen = ? WHERE product_id = ?', (scraped_at, product_id))
+        return True
+
+    def sources(self):
+        """Return {source URL: product_id} for the latest web scrape of every product"""
+        rows = self.conn.execute(
+            "SELECT product_id, source FROM scrapes WHERE source LIKE 'http%' "
+            'ORDER BY scraped_at, scrape_id').fetchall()
+        return {row['source']: row['product_id'] for row in rows}
+
+    def kits_for_wrestler(self, wrestler_name, latest_only=True):
+        """Return kit data for a wrestler, newest first (one per product by default)"""
+        rows = self.conn.execute(
+            'SELECT product_id, scraped_at, kit_data FROM kits '
+            'WHERE wrestler_name = ? COLLATE NOCASE ORDER BY scraped_at DESC, scrape_id DESC',
+            (wrestler_name,)).fetchall()
+        kits, seen = [], set()
+        for row in rows:
+            if latest_only and row['product_id'] in seen:
+                continue
+            seen.add(row['product_id'])
+            kits.append(dict(json.loads(row['kit_data']), scraped_at=row['scraped_at']))
+        return kits
+
+    def price_changes(self, since=None):
+        """Return every snapshot whose price differs from the product's previous one"""
+        rows = self.conn.execute(
+            'SELECT * FROM (SELECT product_id, scraped_at, price, original_price, '
+            'LAG(price) OVER w AS previous_price, LAG(original_price) OVER w AS previous_original_price, '
+            'LAG(scrape_id) OVER w AS previous_scrape FROM price_snapshots '
+            'WINDOW w AS (PARTITION BY product_id ORDER BY scraped_at, scrape_id)) '
+            'WHERE previous_scrape IS NOT NULL AND scraped_at >= ? '
+            'AND (price IS NOT previous_price OR original_price IS NOT previous_original_price) '
+            'ORDER BY scraped_at',
+            (since or '',)).fetchall()
+        return [dict(row) for row in rows]
+
+    def price_history(self, product_id):
+        """Return every price snapshot of one product, oldest first"""
+        rows = self.conn.execute(
+            'SELECT scraped_at, price, original_price FROM price_snapshots '
+            'WHERE product_id = ? ORDER BY scraped_at, scrape_id', (product_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def products(self):
+        """Return every known product with its first/last seen time"""
+        rows = self.conn.execute('SELECT * FROM products ORDER BY last_seen DESC').fetchall()
+        return [dict(row) for row in rows]
+
+    def latest(self, product_id):
+        """Return the latest scrape of a product in the extracted_product_data.json shape"""
+        row = self.conn.execute(
+            'SELECT * FROM scrapes WHERE product_id = ? ORDER BY scraped_at DESC, scrape_id DESC LIMIT 1',
+            (product_id,)).fetchone()
+        if row is None:
+            return None
+        images = self.conn.execute(
+            'SELECT record FROM images WHERE scrape_id = ? ORDER BY position', (row['scrape_id'],)).fetchall()
+        kit = self.conn.execute('SELECT kit_data FROM kits WHERE scrape_id = ?', (row['scrape_id'],)).fetchone()
+        return {
+            'product_info': json.loads(row['product_info']),
+            'saved_images': [json.loads(image['record']) for image in images],
+            'kit_data': json.loads(kit['kit_data']) if kit else {},
+            'download_summary': json.loads(row['download_summary']),
+            'scraped_at': row['scraped_at'],
+        }
+
+    def export_json(self, output_file, product_id=None):
+        """Write one product as extracted_product_data.json, or every product keyed by id"""
+        if product_id:
+            data = self.latest(product_id)
+            if data is None:
+                raise KeyError(product_id)
+        else:
+            data = {
+                'products': {product['product_id']: self.latest(product['product_id'])
+                             for product in self.products()},
+                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return data
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the scraped product catalog")
+    parser.add_argument('--db', default=CATALOG_FILE, help="catalog database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('products', help="list every known product")
+    kits_parser = commands.add_parser('kits', help="kits for one wrestler")
+    kits_parser.add_argument('wrestler', help="wrestler name, e.g. 'John Cena'")
+    kits_parser.add_argument('--all', action='store_true', help="include older snapshots")
+    changes_parser = commands.add_parser('changes', help="price changes since a date")
+    changes_parser.add_argument('--since', default=None, help="YYYY-MM-DD[ HH:MM:SS]")
+    history_parser = commands.add_parser('history', help="price history of one product")
+    history_parser.add_argument('product_id')
+    export_parser = commands.add_parser('export', help="export products as JSON")
+    export_parser.add_argument('--product', default=None, help="export one product in the single-product format")
+    export_parser.add_argument('--output', default='extracted_products.json', help="JSON file to write")
+    args = parser.parse_args()
+
+    with Catalog(args.db) as catalog:
+        if args.command == 'products':
+            for product in catalog.products():
+                print(f"{product['product_id']}: {product['name']} "
+                      f"(first seen {product['first_seen']}, last seen {product['last_seen']})")
+        elif args.command == 'kits':
+            for kit in catalog.kits_for_wrestler(args.wrestler, latest_only=not args.all):
+                print(f"{kit['id']}: {kit['name']} - ${kit['price']} (was ${kit['originalPrice']}) "
+                      f"[{kit['scraped_at']}]")
+        elif args.command == 'changes':
+            for change in catalog.price_changes(args.since):
+                print(f"{change['scraped_at']} {change['product_id']}: "
+                      f"${change['previous_price']} -> ${change['price']}")
+        elif args.command == 'history':
+            for snapshot in catalog.price_history(args.product_id):
+                print(f"{snapshot['scraped_at']}: ${snapshot['price']} (original ${snapshot['original_price']})")
+        elif args.command == 'export':
+            data = catalog.export_json(args.output, args.product)
+            count = 1 if args.product else len(data['products'])
+            print(f"{args.output} - {count} products exported")
+
+if __name__ == "__main__":
+    main()
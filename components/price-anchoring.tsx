@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect } from "react"
+import { useState, useEffect, type SyntheticEvent } from "react"
 import { CheckCircle } from "lucide-react"
 import Image from "next/image"
 
@@ -14,6 +14,7 @@ interface Kit {
   description: string
   items: string[]
   images: string[]
+  srcSets?: Record<string, string>[]
 }
 
 const kits: Kit[] = [
@@ -65,6 +66,38 @@ const kits: Kit[] = [
   }
 ]
 
+// Formats the scraper encodes variants in, best first; the browser takes the first <source> it supports
+const SOURCE_TYPES: [string, string][] = [
+  ["avif", "image/avif"],
+  ["webp", "image/webp"],
+]
+
+interface KitImageProps {
+  src: string
+  srcSet?: Record<string, string>
+  sizes: string
+  alt: string
+  width: number
+  height: number
+  className?: string
+  onError?: (e: SyntheticEvent<HTMLImageElement>) => void
+}
+
+// Renders the responsive variants as <picture> sources when the kit has them
+function KitImage({ src, srcSet, sizes, alt, width, height, className, onError }: KitImageProps) {
+  if (!srcSet) {
+    return <Image src={src} alt={alt} width={width} height={height} className={className} onError={onError} />
+  }
+  return (
+    <picture className="contents">
+      {SOURCE_TYPES.filter(([format]) => srcSet[format]).map(([format, type]) => (
+        <source key={format} type={type} srcSet={srcSet[format]} sizes={sizes} />
+      ))}
+      <img src={src} alt={alt} width={width} height={height} sizes={sizes} className={className} onError={onError} />
+    </picture>
+  )
+}
+
 interface PriceAnchoringProps {
   correctAnswers: number
   onBuyClick?: (selectedKit: string) => void
@@ -121,8 +154,10 @@ export default function PriceAnchoring({ correctAnswers, onBuyClick }: PriceAnch
       <div className="flex items-center justify-between mb-8">
         <div className="flex items-center space-x-4">
           <div className="w-20 h-30 rounded-lg overflow-hidden bg-gray-50 relative">
-            <Image
+            <KitImage
               src={selectedKitData.images[currentImageIndex]}
+              srcSet={selectedKitData.srcSets?.[currentImageIndex]}
+              sizes="80px"
               alt={selectedKitData.name}
               width={96}
               height={96}
@@ -161,8 +196,10 @@ export default function PriceAnchoring({ correctAnswers, onBuyClick }: PriceAnch
                   : 'border-gray-200 hover:border-gray-300 hover:scale-102'
               }`}
             >
-              <Image
+              <KitImage
                 src={image}
+                srcSet={selectedKitData.srcSets?.[index]}
+                sizes="64px"
                 alt={`${selectedKitData.name} view ${index + 1}`}
                 width={64}
                 height={64}
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WWE Product Crawler - fetches product pages (or every product on a category
+listing) over a pooled async client and feeds them straight into the scraper
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from urllib.parse import urljoin, urlparse
+
+import scraper
+from scraper import DOWNLOAD_HEADERS, backoff_delay, extract_product_info, save_scraped_products
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 2.0  # Requests per second per host
+DEFAULT_BURST = 4
+MAX_RETRIES = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+PAGE_HEADERS = dict(DOWNLOAD_HEADERS, Accept='text/html,application/xhtml+xml,*/*;q=0.8')
+
+# Product detail links on Fanatics-hosted storefronts look like /<slug>/p-<id>
+PRODUCT_LINK_RE = re.compile(r'href="([^"#]*/p-[\w+-]+[^"#]*)"')
+
+class TokenBucket:
+    """Async token bucket allowing rate requests per second with bursts up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class HTTPStatusError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+class AiohttpClient:
+    """Pooled aiohttp client"""
+
+    def __init__(self, concurrency, timeout):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector, headers=PAGE_HEADERS,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def get_text(self, url):
+        async with self.session.get(url) as response:
+            if response.status >= 400:
+                raise HTTPStatusError(response.status, response.headers.get('Retry-After'))
+            return await response.text()
+
+class RequestsClient:
+    """Fallback client running the scraper's pooled requests session on worker threads"""
+
+    def __init__(self, concurrency, timeout):
+        self.timeout = timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def _get(self, url):
+        response = scraper.get_session().get(url, headers=PAGE_HEADERS, timeout=self.timeout)
+        if response.status_code >= 400:
+            raise HTTPStatusError(response.status_code, response.headers.get('Retry-After'))
+        return response.text
+
+    async def get_text(self, url):
+        return await asyncio.to_thread(self._get, url)
+
+class Crawler:
+    """Fetches pages with per-host rate limiting, bounded concurrency and retries"""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_retries=MAX_RETRIES, timeout=20):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.buckets = {}
+        self.semaphore = None
+        self.client = None
+        self.stats = {'requests': 0, 'retries': 0, 'bytes': 0}
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    async def fetch(self, url):
+        """Fetch a page, retrying transient failures with exponential backoff"""
+        for attempt in range(self.max_retries):
+            await self.bucket(url).acquire()
+            try:
+                async with self.semaphore:
+                    self.stats['requests'] += 1
+                    html_content = await self.client.get_text(url)
+                self.stats['bytes'] += len(html_content)
+                return html_content
+            except HTTPStatusError as e:
+                if e.status not in RETRY_STATUSES or attempt == self.max_retries - 1:
+                    raise
+                delay = float(e.retry_after) if e.retry_after and e.retry_after.isdigit() else backoff_delay(attempt)
+            except Exception as e:
+                if attempt == self.max_retries - 1 or not is_network_error(e):
+                    raise
+                delay = backoff_delay(attempt)
+            self.stats['retries'] += 1
+            print(f"    Retrying {url} in {delay:.1f}s (attempt {attempt + 2})")
+            await asyncio.sleep(delay)
+
+    async def scrape(self, url, **extract_options):
+        """Fetch one product page and extract it without touching disk"""
+        started = time.perf_counter()
+        try:
+            html_content = await self.fetch(url)
+            product_info = await asyncio.to_thread(extract_product_info, html_content, url=url, **extract_options)
+            return url, product_info, time.perf_counter() - started, None
+        except Exception as e:
+            return url, None, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+    async def expand_listing(self, listing_url, max_products=None):
+        """Return the product page URLs linked from a category or search listing"""
+        html_content = await self.fetch(listing_url)
+        urls = []
+        for href in PRODUCT_LINK_RE.findall(html_content):
+            url = urljoin(listing_url, href.replace('&amp;', '&'))
+            if url not in urls:
+                urls.append(url)
+        print(f"  Listing {listing_url}: {len(urls)} product links")
+        return urls[:max_products] if max_products else urls
+
+    async def run(self, urls, listings=(), max_products=None, **extract_options):
+        """Crawl product URLs plus every product found on the listing pages
+
+        A listing that cannot be fetched is reported as a failed result,
+        like a product page, and the rest of the crawl goes on.
+        """
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        client_class = AiohttpClient if HAS_AIOHTTP else RequestsClient
+        async with client_class(self.concurrency, self.timeout) as self.client:
+            urls = list(urls)
+            failures = []
+            for listing_url in listings:
+                started = time.perf_counter()
+                try:
+                    listed = await self.expand_listing(listing_url, max_products)
+                except Exception as e:
+                    print(f"  Listing {listing_url} failed: {type(e).__name__}: {e}")
+                    failures.append((listing_url, None, time.perf_counter() - started, f"{type(e).__name__}: {e}"))
+                    continue
+                for url in listed:
+                    if url not in urls:
+                        urls.append(url)
+            results = await asyncio.gather(*(self.scrape(url, **extract_options) for url in urls))
+            return failures + list(results)
+
+def is_network_error(error):
+    """True for connection failures and timeouts worth retrying"""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    if HAS_AIOHTTP and isinstance(error, aiohttp.ClientError):
+        return True
+    return isinstance(error, scraper.requests.RequestException)
+
+def crawl_main(urls, listings=(), concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+               max_retries=MAX_RETRIES, max_products=None, download=True, use_cache=True, variants=True,
+               data_file='extracted_products.json', code_file='kits_code.ts'):
+    """Crawl product pages and write the merged dataset and kits array"""
+    print("WWE Product Crawler Started!")
+    print("=" * 50)
+
+    crawler = Crawler(concurrency=concurrency, rate=rate, burst=burst, max_retries=max_retries)
+    started = time.perf_counter()
+    results = asyncio.run(crawler.run(urls, listings, max_products))
+    crawl_time = time.perf_counter() - started
+
+    stats = crawler.stats
+    print(f"Fetched {len(results)} pages in {crawl_time:.2f}s ({stats['requests']} requests, "
+          f"{stats['retries']} retries, {stats['bytes'] / 1024:.1f} KB)")
+
+    products, report = save_scraped_products(results, download=download, use_cache=use_cache,
+                                             variants=variants, data_file=data_file, code_file=code_file)
+    failures = [entry for entry in report if entry['error']]
+    print(f"{len(products)} products scraped, {len(failures)} failed")
+    return products
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl WWE product pages directly")
+    parser.add_argument('urls', nargs='*', help="product page URLs")
+    parser.add_argument('--listing', action='append', default=[], metavar='URL',
+                        help="category or search listing to crawl every product from (repeatable)")
+    parser.add_argument('--max-products', type=int, default=None, help="limit products taken from each listing")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="concurrent requests")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="requests per second per host")
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help="request burst allowed per host")
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES, help="attempts per page")
+    parser.add_argument('--no-images', action='store_true', help="skip image downloads")
+    parser.add_argument('--no-cache', action='store_true', help="bypass the image cache")
+    parser.add_argument('--no-variants', action='store_true', help="skip resized WebP/AVIF variants")
+    args = parser.parse_args()
+
+    if not args.urls and not args.listing:
+        parser.error("give at least one product URL or --listing URL")
+
+    crawl_main(args.urls, args.listing, concurrency=args.concurrency, rate=args.rate, burst=args.burst,
+               max_retries=args.retries, max_products=args.max_products, download=not args.no_images,
+               use_cache=not args.no_cache, variants=not args.no_variants)
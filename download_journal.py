@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download journal - records completed, partial, failed and dropped image
+downloads so an interrupted run can resume where it stopped
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_FILE = '.download_journal.json'
+DONE_STATUSES = ('complete', 'dropped')
+
+class DownloadJournal:
+    """Crash-safe record of every image download in the current run
+
+    Entries are keyed by target file path. The journal is rewritten
+    atomically on every state change and removed once a run finishes with
+    nothing outstanding, so its presence means the last run was interrupted
+    or had failures. Images deleted by the dedup step are kept as 'dropped'
+    so a resumed run does not fetch them again.
+    """
+
+    def __init__(self, journal_file=JOURNAL_FILE):
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.resumed = os.path.exists(journal_file)
+        if self.resumed:
+            try:
+                with open(journal_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable download journal {journal_file}: {e}")
+                self.entries = {}
+            outstanding = sum(1 for entry in self.entries.values() if entry['status'] not in DONE_STATUSES)
+            print(f"Resuming interrupted run: {len(self.entries) - outstanding} downloads done, "
+                  f"{outstanding} outstanding")
+
+    def is_complete(self, filepath, url):
+        """True if filepath was fully downloaded from url and is still intact on disk"""
+        with self.lock:
+            entry = self.entries.get(filepath)
+        return bool(entry and entry['status'] == 'complete' and entry['url'] == url
+                    and os.path.exists(filepath) and os.path.getsize(filepath) == entry['bytes'])
+
+    def is_dropped(self, filepath, url):
+        """True if the image at filepath from url was downloaded and then deleted by dedup"""
+        with self.lock:
+            entry = self.entries.get(filepath)
+        return bool(entry and entry['status'] == 'dropped' and entry['url'] == url)
+
+    def resumable(self, filepath, url):
+        """Return the partial entry for filepath if its transfer can be resumed"""
+        with self.lock:
+            entry = self.entries.get(filepath)
+        if entry and entry['status'] in ('partial', 'failed') and entry['url'] == url:
+            return entry
+        return None
+
+    def mark_partial(self, filepath, url, etag=None, last_modified=None, total=None):
+        self._update(filepath, url=url, status='partial', etag=etag, last_modified=last_modified,
+                     total=total, error=None)
+
+    def mark_complete(self, filepath, url, size):
+        self._update(filepath, url=url, status='complete', bytes=size, error=None)
+
+    def mark_failed(self, filepath, url, error):
+        self._update(filepath, url=url, status='failed', error=str(error))
+
+    def mark_dropped(self, filepath, url, reason):
+        self._update(filepath, url=url, status='dropped', bytes=0, error=None, reason=reason)
+
+    def _update(self, filepath, **fields):
+        with self.lock:
+            entry = self.entries.setdefault(filepath, {'bytes': 0})
+            entry.update(fields)
+            entry['updated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            self._write()
+
+    def _write(self):
+        tmp_path = f"{self.journal_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.journal_file)
+
+    def finish(self):
+        """Print a summary and drop the journal if nothing is left outstanding"""
+        with self.lock:
+            counts = {'complete': 0, 'dropped': 0, 'partial': 0, 'failed': 0}
+            for entry in self.entries.values():
+                counts[entry['status']] += 1
+            if counts['partial'] or counts['failed']:
+                print(f"Download journal: {counts['complete']} complete, {counts['partial']} partial, "
+                      f"{counts['failed']} failed - rerun to resume ({self.journal_file})")
+            else:
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+        return counts
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-pass product extractor - walks the parsed HTML tree once and collects
+name, prices, description and every image source in that one traversal
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+from metrics import METRICS
+from records import ProductInfo
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup tree builder
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+SITE_BASE = 'https://shop.wwe.com'
+
+# Each rule is (selector, how to read the value). For a rule the first
+# matching element in document order is used, exactly like select_one().
+# When the value cannot be read the next rule is tried.
+NAME_RULES = [
+    ('h1.pdp-product-name', 'text'),
+    ('.product-name h1', 'text'),
+    ('h1[data-testid="product-name"]', 'text'),
+    ('.pdp-product-name', 'text'),
+    ('h1.product-title', 'text'),
+    ('.product-detail h1', 'text'),
+    ('title', 'text'),
+    ('meta[property="og:title"]', 'content'),
+]
+
+PRICE_RULES = [
+    ('.price-current', 'price'),
+    ('.pdp-price .price', 'price'),
+    ('[data-testid="price-current"]', 'price'),
+    ('.price .current', 'price'),
+    ('.product-price .current', 'price'),
+    ('.price-value', 'price'),
+    ('.current-price', 'price'),
+]
+
+ORIGINAL_PRICE_RULES = [
+    ('.price-original', 'price'),
+    ('.price .original', 'price'),
+    ('[data-testid="price-original"]', 'price'),
+    ('.was-price', 'price'),
+    ('.price-old', 'price'),
+    ('.original-price', 'price'),
+]
+
+DESCRIPTION_RULES = [
+    ('.product-description', 'text'),
+    ('.pdp-description', 'text'),
+    ('[data-testid="product-description"]', 'text'),
+    ('.product-details .description', 'text'),
+    ('meta[property="og:description"]', 'content'),
+]
+
+IMG_SRC_ATTRS = ('src', 'data-src', 'data-lazy-src', 'data-original')
+IMG_SKIP = ('thumb', 'icon', 'logo', 'sprite', 'favicon')
+IMG_KEEP = ('product', 'image', 'photo', '.jpg', '.jpeg', '.png', '.webp')
+META_IMAGE_PROPERTIES = ('og:image', 'twitter:image')
+FINAL_SKIP = ('favicon', 'icon', 'logo', 'sprite', '16x16', '32x32', '64x64')
+
+# Query parameters that only select a rendition size of the same asset
+WIDTH_PARAMS = ('w', 'width')
+TARGET_IMAGE_WIDTH = 900
+
+PRICE_RE = re.compile(r'[\d,.]+')
+BACKGROUND_IMAGE_RE = re.compile(r'background-image:\s*url\(["\']?([^"\']+)["\']?\)')
+# Image URLs in raw HTML. Starting at the literal '//' lets the regex engine
+# jump straight between candidates; any scheme in front is read back afterwards.
+RAW_IMAGE_RE = re.compile(r'//[^"\'\s>]+\.(?:jpe?g|png|webp|gif)(?:\?[^"\'\s>]*)?', re.IGNORECASE)
+
+def has_token(text, tokens):
+    """Return True if any of the lowercase tokens occurs in the (lowercased) text
+
+    A plain loop that stops at the first hit; over these short token lists
+    it beats both any() with a generator and a compiled alternation.
+    """
+    for token in tokens:
+        if token in text:
+            return True
+    return False
+
+_COMPOUND_RE = re.compile(r'^([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)((?:\[[\w-]+(?:="[^"]*")?\])*)$')
+_CLASS_RE = re.compile(r'\.([\w-]+)')
+_ATTR_RE = re.compile(r'\[([\w-]+)(?:="([^"]*)")?\]')
+
+def _compile_compound(text):
+    """Compile one compound selector (tag.class[attr="v"]) to a tuple, or None"""
+    match = _COMPOUND_RE.match(text)
+    if not match or not text:
+        return None
+    tag, classes, attrs = match.groups()
+    return (
+        tag.lower() if tag else None,
+        tuple(_CLASS_RE.findall(classes)),
+        tuple(_ATTR_RE.findall(attrs)),
+    )
+
+def _match_compound(compound, el):
+    """Check a compiled compound selector against a single element"""
+    tag, classes, attrs = compound
+    if tag and el.name != tag:
+        return False
+    if classes:
+        el_classes = el.get('class') or ()
+        for cls in classes:
+            if cls not in el_classes:
+                return False
+    for name, value in attrs:
+        actual = el.get(name)
+        if actual is None:
+            return False
+        if value and actual != value:
+            return False
+    return True
+
+class CompiledSelector:
+    """A selector compiled ahead of time to a fast element predicate
+
+    Plain descendant selectors made of tag/class/attribute compounds are
+    matched natively; anything else falls back to a compiled soupsieve
+    pattern.
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+        compounds = [_compile_compound(part) for part in selector.split()]
+        if all(compounds):
+            self.compounds = compounds
+            self.pattern = None
+        else:
+            self.compounds = None
+            self.pattern = soupsieve.compile(selector)
+
+    def dispatch_key(self):
+        """Cheapest property of the subject element to index this selector by"""
+        if self.compounds is None:
+            return None
+        tag, classes, attrs = self.compounds[-1]
+        if classes:
+            return ('class', classes[0])
+        if attrs:
+            return ('attr', attrs[0][0])
+        return ('tag', tag)
+
+    def match(self, el):
+        """Return True if the element matches the selector"""
+        if self.pattern is not None:
+            if isinstance(el, Tag):
+                return self.pattern.match(el)
+            return el.css_matches(self.selector)
+        if not _match_compound(self.compounds[-1], el):
+            return False
+        # Descendant combinators: match the remaining compounds on ancestors
+        remaining = len(self.compounds) - 2
+        if remaining < 0:
+            return True
+        for parent in el.parents:
+            if parent.name == '[document]':
+                break
+            if _match_compound(self.compounds[remaining], parent):
+                remaining -= 1
+                if remaining < 0:
+                    return True
+        return False
+
+class SelectorIndex:
+    """Every field rule compiled once and indexed by tag, class and attribute"""
+
+    def __init__(self, rule_groups):
+        self.rule_groups = rule_groups
+        self.selectors = []
+        self.by_tag = {}
+        self.by_class = {}
+        self.by_attr = {}
+        self.always = []
+        for field, rules in rule_groups.items():
+            for position, (selector, reader) in enumerate(rules):
+                compiled = CompiledSelector(selector)
+                slot = (field, position)
+                self.selectors.append((slot, compiled))
+                key = compiled.dispatch_key()
+                if key is None:
+                    self.always.append((slot, compiled))
+                elif key[0] == 'class':
+                    self.by_class.setdefault(key[1], []).append((slot, compiled))
+                elif key[0] == 'attr':
+                    self.by_attr.setdefault(key[1], []).append((slot, compiled))
+                else:
+                    self.by_tag.setdefault(key[1], []).append((slot, compiled))
+
+    def candidates(self, el):
+        """Yield the (slot, selector) pairs that could match the element"""
+        found = self.by_tag.get(el.name)
+        if found:
+            yield from found
+        classes = el.get('class')
+        if classes:
+            for cls in classes:
+                found = self.by_class.get(cls)
+                if found:
+                    yield from found
+        for attr in el.attrs:
+            found = self.by_attr.get(attr)
+            if found:
+                yield from found
+        yield from self.always
+
+FIELD_RULES = {
+    'name': NAME_RULES,
+    'price': PRICE_RULES,
+    'original_price': ORIGINAL_PRICE_RULES,
+    'description': DESCRIPTION_RULES,
+}
+
+class SiteProfile:
+    """Extraction rules for one storefront, compiled once
+
+    A profile holds its field rules (indexed for the single-pass walk), the
+    base URL relative links resolve against, the image skip/keep tokens,
+    the domains and head-of-page signatures that select it, and literal
+    markers that locate the price block for price-only parsing. Every page
+    it extracts is counted together with the rules that matched and the
+    rule that supplied each field, so dead selectors can be pruned.
+    """
+
+    def __init__(self, name, field_rules, base_url=None, domains=(), signatures=(), price_markers=(),
+                 img_skip=IMG_SKIP, img_keep=IMG_KEEP, final_skip=FINAL_SKIP):
+        self.name = name
+        self.field_rules = field_rules
+        self.index = SelectorIndex(field_rules)
+        self.base_url = base_url
+        self.domains = domains
+        self.signatures = signatures
+        self.price_markers = price_markers
+        self.img_skip = tuple(token.lower() for token in img_skip)
+        self.img_keep = tuple(token.lower() for token in img_keep)
+        self.final_skip = tuple(token.lower() for token in final_skip)
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.matched = Counter()  # (field, position) -> pages where the selector matched
+        self.used = Counter()  # (field, position) -> pages where it supplied the value
+
+    def record(self, first_matches, winners):
+        """Count one extracted page and the rules that matched and won on it"""
+        with self.lock:
+            self.pages += 1
+            self.matched.update(first_matches.keys())
+            self.used.update(winners.items())
+        METRICS.count(f'profile.{self.name}.pages')
+
+    def dead_rules(self):
+        """Return (field, selector) for every rule that has not matched on any page"""
+        return [(field, selector) for field, rules in self.field_rules.items()
+                for position, (selector, reader) in enumerate(rules)
+                if not self.matched[(field, position)]]
+
+    def report(self):
+        """Print per-field hit rates and the selectors that never matched"""
+        if not self.pages:
+            return
+        fields = []
+        for field, rules in self.field_rules.items():
+            hits = sum(self.used[(field, position)] for position in range(len(rules)))
+            fields.append(f"{field} {hits}/{self.pages}")
+        print(f"Site profile {self.name}: {self.pages} pages; " + ', '.join(fields))
+        for field, rules in self.field_rules.items():
+            for position, (selector, reader) in enumerate(rules):
+                if self.used[(field, position)]:
+                    print(f"    {field:15} {selector:50} supplied {self.used[(field, position)]}, "
+                          f"matched {self.matched[(field, position)]}")
+        dead = self.dead_rules()
+        if dead:
+            print(f"    {len(dead)} selectors never matched: " +
+                  ', '.join(f"{field}:{selector}" for field, selector in dead))
+
+DEFAULT_PROFILE = SiteProfile('wwe', FIELD_RULES, SITE_BASE, domains=('shop.wwe.com', 'wwe.com'),
+                              signatures=('content="WWE Shop"',),
+                              price_markers=('pdp-price', 'price-current', 'product-price'))
+DEFAULT_INDEX = DEFAULT_PROFILE.index
+
+def absolute_url(url, base=SITE_BASE):
+    """Make protocol-relative and relative URLs absolute against base (a site or page URL)"""
+    if url.startswith('//'):
+        return 'https:' + url
+    if base and url and not url.startswith(('http:', 'https:', 'data:')):
+        return urljoin(base, url)
+    return url
+
+def parse_price(text):
+    """Parse a price like '$1,024.99' to a float, or None"""
+    match = PRICE_RE.search(text.replace('$', '').replace('€', ''))
+    if match:
+        return float(match.group().replace(',', ''))
+    return None
+
+def read_rule(el, reader):
+    """Read a field value from the element a rule matched, or None to try the next rule"""
+    if reader == 'text':
+        return el.get_text().strip()
+    if reader == 'content':
+        content = el.get('content')
+        return content.strip() if content else None
+    if reader == 'price':
+        return parse_price(el.get_text().strip())
+    raise ValueError(f"Unknown rule reader: {reader}")
+
+def images_from_json(data):
+    """Recursively collect image URLs from JSON-LD data"""
+    images = []
+    if isinstance(data, dict):
+        if 'image' in data:
+            img_data = data['image']
+            if isinstance(img_data, list):
+                for img in img_data:
+                    if isinstance(img, str):
+                        images.append(img)
+                    elif isinstance(img, dict) and 'url' in img:
+                        images.append(img['url'])
+            elif isinstance(img_data, str):
+                images.append(img_data)
+
+        # Recursively search for images in nested objects
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                images.extend(images_from_json(value))
+
+    elif isinstance(data, list):
+        for item in data:
+            images.extend(images_from_json(item))
+
+    return images
+
+def walk_document(elements, index=DEFAULT_INDEX):
+    """Walk the tree's elements once, returning first rule matches and raw image sources
+
+    Returns (first_matches, image_sources) where first_matches maps
+    (field, rule position) to the first matching element and image_sources
+    holds the img/meta/JSON-LD/style image URLs in the order the multi-pass
+    extractor used to visit them.
+    """
+    first_matches = {}
+    img_sources = []
+    meta_sources = []
+    json_sources = []
+    style_sources = []
+
+    for el in elements:
+        for slot, selector in index.candidates(el):
+            if slot not in first_matches and selector.match(el):
+                first_matches[slot] = el
+
+        name = el.name
+        if name == 'img':
+            for attr in IMG_SRC_ATTRS:
+                src = el.get(attr)
+                if src:
+                    img_sources.append(src)
+                    break
+        elif name == 'meta':
+            if el.get('property') in META_IMAGE_PROPERTIES:
+                content = el.get('content')
+                if content:
+                    meta_sources.append(content)
+        elif name == 'script':
+            if el.get('type') == 'application/ld+json' and el.string:
+                try:
+                    json_sources.extend(images_from_json(json.loads(el.string)))
+                except json.JSONDecodeError:
+                    pass
+        elif name == 'style':
+            if el.string:
+                style_sources.extend(BACKGROUND_IMAGE_RE.findall(el.string))
+
+    return first_matches, (img_sources, meta_sources, json_sources, style_sources)
+
+def resolve_fields(first_matches, rule_groups=FIELD_RULES, winners=None):
+    """Apply each field's rules in priority order to the collected matches
+
+    When winners is a dict, the position of the rule that supplied each
+    field is stored in it.
+    """
+    values = {}
+    for field, rules in rule_groups.items():
+        for position, (selector, reader) in enumerate(rules):
+            el = first_matches.get((field, position))
+            if el is None:
+                continue
+            value = read_rule(el, reader)
+            if value is not None:
+                values[field] = value
+                if winners is not None:
+                    winners[field] = position
+                break
+    return values
+
+def collect_image_urls(image_sources, html_content, profile=DEFAULT_PROFILE, base_url=SITE_BASE):
+    """Normalize and order image candidates from every extraction method"""
+    img_sources, meta_sources, json_sources, style_sources = image_sources
+    image_urls = {}
+
+    # Method 1: img tags, filtered to likely product images
+    with METRICS.timer('extract.images.img_tags'):
+        for src in img_sources:
+            src = absolute_url(src, base_url)
+            lowered = src.lower()
+            if not has_token(lowered, profile.img_skip) and has_token(lowered, profile.img_keep):
+                image_urls[src] = None
+
+    # Methods 2 and 3: meta tags and JSON-LD
+    with METRICS.timer('extract.images.meta_json'):
+        for content in meta_sources + json_sources:
+            image_urls[absolute_url(content, base_url)] = None
+
+    # Method 4: CSS background images
+    with METRICS.timer('extract.images.css'):
+        for bg_img in style_sources:
+            image_urls[absolute_url(bg_img, base_url)] = None
+
+    # Method 5: image URLs anywhere in the raw HTML
+    with METRICS.timer('extract.images.raw_scan'):
+        image_urls.update(dict.fromkeys(scan_image_urls(html_content)))
+    METRICS.count('extract.image_candidates', len(image_urls))
+
+    # URLs still relative here had no base to resolve against and cannot be downloaded
+    with METRICS.timer('extract.images.filter'):
+        return [url for url in filter_image_urls(image_urls, profile.final_skip)
+                if url.startswith(('http:', 'https:'))]
+
+def resolve_image_urls(image_urls, profile=DEFAULT_PROFILE, base_url=None):
+    """Make structured-data image URLs absolute and drop the ones the DOM path would filter
+
+    URLs still relative after resolving (no base is known) are dropped too.
+    """
+    resolved = [absolute_url(url.strip(), base_url or profile.base_url) for url in image_urls]
+    return [url for url in filter_image_urls(resolved, profile.final_skip)
+            if url.startswith(('http:', 'https:'))]
+
+def scan_image_urls(html_content):
+    """Return every image URL in the raw HTML, in document order, made absolute
+
+    One pass of RAW_IMAGE_RE finds each '//host/...image' candidate, whatever
+    scheme precedes it; like the old two-pattern scan, every candidate comes
+    back as https, so http:// and protocol-relative URLs are upgraded.
+    """
+    return ['https:' + match.group() for match in RAW_IMAGE_RE.finditer(html_content)]
+
+def filter_image_urls(image_urls, final_skip=FINAL_SKIP):
+    """Drop icons, sprites and data URLs from the candidate list"""
+    return [img_url for img_url in image_urls
+            if not img_url.startswith('data:') and not has_token(img_url.lower(), final_skip)]
+
+def canonical_image_url(url):
+    """Split an image URL into (clean URL, asset key, requested width)
+
+    The asset key is the URL without its width parameter, so every rendition
+    of one image shares a key. HTML-escaped ampersands picked up by the
+    raw-HTML scan are unescaped.
+    """
+    url = url.replace('&amp;', '&')
+    parts = urlsplit(url)
+    width = None
+    kept = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key.lower() in WIDTH_PARAMS and value.isdigit():
+            width = int(value)
+        else:
+            kept.append((key, value))
+    asset_key = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(kept), ''))
+    return url, asset_key, width
+
+def variant_rank(width, target_width):
+    """Sort key for renditions: the smallest one at least target_width wide wins,
+    then the unsized original, then the largest smaller rendition"""
+    if width is None:
+        return (1, 0)
+    if width >= target_width:
+        return (0, width)
+    return (2, -width)
+
+def dedupe_image_variants(image_urls, target_width=TARGET_IMAGE_WIDTH):
+    """Collapse renditions of the same asset to one URL, keeping first-seen order"""
+    best = {}
+    for img_url in image_urls:
+        url, asset_key, width = canonical_image_url(img_url)
+        rank = variant_rank(width, target_width)
+        if asset_key not in best or rank < best[asset_key][0]:
+            best[asset_key] = (rank, url)
+    return [url for rank, url in best.values()]
+
+def extract_from_elements(elements, html_content, profile=DEFAULT_PROFILE, base_url=None):
+    """Extract product fields and image candidates with a single tree walk
+
+    Relative URLs resolve against base_url, or the profile's base URL.
+    """
+    # The backend parses lazily, so the walk timer includes tree building
+    with METRICS.timer('extract.walk'):
+        first_matches, image_sources = walk_document(elements, profile.index)
+    with METRICS.timer('extract.fields'):
+        winners = {}
+        values = resolve_fields(first_matches, profile.field_rules, winners)
+    profile.record(first_matches, winners)
+
+    product_info = ProductInfo(
+        name=values.get('name', ''),
+        price=values.get('price', 0.0),
+        original_price=values.get('original_price', 0.0),
+        description=values.get('description', ''),
+        brand='',
+        category='',
+        images=collect_image_urls(image_sources, html_content, profile, base_url or profile.base_url),
+        details=[],
+    )
+
+    # If no original price found, use current price
+    if product_info['original_price'] == 0.0:
+        product_info['original_price'] = product_info['price']
+
+    return product_info
+
+class SoupBackend:
+    """Parser backend built on a BeautifulSoup tree builder"""
+
+    def __init__(self, name, features):
+        self.name = name
+        self.features = features
+
+    def elements(self, html_content):
+        """Parse the page and yield its elements in document order"""
+        soup = BeautifulSoup(html_content, self.features)
+        return (el for el in soup.descendants if isinstance(el, Tag))
+
+class LexborElement:
+    """Wraps a selectolax node in the small part of the bs4 Tag API the walker uses"""
+
+    __slots__ = ('node', 'name', 'attrs')
+
+    def __init__(self, node):
+        self.node = node
+        self.name = node.tag
+        # Valueless attributes are None in selectolax but '' in bs4
+        self.attrs = {key: ('' if value is None else value) for key, value in node.attributes.items()}
+
+    def get(self, key, default=None):
+        value = self.attrs.get(key, default)
+        if key == 'class' and value:
+            return value.split()
+        return value
+
+    @property
+    def parents(self):
+        node = self.node.parent
+        while node is not None and node.is_element_node:
+            yield LexborElement(node)
+            node = node.parent
+
+    @property
+    def string(self):
+        return self.node.text(deep=True) or None
+
+    def get_text(self):
+        return self.node.text(deep=True)
+
+    def css_matches(self, selector):
+        return self.node.css_matches(selector)
+
+class SelectolaxBackend:
+    """Parser backend built on selectolax's lexbor engine"""
+
+    name = 'selectolax'
+
+    def elements(self, html_content):
+        """Parse the page and yield its elements in document order"""
+        tree = LexborHTMLParser(html_content)
+        return (LexborElement(node) for node in tree.root.traverse(include_text=False)
+                if node.is_element_node)
+
+PARSER_BACKENDS = {'html.parser': SoupBackend('html.parser', 'html.parser')}
+if HAS_LXML:
+    PARSER_BACKENDS['lxml'] = SoupBackend('lxml', 'lxml')
+if HAS_SELECTOLAX:
+    PARSER_BACKENDS['selectolax'] = SelectolaxBackend()
+
+# Fastest first; html.parser is the pure-Python fallback that is always present
+PREFERRED_BACKENDS = ('selectolax', 'lxml', 'html.parser')
+
+def get_backend(name=None):
+    """Return the named parser backend, or the fastest one installed"""
+    if name:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Parser backend '{name}' is not available "
+                             f"(installed: {', '.join(PARSER_BACKENDS)})")
+        return PARSER_BACKENDS[name]
+    for candidate in PREFERRED_BACKENDS:
+        if candidate in PARSER_BACKENDS:
+            return PARSER_BACKENDS[candidate]
+
+def extract_from_html(html_content, backend=None, profile=DEFAULT_PROFILE, base_url=None):
+    """Parse a page with the chosen backend and extract product information"""
+    return extract_from_elements(get_backend(backend).elements(html_content), html_content, profile, base_url)
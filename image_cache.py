@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image cache - content-addressed on-disk store for downloaded images with
+ETag / Last-Modified revalidation and size-based eviction
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+CACHE_DIR = '.scraper_cache'
+MAX_CACHE_BYTES = 500 * 1024 * 1024  # Evict least recently used blobs above 500 MB
+
+def file_sha256(filepath, chunk_size=65536):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ImageCache:
+    """Persistent image cache keyed by URL and content hash
+
+    index.json maps each URL to its ETag, Last-Modified, size and SHA-256.
+    The bytes live once under blobs/<sha>, so the same image served for
+    several products is stored a single time.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'deduplicated': 0, 'unchanged_files': 0,
+                      'bytes_downloaded': 0, 'bytes_saved': 0, 'evicted': 0}
+        self.entries = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"    Ignoring unreadable cache index {self.index_file}: {e}")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def blob_path(self, sha):
+        return os.path.join(self.blob_dir, sha[:2], sha)
+
+    def lookup(self, url):
+        """Return the cache entry for url if its blob is still on disk"""
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry and os.path.exists(self.blob_path(entry['sha256'])):
+            return entry
+        return None
+
+    def conditional_headers(self, url):
+        """Return If-None-Match / If-Modified-Since headers for a cached URL"""
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def restore(self, url, filepath):
+        """Serve a 304 Not Modified response from the cache; returns the entry or None
+
+        The blob is checked against its recorded size and hash first. A
+        damaged blob is deleted and None returned, as for a missing one, so
+        the caller knows it has to fetch the image in full.
+        """
+        entry = self.lookup(url)
+        if not entry:
+            return None
+        blob = self.blob_path(entry['sha256'])
+        try:
+            if os.path.getsize(blob) != entry['size'] or file_sha256(blob) != entry['sha256']:
+                print(f"    Cached copy of {url} is damaged, dropping it")
+                os.remove(blob)
+                return None
+            self.place(entry, filepath)
+        except OSError as e:
+            print(f"    Could not restore {url} from the cache: {e}")
+            return None
+        with self.lock:
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += entry['size']
+            entry['last_used'] = time.time()
+        return entry
+
+    def discard(self, url):
+        """Forget url so its next download is unconditional; returns the dropped entry"""
+        with self.lock:
+            return self.entries.pop(url, None)
+
+    def store(self, url, source_path, headers, filepath):
+        """Move a fully downloaded file into the blob store and place it at filepath"""
+        os.makedirs(self.blob_dir, exist_ok=True)
+        sha = file_sha256(source_path)
+        size = os.path.getsize(source_path)
+        blob = self.blob_path(sha)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        deduplicated = os.path.exists(blob)
+        if deduplicated:
+            os.remove(source_path)
+        else:
+            os.replace(source_path, blob)
+
+        entry = {
+            'sha256': sha,
+            'size': size,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'last_used': time.time(),
+        }
+        with self.lock:
+            self.entries[url] = entry
+            self.stats['misses'] += 1
+            self.stats['bytes_downloaded'] += size
+            if deduplicated:
+                self.stats['deduplicated'] += 1
+        self.place(entry, filepath)
+        return entry
+
+    def place(self, entry, filepath):
+        """Copy a cached blob to filepath unless the file there is already identical"""
+        if os.path.exists(filepath) and os.path.getsize(filepath) == entry['size'] \
+                and file_sha256(filepath) == entry['sha256']:
+            with self.lock:
+                self.stats['unchanged_files'] += 1
+            return False
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        shutil.copyfile(self.blob_path(entry['sha256']), tmp_path)
+        os.replace(tmp_path, filepath)
+        return True
+
+    def evict(self):
+        """Drop least recently used blobs until the store fits in max_bytes"""
+        with self.lock:
+            blobs = {}
+            for url, entry in self.entries.items():
+                blob = blobs.setdefault(entry['sha256'], {'size': entry['size'], 'last_used': 0, 'urls': []})
+                blob['last_used'] = max(blob['last_used'], entry.get('last_used', 0))
+                blob['urls'].append(url)
+
+            total = sum(blob['size'] for blob in blobs.values())
+            for sha, blob in sorted(blobs.items(), key=lambda item: item[1]['last_used']):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self.blob_path(sha))
+                except FileNotFoundError:
+                    pass
+                for url in blob['urls']:
+                    del self.entries[url]
+                total -= blob['size']
+                self.stats['evicted'] += 1
+
+    def save(self):
+        """Evict over-budget blobs and write the index atomically"""
+        self.evict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_file}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def report(self):
+        """Print hit/miss counts for this run"""
+        stats = self.stats
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
+        print(f"Image cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0f}% hit rate), "
+              f"{stats['deduplicated']} deduplicated, {stats['unchanged_files']} files unchanged, "
+              f"{stats['bytes_saved'] / 1024:.1f} KB saved, {stats['evicted']} evicted")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image dedup - drops downloaded product images that are visually identical to
+another image of the same product, or too small to be worth showing
+"""
+
+import json
+import os
+import threading
+
+from image_cache import CACHE_DIR, file_sha256
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+HASH_INDEX_FILE = os.path.join(CACHE_DIR, 'phash.json')
+MIN_IMAGE_SIZE = 200  # Smallest width and height kept, in pixels
+MAX_HASH_DISTANCE = 6  # Differing bits (of 64) still treated as the same picture
+
+def dhash(filepath, hash_size=8):
+    """Return the 64-bit difference hash and the size of an image file"""
+    with Image.open(filepath) as img:
+        width, height = img.size
+        img.draft('L', (hash_size * 4, hash_size * 4))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+        pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = value << 1 | (left > right)
+    return value, width, height
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class HashIndex:
+    """Perceptual hashes keyed by file SHA-256, so unchanged bytes are never decoded twice"""
+
+    def __init__(self, index_file=HASH_INDEX_FILE):
+        self.index_file = index_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.decoded = 0
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"    Ignoring unreadable hash index {index_file}: {e}")
+
+    def lookup(self, filepath):
+        """Return (hash, width, height) for an image file, decoding it only on a miss"""
+        sha = file_sha256(filepath)
+        with self.lock:
+            entry = self.entries.get(sha)
+        if entry is None:
+            value, width, height = dhash(filepath)
+            entry = {'hash': f"{value:016x}", 'width': width, 'height': height}
+            with self.lock:
+                self.entries[sha] = entry
+                self.decoded += 1
+        return int(entry['hash'], 16), entry['width'], entry['height']
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        tmp_path = f"{self.index_file}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+        os.replace(tmp_path, self.index_file)
+
+def filter_images(saved_images, min_size=MIN_IMAGE_SIZE, max_distance=MAX_HASH_DISTANCE, index=None,
+                  journal=None):
+    """Drop undersized and near-duplicate images of one product and delete their files
+
+    Of two near-duplicates the higher-resolution file is kept. Files Pillow
+    cannot decode are kept without the checks. Deleted files are marked
+    dropped in the download journal, if given. Returns the kept image
+    records in their original order.
+    """
+    if not saved_images:
+        return saved_images
+    if not HAS_PILLOW:
+        print("Pillow is not installed - skipping image dedup")
+        return saved_images
+
+    own_index = index is None
+    index = index or HashIndex()
+    kept = []  # [record, hash, pixel area]
+    unhashed = []  # Records Pillow could not decode; kept, since the codec may just be missing here
+    dropped = []  # (record, reason)
+    for img in saved_images:
+        try:
+            value, width, height = index.lookup(img['local_path'])
+        except Exception as e:
+            print(f"    Could not hash {img['local_path']}, keeping it unchecked: {e}")
+            unhashed.append(img)
+            continue
+        img['width'], img['height'] = width, height
+        if width < min_size or height < min_size:
+            dropped.append((img, f'undersized {width}x{height}'))
+            continue
+        for slot in kept:
+            if hamming(slot[1], value) <= max_distance:
+                if width * height > slot[2]:
+                    dropped.append((slot[0], f"duplicate of {img['filename']}"))
+                    slot[:] = [img, value, width * height]
+                else:
+                    dropped.append((img, f"duplicate of {slot[0]['filename']}"))
+                break
+        else:
+            kept.append([img, value, width * height])
+
+    saved_bytes = 0
+    for img, reason in dropped:
+        if os.path.exists(img['local_path']):
+            saved_bytes += os.path.getsize(img['local_path'])
+            os.remove(img['local_path'])
+        if journal:
+            journal.mark_dropped(img['local_path'], img.get('original_url'), reason)
+        print(f"    Dropped {img['filename']}: {reason}")
+
+    if own_index:
+        index.save()
+    print(f"  Image dedup: kept {len(kept) + len(unhashed)} of {len(saved_images)} images "
+          f"({len(unhashed)} unchecked), dropped {len(dropped)} files ({saved_bytes / 1024:.1f} KB), "
+          f"{index.decoded} decoded")
+    kept_ids = {id(slot[0]) for slot in kept} | {id(img) for img in unhashed}
+    return [img for img in saved_images if id(img) in kept_ids]
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image variants - resizes downloaded product images into responsive widths,
+encodes them as WebP/AVIF without metadata and records srcset entries
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from records import ImageVariant
+
+try:
+    from PIL import Image, ImageOps, features
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+RESPONSIVE_WIDTHS = (320, 640, 960)
+FALLBACK_WIDTH = 640  # Variant used as the plain src for mobile visitors
+MANIFEST_FILE = 'image_variants.json'
+
+ENCODE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 80, 'method': 4},
+}
+
+def available_formats():
+    """Return the modern formats this Pillow build can encode, best first"""
+    if not HAS_PILLOW:
+        return ()
+    return tuple(fmt for fmt in ('avif', 'webp') if features.check(fmt))
+
+def process_image(local_path, public_path, widths=RESPONSIVE_WIDTHS, formats=None):
+    """Resize one image into every width/format pair (runs inside a worker process)
+
+    The JPEG decoder is asked for a reduced-size draft, so large originals
+    are never fully decoded when only small variants are needed. No EXIF or
+    ICC metadata is written to the variants.
+    """
+    formats = formats or available_formats()
+    product_dir, filename = os.path.split(local_path)
+    public_dir = os.path.dirname(public_path)
+    stem = os.path.splitext(filename)[0]
+    variant_dir = os.path.join(product_dir, 'variants')
+    os.makedirs(variant_dir, exist_ok=True)
+
+    variants = []
+    with Image.open(local_path) as img:
+        original_width, original_height = img.size
+        targets = sorted({min(width, original_width) for width in widths})
+        img.draft('RGB', (targets[-1], original_height * targets[-1] // original_width))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+
+        for width in targets:
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                variant_name = f"{stem}-{width}w.{fmt}"
+                variant_path = os.path.join(variant_dir, variant_name)
+                resized.save(variant_path, fmt.upper(), **ENCODE_OPTIONS.get(fmt, {}))
+                variants.append(ImageVariant(
+                    format=fmt,
+                    width=width,
+                    height=height,
+                    bytes=os.path.getsize(variant_path),
+                    local_path=variant_path,
+                    public_path=f"{public_dir}/variants/{variant_name}",
+                ))
+
+    return {
+        'width': original_width,
+        'height': original_height,
+        'bytes': os.path.getsize(local_path),
+        'variants': variants,
+    }
+
+def srcset_entries(variants):
+    """Build one srcset string per format from a list of variants"""
+    srcsets = {}
+    for variant in sorted(variants, key=lambda v: v['width']):
+        srcsets.setdefault(variant['format'], []).append(f"{variant['public_path']} {variant['width']}w")
+    return {fmt: ', '.join(entries) for fmt, entries in srcsets.items()}
+
+def fallback_src(image):
+    """Pick the variant to use as a plain src: WebP closest to FALLBACK_WIDTH
+
+    A full-width re-encode that came out larger than the original is not
+    worth serving, so the original is used instead.
+    """
+    candidates = [v for v in image.get('variants', ()) if v['format'] == 'webp']
+    if not candidates:
+        return image['public_path']
+    best = min(candidates, key=lambda v: abs(v['width'] - FALLBACK_WIDTH))
+    if best['width'] == image.get('width') and best['bytes'] >= image.get('bytes', float('inf')):
+        return image['public_path']
+    return best['public_path']
+
+def build_variants(saved_images, widths=RESPONSIVE_WIDTHS, workers=None, manifest_file=MANIFEST_FILE,
+                   executor=None):
+    """Generate responsive variants for downloaded images across a process pool
+
+    Each saved image record gains 'variants' and 'srcset' keys, and the
+    srcset entries are merged into the manifest keyed by public path.
+    Batch callers pass one long-lived executor so worker processes start
+    once per batch instead of once per product.
+    """
+    if not saved_images:
+        return saved_images
+    formats = available_formats()
+    if not formats:
+        print("Pillow with WebP/AVIF support is not installed - skipping responsive variants")
+        return saved_images
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return build_variants(saved_images, widths, workers, manifest_file, executor)
+
+    futures = [executor.submit(process_image, img['local_path'], img['public_path'], widths, formats)
+               for img in saved_images]
+
+    original_bytes = fallback_bytes = 0
+    for img, future in zip(saved_images, futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"    Error creating variants for {img['local_path']}: {e}")
+            continue
+        img['width'] = result['width']
+        img['height'] = result['height']
+        img['bytes'] = result['bytes']
+        img['variants'] = result['variants']
+        img['srcset'] = srcset_entries(result['variants'])
+        original_bytes += result['bytes']
+        src = fallback_src(img)
+        if src == img['public_path']:
+            fallback_bytes += result['bytes']
+        else:
+            fallback_bytes += sum(v['bytes'] for v in result['variants'] if v['public_path'] == src)
+
+    print(f"  Created {', '.join(formats)} variants at widths {', '.join(map(str, widths))} - "
+          f"fallback images {fallback_bytes / 1024:.1f} KB vs {original_bytes / 1024:.1f} KB originals")
+
+    update_manifest(saved_images, manifest_file)
+    return saved_images
+
+def update_manifest(saved_images, manifest_file=MANIFEST_FILE):
+    """Merge srcset entries for these images into the manifest file"""
+    manifest = {}
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"    Rewriting unreadable manifest {manifest_file}: {e}")
+
+    for img in saved_images:
+        if 'srcset' not in img:
+            continue
+        manifest[img['public_path']] = {
+            'width': img['width'],
+            'height': img['height'],
+            'src': fallback_src(img),
+            'srcset': img['srcset'],
+        }
+
+    tmp_path = f"{manifest_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_file)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental rescrape support - fingerprints the input HTML and each stage of
+the extracted product so unchanged work can be skipped, and logs stage timings
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+from records import json_default
+
+STATE_FILE = '.scraper_state.json'
+RUN_LOG_FILE = 'scraper_runs.jsonl'
+
+# product_info fields each pipeline stage depends on
+STAGE_FIELDS = {
+    'images': ('images',),
+    'prices': ('price', 'original_price'),
+    'text': ('name', 'description', 'brand', 'category', 'details'),
+}
+
+# Run options each post-parse stage depends on; 'assets' is the manifest publish
+STAGE_OPTIONS = {
+    'images': ('dedup', 'variants'),
+    'assets': ('manifest',),
+}
+
+def fingerprint(value):
+    """Return a stable SHA-256 fingerprint for bytes or JSON-serializable data"""
+    if not isinstance(value, bytes):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(value).hexdigest()
+
+def stage_fingerprints(product_info, options=None):
+    """Fingerprint the product fields and run options each stage depends on"""
+    options = options or {}
+    inputs = {stage: [product_info.get(field) for field in fields] for stage, fields in STAGE_FIELDS.items()}
+    for stage, names in STAGE_OPTIONS.items():
+        inputs.setdefault(stage, []).append({name: options.get(name) for name in names})
+    return {stage: fingerprint(values) for stage, values in inputs.items()}
+
+def changed_stages(previous, fingerprints):
+    """Return the set of stages whose fingerprint differs from the previous run"""
+    if not previous:
+        return set(fingerprints)
+    old = previous.get('stages', {})
+    return {stage for stage, value in fingerprints.items() if old.get(stage) != value}
+
+def load_state(state_file=STATE_FILE):
+    """Load the per-file state of previous runs"""
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable state file {state_file}: {e}")
+        return {}
+
+def save_state(state, state_file=STATE_FILE):
+    """Write the state file atomically"""
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False, default=json_default)
+    os.replace(tmp_path, state_file)
+
+class RunLog:
+    """Collects stage timings and skip decisions for one run"""
+
+    def __init__(self, html_file, log_file=RUN_LOG_FILE):
+        self.log_file = log_file
+        self.record = {
+            'html_file': html_file,
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stages': {},
+        }
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage that runs"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            METRICS.observe(f'stage.{name}', seconds)
+            self.record['stages'][name] = {
+                'action': 'ran',
+                'seconds': round(seconds, 4),
+            }
+
+    def skip(self, name, reason):
+        """Record a stage that was skipped and why"""
+        self.record['stages'][name] = {'action': 'skipped', 'reason': reason}
+        print(f"  Skipping {name}: {reason}")
+
+    def write(self):
+        """Append the run record to the JSON-lines run log"""
+        self.record['total_seconds'] = round(time.perf_counter() - self.started, 4)
+        self.record['metrics'] = METRICS.snapshot()
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.record, ensure_ascii=False) + '\n')
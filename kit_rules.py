@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kit rules - matches product names to wrestlers and their kit pricing using
+the aliases in kit_rules.json, compiled into a single regular expression
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+KIT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kit_rules.json')
+
+_NON_WORD_RE = re.compile(r'[^0-9a-z]+')
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+def normalize_name(text):
+    """Lowercase and collapse punctuation/whitespace so aliases match any spelling"""
+    return ' ' + _NON_WORD_RE.sub(' ', text.lower()).strip() + ' '
+
+class KitRules:
+    """Compiled wrestler/kit rules
+
+    Every alias of every wrestler goes into one alternation, longest first,
+    so a product name is classified with a single regex search. Results are
+    cached per normalized name, and unmatched names are counted for report().
+    """
+
+    def __init__(self, rules):
+        self.default = rules['default']
+        self.wrestlers = {}
+        self.aliases = {}
+        for wrestler in rules.get('wrestlers', []):
+            self.wrestlers[wrestler['id']] = wrestler
+            for alias in wrestler.get('aliases') or [wrestler['name']]:
+                alias = normalize_name(alias).strip()
+                if alias in self.aliases and self.aliases[alias] != wrestler['id']:
+                    raise ValueError(f"Alias '{alias}' is used by both {self.aliases[alias]} and {wrestler['id']}")
+                self.aliases[alias] = wrestler['id']
+
+        alternation = '|'.join(re.escape(alias) for alias in sorted(self.aliases, key=len, reverse=True))
+        self.pattern = re.compile(f' ({alternation}) ') if self.aliases else None
+        self.cache = {}
+        self.matched = Counter()
+        self.unmatched = Counter()
+
+    def match(self, product_name, record=True):
+        """Return the wrestler rule for a product name, or None
+
+        record=False skips the match/unmatched counters, for repeat lookups
+        of a product that was already classified.
+        """
+        key = normalize_name(product_name or '')
+        if key in self.cache:
+            wrestler_id = self.cache[key]
+        else:
+            match = self.pattern.search(key) if self.pattern else None
+            wrestler_id = self.aliases[match.group(1)] if match else None
+            self.cache[key] = wrestler_id
+        if wrestler_id:
+            if record:
+                self.matched[wrestler_id] += 1
+            return self.wrestlers[wrestler_id]
+        if record:
+            self.unmatched[(product_name or '').strip()] += 1
+        return None
+
+    def classify(self, product_info, record=True):
+        """Return kit id, wrestler name, price, original price and items for a product"""
+        wrestler = self.match(product_info['name'], record) or {}
+        price = wrestler.get('price', self.default['price'])
+        original_price = wrestler.get('original_price', self.default['original_price'])
+        if isinstance(original_price, dict):
+            # Relative rule: a multiple of the store price with a floor
+            base = product_info.get('original_price') or product_info.get('price') or 0
+            original_price = round(max(base * original_price.get('multiplier', 1),
+                                       original_price.get('minimum', 0)), 2)
+        items = wrestler.get('items', self.default['items'])
+        return {
+            'id': wrestler.get('id', self.default['id']),
+            'wrestler': wrestler.get('name', self.default['wrestler']),
+            'price': price,
+            'original_price': original_price,
+            'items': [item.format(product_name=product_info['name']) for item in items],
+        }
+
+    def report(self, limit=10):
+        """Print match counts and the most common unmatched product names"""
+        matched = sum(self.matched.values())
+        unmatched = sum(self.unmatched.values())
+        print(f"Kit rules: {matched} products matched a wrestler, {unmatched} fell back to "
+              f"{self.default['id']}")
+        for name, count in self.unmatched.most_common(limit):
+            print(f"    unmatched: {name}" + (f" (x{count})" if count > 1 else ""))
+
+def load_rules(rules_file=KIT_RULES_FILE):
+    """Load and compile the rules file, reusing the compiled rules until the file changes"""
+    mtime = os.path.getmtime(rules_file)
+    with _loaded_lock:
+        cached = _loaded.get(rules_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(rules_file, 'r', encoding='utf-8') as f:
+            rules = KitRules(json.load(f))
+        _loaded[rules_file] = (mtime, rules)
+        return rules
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify product names with the kit rules")
+    parser.add_argument('names', nargs='*', help="product names to classify")
+    parser.add_argument('--data', metavar='JSON', help="classify every product in an extracted products file")
+    parser.add_argument('--rules', default=KIT_RULES_FILE, help="rules file")
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules)
+    names = list(args.names)
+    if args.data:
+        with open(args.data, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        products = data.get('products') or {'product': data}
+        names.extend(product['product_info']['name'] for product in products.values() if product)
+    for name in names:
+        kit = rules.classify({'name': name, 'price': None, 'original_price': None})
+        print(f"{kit['id']:<16} {name}")
+    rules.report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Listing stream - reads category and search listing pages in fixed-size
+chunks through an event-driven HTML tokenizer and yields one product record
+per product card, so memory stays flat however large the page is
+"""
+
+import argparse
+import time
+from collections import deque
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from extractor import IMG_SKIP, IMG_SRC_ATTRS, SITE_BASE, absolute_url, has_token, parse_price
+from records import ProductInfo
+
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+CHUNK_SIZE = 64 * 1024
+
+# Class tokens that open a product card on Fanatics-style listings
+CARD_CLASSES = ('product-card', 'product-tile', 'product-item', 'product-grid-item')
+
+# (field, class substrings) checked in order, so 'regular-price' is an original price
+FIELD_CLASSES = (
+    ('original_price', ('regular', 'strike', 'was-price', 'original')),
+    ('price', ('price', 'money')),
+    ('name', ('title', 'name')),
+)
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source',
+             'track', 'wbr'}
+
+class CardCollector:
+    """Turns start/end/data parse events into product_info records
+
+    Only the open-tag stack and the text of the card being read are kept;
+    finished records wait in a queue until the caller drains them. The
+    methods follow lxml's parser target interface.
+    """
+
+    def __init__(self, base_url=SITE_BASE):
+        self.base_url = base_url
+        self.stack = []  # (tag, field captured by this element or None)
+        self.card_depth = None
+        self.card = None
+        self.ready = deque()
+
+    def start(self, tag, attrs):
+        tokens = (attrs.get('class') or '').split()
+        if self.card is None and any(token in CARD_CLASSES for token in tokens):
+            self.card_depth = len(self.stack)
+            self.card = {'name': [], 'price': [], 'original_price': [], 'url': None,
+                         'image': None, 'alt': None}
+        if self.card is not None:
+            self.read_card_tag(tag, attrs)
+
+        if tag in VOID_TAGS:
+            return
+        field = None
+        if self.card is not None and len(self.stack) > self.card_depth:
+            field = next((name for name, needles in FIELD_CLASSES
+                          if any(needle in token for token in tokens for needle in needles)), None)
+            # A money span inside a regular-price element is still the regular price
+            if field == 'price' and self.current_field() == 'original_price':
+                field = 'original_price'
+            if field:
+                self.card[field].append('')
+        self.stack.append((tag, field))
+
+    def read_card_tag(self, tag, attrs):
+        if tag == 'a' and not self.card['url'] and attrs.get('href'):
+            self.card['url'] = urljoin(self.base_url, attrs['href'])
+        elif tag == 'img' and not self.card['image']:
+            for attr in IMG_SRC_ATTRS:
+                src = attrs.get(attr)
+                if src and not src.startswith('data:') and not has_token(src.lower(), IMG_SKIP):
+                    self.card['image'] = absolute_url(src, self.base_url)
+                    self.card['alt'] = attrs.get('alt')
+                    break
+
+    def current_field(self):
+        for tag, field in reversed(self.stack):
+            if field:
+                return field
+        return None
+
+    def end(self, tag):
+        # Pop to the matching open tag, tolerating unclosed elements in between
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position][0] == tag:
+                break
+        else:
+            return
+        del self.stack[position:]
+        if self.card is not None and len(self.stack) <= self.card_depth:
+            self.finish_card()
+
+    def data(self, data):
+        if self.card is None:
+            return
+        field = self.current_field()
+        if field:
+            self.card[field][-1] += data
+
+    def close(self):
+        pass
+
+    def finish_card(self):
+        card, self.card, self.card_depth = self.card, None, None
+        name = next((text.strip() for text in card['name'] if text.strip()), None) or (card['alt'] or '').strip()
+        prices = [price for price in map(parse_price, card['price']) if price is not None]
+        originals = [price for price in map(parse_price, card['original_price']) if price is not None]
+        if not name or not (card['url'] or card['image']):
+            return
+        price = prices[0] if prices else None
+        self.ready.append(ProductInfo(
+            name=' '.join(name.split()),
+            price=price,
+            original_price=originals[0] if originals else price,
+            description='',
+            brand='',
+            category='',
+            images=[card['image']] if card['image'] else [],
+            details=[],
+            url=card['url'],
+        ))
+
+class TokenizerFeed(HTMLParser):
+    """Pure-Python fallback feeding html.parser events to a CardCollector"""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+def make_feed_parser(collector, parser=None):
+    """Return an incremental parser with feed()/close() driving collector
+
+    lxml's libxml2 push parser is used when installed, html.parser otherwise.
+    """
+    if parser is None:
+        parser = 'lxml' if HAS_LXML else 'html.parser'
+    if parser == 'lxml':
+        return etree.HTMLParser(target=collector, recover=True, no_network=True)
+    if parser == 'html.parser':
+        return TokenizerFeed(collector)
+    raise ValueError(f"Unknown streaming parser: {parser}")
+
+def read_chunks(html_file, chunk_size=CHUNK_SIZE):
+    """Yield a text file in fixed-size chunks"""
+    with open(html_file, 'r', encoding='utf-8', errors='replace') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            yield chunk
+
+def iter_listing_products(chunks, base_url=SITE_BASE, parser=None):
+    """Yield product records from an iterable of HTML text chunks as cards complete"""
+    collector = CardCollector(base_url)
+    feed_parser = make_feed_parser(collector, parser)
+    for chunk in chunks:
+        feed_parser.feed(chunk)
+        while collector.ready:
+            yield collector.ready.popleft()
+    feed_parser.close()
+    while collector.ready:
+        yield collector.ready.popleft()
+
+def stream_listing_file(html_file, base_url=SITE_BASE, chunk_size=CHUNK_SIZE, parser=None):
+    """Yield product records from a saved listing page without loading it whole"""
+    return iter_listing_products(read_chunks(html_file, chunk_size), base_url, parser)
+
+def listing_results(html_file, base_url=SITE_BASE, max_products=None, parser=None):
+    """Yield (source, product_info, seconds, error) tuples for stream_scraped_products"""
+    started = time.perf_counter()
+    for n, product_info in enumerate(stream_listing_file(html_file, base_url, parser=parser), 1):
+        now = time.perf_counter()
+        yield product_info['url'] or f"{html_file}#{n}", product_info, now - started, None
+        if max_products and n >= max_products:
+            return
+        started = time.perf_counter()
+
+def listing_main(html_files, base_url=SITE_BASE, max_products=None, download=True, use_cache=True,
+                 variants=True, parser=None, data_file='extracted_listing.jsonl', code_file='listing_kits_code.ts'):
+    """Stream saved listing pages and flush their products as JSON lines, a kits array and catalog rows"""
+    from scraper import stream_scraped_products
+
+    print("WWE Listing Scraper Started! (streaming)")
+    print("=" * 50)
+
+    def results():
+        for html_file in html_files:
+            print(f"Streaming {html_file}...")
+            yield from listing_results(html_file, base_url, max_products, parser)
+
+    products, failed = stream_scraped_products(results(), download=download, use_cache=use_cache,
+                                               variants=variants, data_file=data_file, code_file=code_file)
+    print(f"{products} products streamed from {len(html_files)} listing pages")
+    return products
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream product cards out of saved WWE listing pages")
+    parser.add_argument('html_files', nargs='+', help="saved category or search listing pages")
+    parser.add_argument('--base-url', default=SITE_BASE, help="URL the pages were saved from")
+    parser.add_argument('--max-products', type=int, default=None, help="limit products taken from each page")
+    parser.add_argument('--parser', choices=('lxml', 'html.parser'), default=None,
+                        help="streaming tokenizer (default: lxml when installed)")
+    parser.add_argument('--no-images', action='store_true', help="skip image downloads")
+    parser.add_argument('--no-cache', action='store_true', help="bypass the image cache")
+    parser.add_argument('--no-variants', action='store_true', help="skip resized WebP/AVIF variants")
+    args = parser.parse_args()
+
+    listing_main(args.html_files, base_url=args.base_url, max_products=args.max_products,
+                 download=not args.no_images, use_cache=not args.no_cache, variants=not args.no_variants,
+                 parser=args.parser)
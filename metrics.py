@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline metrics - timings, byte counts and error counters for each scraper
+stage, exported as JSON or a Prometheus text file, plus optional cProfile dumps
+"""
+
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'scraper'
+
+class Metrics:
+    """Thread-safe registry of timers and counters
+
+    Timers keep count, total and max seconds per name ('parse',
+    'extract.images.raw_scan', ...); counters are plain running totals
+    ('download.bytes', 'download.errors', ...).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.timers = {}
+            self.counters = {}
+            self.started = time.time()
+
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block under name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name, seconds):
+        """Record one timing measured elsewhere"""
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+            timer['count'] += 1
+            timer['seconds'] += seconds
+            if seconds > timer['max_seconds']:
+                timer['max_seconds'] = seconds
+
+    def count(self, name, value=1):
+        """Add value to a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, snapshot):
+        """Fold another process's snapshot() into this registry"""
+        with self.lock:
+            for name, other in snapshot.get('timers', {}).items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    timer = self.timers[name] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+                timer['count'] += other['count']
+                timer['seconds'] += other['seconds']
+                if other['max_seconds'] > timer['max_seconds']:
+                    timer['max_seconds'] = other['max_seconds']
+            for name, value in snapshot.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Return the metrics collected since the last reset as plain data"""
+        with self.lock:
+            return {
+                'timers': {name: {'count': timer['count'], 'seconds': round(timer['seconds'], 6),
+                                  'max_seconds': round(timer['max_seconds'], 6)}
+                           for name, timer in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'wall_seconds': round(time.time() - self.started, 3),
+            }
+
+    def prometheus_text(self, labels=None):
+        """Render the snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        labels = labels or {}
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Time spent per pipeline stage in the last run",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+        ]
+        for name, timer in snapshot['timers'].items():
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{label_block(labels, stage=name)} {timer['seconds']}")
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_calls Calls per pipeline stage in the last run",
+            f"# TYPE {METRIC_PREFIX}_stage_calls gauge",
+        ]
+        for name, timer in snapshot['timers'].items():
+            lines.append(f"{METRIC_PREFIX}_stage_calls{label_block(labels, stage=name)} {timer['count']}")
+        for name, value in snapshot['counters'].items():
+            metric = f"{METRIC_PREFIX}_{metric_name(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{label_block(labels)} {value}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_last_run_timestamp_seconds{label_block(labels)} {int(time.time())}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, labels=None):
+        """Atomically write the Prometheus text file (for a node_exporter textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(labels))
+        os.replace(tmp_path, path)
+
+    def write_json(self, path, **fields):
+        """Append the snapshot, plus any extra fields, as one line of a JSON-lines log"""
+        record = dict(fields, recorded_at=time.strftime('%Y-%m-%d %H:%M:%S'), **self.snapshot())
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def write(self, path, **labels):
+        """Write a Prometheus text file for *.prom paths, otherwise append to a JSON-lines log"""
+        if path.endswith('.prom'):
+            self.write_prometheus(path, labels)
+        else:
+            self.write_json(path, **labels)
+
+    def report(self, limit=8):
+        """Print the slowest stages and any non-zero counters"""
+        snapshot = self.snapshot()
+        slowest = sorted(snapshot['timers'].items(), key=lambda item: item[1]['seconds'], reverse=True)[:limit]
+        print("Metrics: " + ', '.join(f"{name} {timer['seconds'] * 1000:.1f}ms" for name, timer in slowest))
+        counters = [f"{name}={value}" for name, value in snapshot['counters'].items() if value]
+        if counters:
+            print("         " + ', '.join(counters))
+
+def metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def label_block(labels, **extra):
+    """Render {key="value",...} for a sample, or nothing when there are no labels"""
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in sorted(labels.items())) + '}'
+
+@contextmanager
+def profiled(profile_file=None):
+    """Run the enclosed block under cProfile and dump stats to profile_file, if given"""
+    if not profile_file:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        print(f"cProfile stats written to {profile_file} (python -m pstats {profile_file})")
+
+METRICS = Metrics()
@@ -14,6 +14,15 @@ const nextConfig = {
   images: {
     unoptimized: true,
   },
+  // Files in public/assets are named by their content hash (python asset_manifest.py)
+  async headers() {
+    return [
+      {
+        source: '/assets/:path*',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }],
+      },
+    ]
+  },
 }
 
 export default nextConfig
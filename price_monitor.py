@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Price monitor - re-polls product pages on a jittered schedule with conditional
+GETs, reads only the price block of pages that changed, and appends a delta
+feed (plus an optional webhook file and re-priced kits) when a price moves
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import CATALOG_FILE, Catalog
+from crawler import PAGE_HEADERS
+from extractor import SelectorIndex, get_backend, resolve_fields, walk_document
+from kit_rules import load_rules
+from metrics import METRICS
+from records import write_json
+from scraper import backoff_delay, clean_filename, extract_product_info, get_session, host_semaphore, kit_savings
+from site_profiles import select_profile
+from ts_emitter import COMPONENT_FILE, update_component
+
+MONITOR_STATE_FILE = '.price_monitor.json'
+DELTA_FEED_FILE = 'price_deltas.jsonl'
+DEFAULT_INTERVAL = 3600  # Seconds between two polls of one product
+DEFAULT_JITTER = 0.2  # Each interval is stretched or shrunk at random by up to 20%
+MONITOR_WORKERS = 4
+REQUEST_TIMEOUT = 30
+PRICE_FIELDS = ('price', 'original_price')
+
+# Characters kept around a price marker; the part before it holds the
+# ancestors that descendant selectors like '.pdp-price .price' need
+REGION_BEFORE = 1024
+REGION_AFTER = 4096
+
+_price_rules = {}
+
+def price_region(html_content, profile):
+    """Return the slice of the page around the profile's price block, or None"""
+    for marker in profile.price_markers:
+        at = html_content.find(marker)
+        if at != -1:
+            start = html_content.rfind('<', 0, max(0, at - REGION_BEFORE))
+            return html_content[max(start, 0):at + REGION_AFTER]
+    return None
+
+def price_rules(profile):
+    """Return the profile's price-only rule groups and their compiled index"""
+    cached = _price_rules.get(profile.name)
+    if cached is None:
+        rule_groups = {field: profile.field_rules[field] for field in PRICE_FIELDS if field in profile.field_rules}
+        cached = _price_rules[profile.name] = (rule_groups, SelectorIndex(rule_groups))
+    return cached
+
+def read_prices(html_content, profile, region, url=None, parser=None):
+    """Return {'price', 'original_price'}, parsing only the price region when it yields a price
+
+    Pages without a usable region fall back to the full extractor.
+    """
+    if region is not None:
+        rule_groups, index = price_rules(profile)
+        first_matches, _ = walk_document(get_backend(parser).elements(region), index)
+        values = resolve_fields(first_matches, rule_groups)
+        if values.get('price'):
+            METRICS.count('monitor.region_parses')
+            return {'price': values['price'], 'original_price': values.get('original_price') or values['price']}
+    METRICS.count('monitor.full_parses')
+    product_info = extract_product_info(html_content, parser=parser, url=url)
+    return {'price': product_info['price'], 'original_price': product_info['original_price']}
+
+class PriceMonitor:
+    """Polls a set of product URLs and reports price moves
+
+    Validators, last prices and the next due time of every URL live in
+    state_file, so a restarted monitor keeps its schedule and never reports
+    the first price it sees as a change.
+    """
+
+    def __init__(self, urls=(), state_file=MONITOR_STATE_FILE, feed_file=DELTA_FEED_FILE, webhook_file=None,
+                 catalog_file=CATALOG_FILE, component_file=None, interval=DEFAULT_INTERVAL,
+                 jitter=DEFAULT_JITTER, parser=None, workers=MONITOR_WORKERS):
+        self.state_file = state_file
+        self.feed_file = feed_file
+        self.webhook_file = webhook_file
+        self.catalog_file = catalog_file if catalog_file and os.path.exists(catalog_file) else None
+        self.component_file = component_file
+        self.interval = interval
+        self.jitter = jitter
+        self.parser = parser
+        self.workers = workers
+        self.state = self.load()
+        self.product_ids = {}
+        if self.catalog_file:
+            with Catalog(self.catalog_file) as catalog:
+                self.product_ids = catalog.sources()
+        now = time.time()
+        for url in urls:
+            self.state.setdefault(url, {'next_due': now})
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable monitor state {self.state_file}: {e}")
+            return {}
+
+    def save(self):
+        write_json(self.state_file, self.state)
+
+    def next_interval(self):
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def poll(self, url):
+        """Fetch one page conditionally and read its prices if the price block changed"""
+        entry = self.state[url]
+        headers = dict(PAGE_HEADERS)
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        with host_semaphore(url), METRICS.timer('monitor.fetch'):
+            response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            return {'status': 'not_modified'}
+        response.raise_for_status()
+        METRICS.count('monitor.bytes', len(response.content))
+        html_content = response.text
+
+        result = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        with METRICS.timer('monitor.parse'):
+            profile, _ = select_profile(html_content, url)
+            region = price_region(html_content, profile)
+            # Pages change on every request (tokens, timestamps); only the price block matters
+            result['digest'] = hashlib.sha256((region or html_content).encode('utf-8')).hexdigest()
+            if result['digest'] == entry.get('digest') and 'price' in entry:
+                result['status'] = 'unchanged'
+                return result
+            prices = read_prices(html_content, profile, region, url, self.parser)
+            if not prices['price'] or prices['price'] <= 0:
+                # The DOM path reports a missing price as 0.0; that is a failed parse, not a price drop
+                return {'status': 'no_price', 'error': "no price found on the page"}
+            result.update(prices)
+            if not entry.get('name'):
+                result['name'] = extract_product_info(html_content, parser=self.parser, url=url)['name']
+        result['status'] = 'parsed'
+        return result
+
+    def safe_poll(self, url):
+        try:
+            return self.poll(url)
+        except Exception as e:
+            return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+    def run_once(self):
+        """Poll every URL that is due, emit the price changes and save the state; returns the changes"""
+        now = time.time()
+        due = [url for url, entry in self.state.items() if entry.get('next_due', 0) <= now]
+        if not due:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.safe_poll, due))
+
+        checked_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        changes = []
+        for url, result in zip(due, results):
+            entry = self.state[url]
+            entry['checked_at'] = checked_at
+            METRICS.count(f"monitor.{result['status']}")
+            if result['status'] in ('error', 'no_price'):
+                # The last good price and validators are kept, so the next poll parses the page again
+                entry['failures'] = entry.get('failures', 0) + 1
+                entry['next_due'] = time.time() + backoff_delay(entry['failures'], base=60.0, cap=self.interval)
+                print(f"  {result['status'].replace('_', ' ').upper():6} {url}: {result['error']}")
+                continue
+            entry['failures'] = 0
+            entry['next_due'] = time.time() + self.next_interval()
+            for key in ('etag', 'last_modified', 'digest', 'name'):
+                if result.get(key):
+                    entry[key] = result[key]
+            if result['status'] != 'parsed':
+                continue
+            if 'price' in entry and (entry['price'], entry['original_price']) != (result['price'],
+                                                                                  result['original_price']):
+                changes.append(self.delta(url, entry, result, checked_at))
+            entry['price'] = result['price']
+            entry['original_price'] = result['original_price']
+
+        if changes:
+            self.emit(changes)
+        self.save()
+        counts = {status: sum(1 for result in results if result['status'] == status)
+                  for status in ('not_modified', 'unchanged', 'parsed', 'no_price', 'error')}
+        print(f"[{checked_at}] polled {len(due)}: " + ', '.join(f"{count} {status.replace('_', ' ')}"
+                                                                  for status, count in counts.items() if count) +
+              f"; {len(changes)} price changes")
+        return changes
+
+    def delta(self, url, entry, result, detected_at):
+        old_price = entry['price']
+        return {
+            'url': url,
+            'product_id': self.product_ids.get(url) or clean_filename(entry.get('name') or '') or None,
+            'name': entry.get('name'),
+            'old_price': old_price,
+            'price': result['price'],
+            'old_original_price': entry['original_price'],
+            'original_price': result['original_price'],
+            'change_pct': round((result['price'] - old_price) / old_price * 100, 2) if old_price else None,
+            'detected_at': detected_at,
+        }
+
+    def emit(self, changes):
+        """Append changes to the delta feed, the catalog and, if set, the webhook file and component"""
+        with open(self.feed_file, 'a', encoding='utf-8') as f:
+            for change in changes:
+                f.write(json.dumps(change, ensure_ascii=False) + '\n')
+                print(f"  PRICE  {change['name'] or change['url']}: ${change['old_price']} -> ${change['price']}"
+                      + (f" ({change['change_pct']:+.1f}%)" if change['change_pct'] is not None else ""))
+        if self.catalog_file:
+            with Catalog(self.catalog_file) as catalog:
+                for change in changes:
+                    if change['product_id']:
+                        catalog.add_price_snapshot(change['product_id'], change['price'],
+                                                   change['original_price'], change['detected_at'])
+        kits = self.reprice_kits(changes) if self.component_file else []
+        if self.webhook_file:
+            write_json(self.webhook_file, {
+                'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'changes': changes,
+                'kits': kits,
+            })
+            print(f"{self.webhook_file} - {len(changes)} changes")
+
+    def reprice_kits(self, changes):
+        """Recompute the kits of changed products from the kit rules and upsert them into the component
+
+        The kit is taken from the product's latest catalog scrape, so only
+        its prices and savings change. Kits whose numbers come out the same
+        and products never scraped are skipped.
+        """
+        if not self.catalog_file:
+            print("No catalog - kits cannot be re-priced without a previous full scrape")
+            return []
+        rules = load_rules()
+        kits = []
+        with Catalog(self.catalog_file) as catalog:
+            for change in changes:
+                latest = catalog.latest(change['product_id']) if change['product_id'] else None
+                if not latest or not latest['kit_data']:
+                    continue
+                kit = latest['kit_data']
+                classified = rules.classify({'name': latest['product_info']['name'], 'price': change['price'],
+                                             'original_price': change['original_price']}, record=False)
+                prices = {'price': classified['price'], 'originalPrice': classified['original_price'],
+                          'savings': kit_savings(classified['price'], classified['original_price'])}
+                # Fixed-price kits do not follow the store price
+                if all(kit.get(key) == value for key, value in prices.items()):
+                    continue
+                kit.update(prices)
+                kits.append(kit)
+        if kits:
+            changed = update_component(kits, self.component_file)
+            print(f"{self.component_file} - {len(kits)} kits re-priced" + ("" if changed else " (already up to date)"))
+        return kits
+
+    def run(self, passes=None):
+        """Poll on schedule until interrupted, or for the given number of passes"""
+        done = 0
+        try:
+            while self.state:
+                self.run_once()
+                done += 1
+                if passes is not None and done >= passes:
+                    break
+                wait = max(0.0, min(entry.get('next_due', 0) for entry in self.state.values()) - time.time())
+                print(f"Next poll in {wait:.0f}s")
+                time.sleep(wait)
+        except KeyboardInterrupt:
+            self.save()
+            print("Monitor stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch product pages for price changes")
+    parser.add_argument('urls', nargs='*', help="product page URLs to add to the watched set")
+    parser.add_argument('--urls-file', help="file with one product URL per line")
+    parser.add_argument('--from-catalog', action='store_true', help="also watch every URL scraped into the catalog")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between polls of a product")
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER, help="random +/- fraction of the interval")
+    parser.add_argument('--once', action='store_true', help="poll the due products once and exit (for cron)")
+    parser.add_argument('--passes', type=int, default=None, help="stop after this many polling passes")
+    parser.add_argument('--feed', default=DELTA_FEED_FILE, help="JSON-lines delta feed")
+    parser.add_argument('--webhook-file', help="rewrite this JSON file with the changes of every pass that has some")
+    parser.add_argument('--update-component', nargs='?', const=COMPONENT_FILE, default=None, metavar='TSX',
+                        help="re-price changed kits in the component (default components/price-anchoring.tsx)")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="catalog for product ids, snapshots and kits")
+    parser.add_argument('--state', default=MONITOR_STATE_FILE, help="monitor state file")
+    parser.add_argument('--parser', default=None, help="parser backend")
+    parser.add_argument('--workers', type=int, default=MONITOR_WORKERS, help="concurrent polls")
+    parser.add_argument('--metrics-file', help="append monitor metrics to a JSON-lines or .prom file after each run")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file, 'r', encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if args.from_catalog and os.path.exists(args.catalog):
+        with Catalog(args.catalog) as catalog:
+            urls.extend(catalog.sources())
+
+    monitor = PriceMonitor(urls, state_file=args.state, feed_file=args.feed, webhook_file=args.webhook_file,
+                           catalog_file=args.catalog, component_file=args.update_component,
+                           interval=args.interval, jitter=args.jitter, parser=args.parser, workers=args.workers)
+    if not monitor.state:
+        print("No product URLs to watch - pass URLs, --urls-file or --from-catalog")
+        return
+    print(f"Watching {len(monitor.state)} products every {args.interval:.0f}s (+/-{args.jitter * 100:.0f}%)")
+    monitor.run(passes=1 if args.once else args.passes)
+    METRICS.report()
+    if args.metrics_file:
+        METRICS.write(args.metrics_file, mode='monitor')
+
+if __name__ == "__main__":
+    main()
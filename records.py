@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Product records - compact __slots__ records for product info, saved images,
+image variants and kit data, plus JSON output through orjson when installed
+"""
+
+import json
+import os
+import sys
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_UNSET = object()
+
+class Record:
+    """Fixed-field record that reads and writes like the dict it replaces
+
+    Fields live in __slots__, so a record has no per-instance __dict__.
+    A field that was never set behaves like a missing dict key: get()
+    returns the default, `in` is False and to_dict() leaves it out, so
+    optional fields such as srcset or srcSets serialize exactly as before.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            return getattr(self, key, default)
+        return default
+
+    def keys(self):
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def _pairs(self):
+        # items() below is shadowed on records with an 'items' field (KitData)
+        return list(self.to_dict().items())
+
+    def items(self):
+        return self._pairs()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Record) else other)
+        return NotImplemented
+
+    def to_dict(self):
+        # Called once per record by the JSON encoders, so it is kept to one comprehension
+        return {key: value for key in self.__slots__ if (value := getattr(self, key, _UNSET)) is not _UNSET}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Rebuild through __init__ so per-type normalization (URL interning)
+        # also runs on records coming back from worker processes
+        return (rebuild_record, (type(self), self._pairs()))
+
+def rebuild_record(cls, items):
+    return cls(**dict(items))
+
+def intern_urls(urls):
+    """Return urls as a tuple of interned strings, shared across every product that repeats them"""
+    return tuple(sys.intern(url) for url in urls)
+
+class ProductInfo(Record):
+    """Fields extracted from one product page"""
+
+    __slots__ = ('name', 'price', 'original_price', 'description', 'brand', 'category', 'images', 'details',
+                 'url')
+
+    def __setitem__(self, key, value):
+        if key == 'images':
+            value = intern_urls(value)
+        Record.__setitem__(self, key, value)
+
+class SavedImage(Record):
+    """One downloaded product image and what later stages learned about it"""
+
+    __slots__ = ('original_url', 'local_path', 'public_path', 'filename', 'width', 'height', 'bytes',
+                 'variants', 'srcset', 'asset')
+
+class ImageVariant(Record):
+    """One resized/re-encoded rendition of a saved image"""
+
+    __slots__ = ('format', 'width', 'height', 'bytes', 'local_path', 'public_path')
+
+class KitData(Record):
+    """Kit entry for the price-anchoring component"""
+
+    __slots__ = ('id', 'name', 'wrestler', 'price', 'originalPrice', 'savings', 'description', 'items',
+                 'images', 'srcSets')
+
+def json_default(value):
+    """Serialize records and tuples for json.dump(default=...) and orjson"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data, indent=False):
+    """Return data as UTF-8 JSON bytes, indented by 2 like json.dump(indent=2) when indent is set"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, default=json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False, default=json_default).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+def write_json(path, data, indent=True):
+    """Atomically write data as JSON to path; returns the number of bytes written"""
+    content = dumps(data, indent)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return len(content)
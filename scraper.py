@@ -1,14 +1,38 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import glob
 import requests
 import json
 import re
 import os
+import random
 import time
+import threading
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+from extractor import (PARSER_BACKENDS, TARGET_IMAGE_WIDTH, dedupe_image_variants, extract_from_html,
+                       resolve_image_urls)
+from image_cache import ImageCache
+from download_journal import DownloadJournal
+from catalog import CATALOG_FILE, Catalog
+from kit_rules import load_rules
+from site_profiles import report as report_profiles, select_profile
+from metrics import METRICS, profiled
+from records import KitData, ProductInfo, SavedImage, dumps, write_json
+from ts_emitter import COMPONENT_FILE, format_kit, format_kits_array, update_component, write_if_changed
+from structured_data import extract_structured_data, is_complete
+from image_variants import build_variants, fallback_src
+from image_dedup import HashIndex, filter_images
+from asset_manifest import AssetManifest, update_asset_manifest
+from incremental import RunLog, changed_stages, fingerprint, load_state, save_state, stage_fingerprints
 
 def clean_filename(filename):
     """Clean filename for safe filesystem usage"""
@@ -18,42 +42,228 @@ def clean_filename(filename):
     filename = filename.strip('-')  # Remove leading/trailing hyphens
     return filename[:50]  # Limit length
 
-def download_image(url, filepath, max_retries=3):
-    """Download image from URL and save to filepath"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-    }
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+}
+
+MAX_DOWNLOAD_WORKERS = 8  # Total concurrent downloads per product
+PER_HOST_LIMIT = 4  # Concurrent downloads against a single host
+FLUSH_BATCH_SIZE = 100  # Products per catalog insert / component upsert when streaming
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+
+def get_session():
+    """Return the shared keep-alive session used for every download"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(DOWNLOAD_HEADERS)
+            adapter = HTTPAdapter(pool_connections=MAX_DOWNLOAD_WORKERS, pool_maxsize=MAX_DOWNLOAD_WORKERS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+def host_semaphore(url, limit=PER_HOST_LIMIT):
+    """Return the semaphore limiting concurrent requests to the URL's host"""
+    host = urlparse(url).netloc
+    with _session_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+        return _host_semaphores[host]
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for retry number attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def download_image(url, filepath, max_retries=3, session=None, stats=None, cache=None, journal=None):
+    """Download image from URL and save to filepath
+
+    The body is streamed into filepath + '.part' and renamed into place only
+    once complete, so an interrupted download never leaves a truncated image.
+    A leftover .part file is resumed with an HTTP Range request, guarded by
+    If-Range so a changed image is fetched from the start instead. With a
+    cache the request is conditional, and a 304 response is served from the
+    cached copy instead of being downloaded again; if that copy is missing or
+    damaged the entry is dropped and the image fetched once unconditionally.
+    """
+    session = session or get_session()
+    part_path = f"{filepath}.part"
     
     for attempt in range(max_retries):
         try:
             print(f"    Downloading: {os.path.basename(filepath)} (attempt {attempt + 1})")
-            response = requests.get(url, headers=headers, timeout=15, stream=True)
-            response.raise_for_status()
-            
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            started = time.perf_counter()
+            with host_semaphore(url):
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                entry = journal.resumable(filepath, url) if journal and offset else None
+                if entry:
+                    # Resume the partial body; identity encoding keeps byte offsets meaningful
+                    request_headers = {'Range': f'bytes={offset}-', 'Accept-Encoding': 'identity'}
+                    validator = entry.get('etag') or entry.get('last_modified')
+                    if validator:
+                        request_headers['If-Range'] = validator
+                else:
+                    offset = 0
+                    request_headers = cache.conditional_headers(url) if cache else {}
+                response = session.get(url, timeout=15, stream=True, headers=request_headers)
+                try:
+                    restored = None
+                    if cache and response.status_code == 304:
+                        restored = cache.restore(url, filepath)
+                        if not restored:
+                            # The cached copy is missing or damaged: forget it and fetch the image in full
+                            response.close()
+                            cache.discard(url)
+                            METRICS.count('download.cache_restore_failed')
+                            print(f"    Cached copy unusable, downloading in full: {os.path.basename(filepath)}")
+                            response = session.get(url, timeout=15, stream=True)
+                    
+                    if restored:
+                        size = 0
+                        METRICS.count('download.not_modified')
+                        print(f"    Not modified, served from cache: {filepath}")
+                    else:
+                        if response.status_code == 416:
+                            # The partial file no longer fits the remote image; start over
+                            os.remove(part_path)
+                        response.raise_for_status()
+                        if response.status_code == 304:
+                            # An empty 304 body must never be written out as the image
+                            raise requests.HTTPError(f"304 Not Modified for {url} with no cached copy", response=response)
+                        
+                        # Create directory if it doesn't exist
+                        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                        
+                        if response.status_code == 206 and offset:
+                            mode = 'ab'
+                            METRICS.count('download.resumed')
+                            print(f"    Resuming {os.path.basename(filepath)} from byte {offset}")
+                        else:
+                            mode, offset = 'wb', 0
+                        if journal:
+                            length = response.headers.get('Content-Length')
+                            journal.mark_partial(filepath, url, response.headers.get('ETag'),
+                                                 response.headers.get('Last-Modified'),
+                                                 offset + int(length) if length and length.isdigit() else None)
+                        size = 0
+                        with open(part_path, mode) as f:
+                            for chunk in response.iter_content(chunk_size=8192):
+                                f.write(chunk)
+                                size += len(chunk)
+                        
+                        if cache:
+                            cache.store(url, part_path, response.headers, filepath)
+                        else:
+                            os.replace(part_path, filepath)
+                        print(f"    Saved: {filepath}")
+                finally:
+                    # Hand the connection back to the pool on 304s and HTTP errors too
+                    response.close()
             
-            print(f"    Saved: {filepath}")
+            if journal:
+                journal.mark_complete(filepath, url, os.path.getsize(filepath))
+            elapsed = time.perf_counter() - started
+            METRICS.observe('download.image', elapsed)
+            METRICS.count('download.bytes', size)
+            if stats is not None:
+                stats.append({'url': url, 'bytes': size, 'seconds': elapsed})
             return True
             
         except Exception as e:
             print(f"    Error downloading {url}: {e}")
+            METRICS.count('download.errors')
             if attempt < max_retries - 1:
-                time.sleep(2)
+                METRICS.count('download.retries')
+                time.sleep(backoff_delay(attempt))
             else:
+                METRICS.count('download.failed')
+                if journal:
+                    journal.mark_failed(filepath, url, e)
                 return False
 
-def extract_product_info(html_content):
-    """Extract all product information from HTML"""
+def summarize_downloads(stats, wall_time):
+    """Build a throughput/latency summary from per-image download stats"""
+    latencies = sorted(item['seconds'] for item in stats)
+    total_bytes = sum(item['bytes'] for item in stats)
+    summary = {
+        'images': len(stats),
+        'bytes': total_bytes,
+        'wall_seconds': round(wall_time, 3),
+        'images_per_second': round(len(stats) / wall_time, 2) if wall_time > 0 else 0.0,
+        'kb_per_second': round(total_bytes / 1024 / wall_time, 1) if wall_time > 0 else 0.0,
+        'latency_avg': 0.0,
+        'latency_p50': 0.0,
+        'latency_max': 0.0,
+    }
+    if latencies:
+        summary['latency_avg'] = round(sum(latencies) / len(latencies), 3)
+        summary['latency_p50'] = round(latencies[len(latencies) // 2], 3)
+        summary['latency_max'] = round(latencies[-1], 3)
+    return summary
+
+def extract_product_info(html_content, max_images=10, parser=None, target_width=TARGET_IMAGE_WIDTH, structured=True,
+                         url=None, profile=None):
+    """Extract all product information from HTML
+
+    JSON-LD and embedded app-state JSON are read first; when they already
+    hold the name, price and images (resolved and filtered like the DOM's
+    image URLs) the DOM is never parsed. Otherwise the
+    page is parsed in a single tree walk with the parser backend ('selectolax',
+    'lxml' or 'html.parser'; by default the fastest installed one) and the
+    structured data only fills the fields the DOM left empty. Size variants
+    of the same image are collapsed to the rendition closest to target_width.
+    The DOM rules come from the site profile for url's domain, or the one
+    sniffed from the page head; pass profile to force one. Relative image
+    URLs resolve against url, so pass the URL the page was fetched from.
+    """
+    with METRICS.timer('extract.structured'):
+        fields = extract_structured_data(html_content) if structured else {}
+    
+    if profile is None:
+        with METRICS.timer('extract.sniff'):
+            profile, base_url = select_profile(html_content, url)
+    else:
+        base_url = url
+    if fields.get('images'):
+        # Structured images get the same resolving and filtering as DOM ones before they are trusted
+        fields['images'] = resolve_image_urls(fields['images'], profile, base_url)
+    
+    if is_complete(fields):
+        METRICS.count('extract.structured_hits')
+        product_info = ProductInfo(
+            name=fields['name'],
+            price=fields['price'],
+            original_price=fields.get('original_price') or fields['price'],
+            description=fields.get('description', ''),
+            brand=fields.get('brand', ''),
+            category=fields.get('category', ''),
+            images=fields['images'],
+            details=fields.get('details', []),
+        )
+    else:
+        with METRICS.timer('extract.dom'):
+            product_info = extract_from_html(html_content, backend=parser, profile=profile, base_url=base_url)
+        for key, value in fields.items():
+            if not product_info.get(key):
+                product_info[key] = value
+        if fields.get('price') and product_info['original_price'] == 0.0:
+            product_info['original_price'] = fields.get('original_price') or product_info['price']
+    
+    with METRICS.timer('extract.dedupe_variants'):
+        images = dedupe_image_variants(product_info['images'], target_width)
+    product_info['images'] = images[:max_images]  # Limit to 10 images
+    return product_info
+
+def extract_product_info_multipass(html_content, max_images=10):
+    """Original multi-pass extractor, kept as the parity and benchmark reference"""
     soup = BeautifulSoup(html_content, 'html.parser')
     
     product_info = {
@@ -270,12 +480,17 @@ def extract_product_info(html_content):
             
         filtered_images.append(img_url)
     
-    product_info['images'] = filtered_images[:10]  # Limit to 10 images
+    product_info['images'] = filtered_images[:max_images]  # Limit to 10 images
     
     return product_info
 
-def save_product_images(product_info, base_dir="public"):
-    """Download and save all product images"""
+def save_product_images(product_info, base_dir="public", max_workers=MAX_DOWNLOAD_WORKERS, summary=None, cache=None,
+                        journal=None):
+    """Download and save all product images concurrently over the shared session
+
+    Images the journal already records as complete are kept without a request,
+    and ones it records as dropped by dedup are left out.
+    """
     if not product_info['images']:
         print("No images found to download")
         return []
@@ -287,127 +502,457 @@ def save_product_images(product_info, base_dir="public"):
     print(f"Creating directory: {product_dir}")
     os.makedirs(product_dir, exist_ok=True)
     
-    saved_images = []
-    
+    jobs = []
+    dropped = 0
     for i, img_url in enumerate(product_info['images']):
-        try:
-            # Get file extension from URL
-            parsed_url = urlparse(img_url)
-            path = parsed_url.path
-            ext = os.path.splitext(path)[1] or '.jpg'
-            
-            # Create filename
-            filename = f"{product_name}-{i+1:02d}{ext}"
-            filepath = os.path.join(product_dir, filename)
-            
-            # Download image
-            if download_image(img_url, filepath):
-                # Store relative path for use in React
-                relative_path = f"/{product_name}/{filename}"
-                saved_images.append({
-                    'original_url': img_url,
-                    'local_path': filepath,
-                    'public_path': relative_path,
-                    'filename': filename
-                })
-            
-            # Small delay to be respectful
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"Error processing image {img_url}: {e}")
+        # Get file extension from URL
+        parsed_url = urlparse(img_url)
+        path = parsed_url.path
+        ext = os.path.splitext(path)[1] or '.jpg'
+        
+        # Create filename
+        filename = f"{product_name}-{i+1:02d}{ext}"
+        filepath = os.path.join(product_dir, filename)
+        if journal and journal.is_dropped(filepath, img_url):
+            dropped += 1
             continue
+        jobs.append((img_url, filename, filepath))
+    if dropped:
+        print(f"  {dropped} images already dropped by dedup in the interrupted run")
+    
+    stats = []
+    session = get_session()
+    started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [None if journal and journal.is_complete(filepath, img_url) else
+                   executor.submit(download_image, img_url, filepath, session=session, stats=stats, cache=cache,
+                                   journal=journal)
+                   for img_url, filename, filepath in jobs]
+        skipped = futures.count(None)
+        if skipped:
+            print(f"  {skipped} images already downloaded by the interrupted run")
+        
+        # Collect in submission order so records keep the original image order
+        saved_images = []
+        for (img_url, filename, filepath), future in zip(jobs, futures):
+            try:
+                if future is None or future.result():
+                    # Store relative path for use in React
+                    relative_path = f"/{product_name}/{filename}"
+                    saved_images.append(SavedImage(
+                        original_url=img_url,
+                        local_path=filepath,
+                        public_path=relative_path,
+                        filename=filename,
+                    ))
+            except Exception as e:
+                print(f"Error processing image {img_url}: {e}")
+                continue
+    
+    download_summary = summarize_downloads(stats, time.perf_counter() - started)
+    print(f"  Downloaded {download_summary['images']} images "
+          f"({download_summary['bytes'] / 1024:.1f} KB) in {download_summary['wall_seconds']}s - "
+          f"{download_summary['images_per_second']} img/s, avg latency {download_summary['latency_avg']}s")
+    if summary is not None:
+        summary.update(download_summary)
     
     return saved_images
 
+def kit_savings(kit_price, kit_original_price):
+    """Savings percentage shown on a kit"""
+    if kit_original_price > 0:
+        return int((1 - kit_price / kit_original_price) * 100)
+    return 50  # Default fallback
+
 def generate_kit_data(product_info, saved_images, kit_id, wrestler_name, kit_price, kit_original_price):
     """Generate kit data structure for price-anchoring"""
     
     # Use local images if available, fallback to original URLs
     image_paths = []
+    src_sets = []
     if saved_images:
-        for img in saved_images[:5]:  # Limit to 5 images
-            image_paths.append(img['public_path'])
+        for img in islice(saved_images, 5):  # Limit to 5 images
+            asset = img.get('asset')
+            if asset:
+                # Content-hashed copies published by the asset manifest step
+                image_paths.append(asset['src'])
+                srcset = asset.get('srcset')
+            else:
+                # Prefer the responsive variants when they were generated
+                image_paths.append(fallback_src(img))
+                srcset = img.get('srcset')
+            if srcset:
+                src_sets.append(srcset)
     else:
         # Fallback to original URLs
-        for img_url in product_info['images'][:5]:
+        for img_url in islice(product_info['images'], 5):
             image_paths.append(img_url)
     
-    # Generate items list
-    items = [
-        f'"{product_info["name"]}"',
-        '"Official Limited Edition Badge"',
-        '"Custom Name + Number"',
-        '"Official Champion Signature"'
-    ]
+    # Generate items list from the matching kit rule
+    items = load_rules().classify(product_info, record=False)['items']
     
-    # Calculate savings percentage
-    if kit_original_price > 0:
-        savings = int((1 - kit_price / kit_original_price) * 100)
-    else:
-        savings = 50  # Default fallback
-    
-    kit_data = {
-        'id': kit_id,
-        'name': product_info['name'] or f"{wrestler_name} Kit",
-        'wrestler': wrestler_name,
-        'price': kit_price,
-        'originalPrice': kit_original_price,
-        'savings': savings,
-        'description': product_info['description'][:50] + "..." if product_info['description'] else f"{wrestler_name} Collection",
-        'items': items,
-        'images': image_paths
-    }
+    savings = kit_savings(kit_price, kit_original_price)
+    
+    kit_data = KitData(
+        id=kit_id,
+        name=product_info['name'] or f"{wrestler_name} Kit",
+        wrestler=wrestler_name,
+        price=kit_price,
+        originalPrice=kit_original_price,
+        savings=savings,
+        description=product_info['description'][:50] + "..." if product_info['description'] else f"{wrestler_name} Collection",
+        items=items,
+        images=image_paths,
+    )
+    if src_sets and len(src_sets) == len(image_paths):
+        kit_data['srcSets'] = src_sets
     
     return kit_data
 
 def generate_price_anchoring_code(kit_data):
     """Generate TypeScript code for price-anchoring component"""
+    return format_kit(kit_data)
+
+def detect_kit(product_info, rules=None):
+    """Auto-detect kit id, wrestler and pricing from the product name using kit_rules.json"""
+    kit = (rules or load_rules()).classify(product_info)
+    return kit['id'], kit['wrestler'], kit['price'], kit['original_price']
+
+def parse_html_file(html_file, parser=None, target_width=TARGET_IMAGE_WIDTH):
+    """Parse one saved HTML page (runs inside a worker process)"""
+    started = time.perf_counter()
+    try:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        product_info = extract_product_info(html_content, parser=parser, target_width=target_width)
+        return html_file, product_info, time.perf_counter() - started, None
+    except Exception as e:
+        return html_file, None, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+def parse_html_file_metered(html_file, parser=None, target_width=TARGET_IMAGE_WIDTH):
+    """Parse one page in a pool worker and return its result plus the worker's metrics for it
+
+    The worker's registry is reset first, so neither state inherited from the
+    parent nor earlier tasks leak into the snapshot merged by the parent.
+    """
+    METRICS.reset()
+    return parse_html_file(html_file, parser, target_width) + (METRICS.snapshot(),)
+
+def find_html_files(source):
+    """Resolve a directory or glob pattern to a sorted list of HTML files"""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, '*.htm*')
+    else:
+        pattern = source
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+def generate_kits_array_code(kits):
+    """Generate a TypeScript kits array from several kit data structures"""
+    return format_kits_array(kits)
+
+def batch_main(source, workers=None, download=True, parser=None, use_cache=True,
+               target_width=TARGET_IMAGE_WIDTH, variants=True,
+               data_file='extracted_products.json', code_file='kits_code.ts', catalog_file=CATALOG_FILE,
+               dedup=True, component_file=None, manifest=True):
+    """Scrape every saved HTML page in a directory or glob across a process pool"""
+    html_files = find_html_files(source)
+    if not html_files:
+        print(f"No HTML files found for {source}")
+        return {}
     
-    # Format items
-    items_str = ',\n'.join(f'      {item}' for item in kit_data['items'])
-    
-    # Format images
-    images_str = ',\n'.join(f'      "{img}"' for img in kit_data['images'])
-    
-    code = f'''  {{
-    id: "{kit_data['id']}",
-    name: "{kit_data['name']}",
-    wrestler: "{kit_data['wrestler']}",
-    price: {kit_data['price']},
-    originalPrice: {kit_data['originalPrice']:.2f},
-    savings: {kit_data['savings']},
-    description: "{kit_data['description']}",
-    items: [
-{items_str}
-    ],
-    images: [
-{images_str}
-    ]
-  }}'''
+    print("WWE Product Scraper Started! (batch mode)")
+    print("=" * 50)
+    print(f"Parsing {len(html_files)} HTML files...")
+    
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for *result, worker_metrics in executor.map(partial(parse_html_file_metered, parser=parser,
+                                                            target_width=target_width), html_files):
+            METRICS.merge(worker_metrics)
+            results.append(tuple(result))
+    parse_time = time.perf_counter() - started
+    
+    products, report = save_scraped_products(results, download=download, use_cache=use_cache,
+                                             variants=variants, workers=workers,
+                                             data_file=data_file, code_file=code_file,
+                                             catalog_file=catalog_file, dedup=dedup,
+                                             component_file=component_file, manifest=manifest)
+    failures = [entry for entry in report if entry['error']]
+    print(f"Parsed {len(html_files)} files in {parse_time:.2f}s, {len(failures)} failed")
+    
+    return products
+
+def process_scraped_products(results, download=True, use_cache=True, variants=True, workers=None,
+                             dedup=True, manifest=True):
+    """Download images and build the kit for each parsed page as it arrives
+
+    results holds (source, product_info, seconds, error) tuples, where source
+    is a file path or URL. Yields a (report entry, product key, product record)
+    triple per result, with key and record None for failed pages; only the
+    keys and kit ids seen so far are remembered between results. With
+    manifest the downloaded images are published under content-hashed names
+    in the asset manifest before the kit is generated, and the kit points at
+    those names. The image cache, journal, hash index and manifest are saved
+    once results runs out.
+    """
+    keys = set()
+    kit_ids = set()
+    cache = ImageCache() if download and use_cache else None
+    journal = DownloadJournal() if download else None
+    hash_index = HashIndex() if download and dedup else None
+    assets = AssetManifest() if download and manifest else None
+    
+    # One pool for the whole batch; worker processes start on the first submitted image
+    variant_pool = ProcessPoolExecutor(max_workers=workers) if download and variants else None
+    try:
+        for source, product_info, seconds, error in results:
+            entry = {'source': source, 'seconds': round(seconds, 3), 'error': error, 'product': None}
+            METRICS.observe('parse.page', seconds)
+            if error:
+                METRICS.count('parse.errors')
+                print(f"  FAILED {source} ({seconds:.3f}s): {error}")
+                yield entry, None, None
+                continue
+            
+            # Key products by their folder name, keeping keys unique across pages
+            key = clean_filename(product_info['name']) or 'unknown-product'
+            base_key, n = key, 2
+            while key in keys:
+                key = f"{base_key}-{n}"
+                n += 1
+            keys.add(key)
+            entry['product'] = key
+            print(f"  OK     {source} ({seconds:.3f}s): {product_info['name']} - {len(product_info['images'])} images")
+            
+            with METRICS.timer('download'):
+                saved_images = save_product_images(product_info, cache=cache, journal=journal) if download else []
+            if hash_index:
+                with METRICS.timer('dedup'):
+                    saved_images = filter_images(saved_images, index=hash_index, journal=journal)
+            if variants:
+                with METRICS.timer('variants'):
+                    build_variants(saved_images, workers=workers, executor=variant_pool)
+            if assets:
+                with METRICS.timer('manifest'):
+                    assets.add_products([(product_info['name'], saved_images)])
+            
+            kit_id, wrestler_name, kit_price, kit_original_price = detect_kit(product_info)
+            base_id, n = kit_id, 2
+            while kit_id in kit_ids:
+                kit_id = f"{base_id}-{n}"
+                n += 1
+            kit_ids.add(kit_id)
+            
+            with METRICS.timer('generate'):
+                kit_data = generate_kit_data(product_info, saved_images, kit_id, wrestler_name, kit_price, kit_original_price)
+            yield entry, key, {
+                'source': source,
+                'product_info': product_info,
+                'saved_images': saved_images,
+                'kit_data': kit_data,
+            }
+    finally:
+        if variant_pool:
+            variant_pool.shutdown()
+    
+    if cache:
+        cache.save()
+        cache.report()
+    if journal:
+        journal.finish()
+    if hash_index:
+        hash_index.save()
+    if assets:
+        assets.save()
+    load_rules().report()
+    report_profiles()
+
+def save_scraped_products(results, download=True, use_cache=True, variants=True, workers=None,
+                          data_file='extracted_products.json', code_file='kits_code.ts',
+                          catalog_file=CATALOG_FILE, dedup=True, component_file=None, manifest=True):
+    """Download images for parsed pages and write the merged dataset and kits array
+
+    Every product is also appended to the catalog in one transaction unless
+    catalog_file is None, and with component_file the kits are upserted into
+    its kits array. The whole dataset is held in memory for the single JSON
+    write; use stream_scraped_products for unbounded inputs.
+    Returns the keyed products and the per-page report.
+    """
+    products = {}
+    kits = []
+    report = []
+    for entry, key, product in process_scraped_products(results, download=download, use_cache=use_cache,
+                                                        variants=variants, workers=workers,
+                                                        dedup=dedup, manifest=manifest):
+        report.append(entry)
+        if product:
+            products[key] = product
+            kits.append(product['kit_data'])
+    
+    print(f"\nSAVING RESULTS:")
+    scraped_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    with METRICS.timer('write.json'):
+        written = write_json(data_file, {
+            'products': products,
+            'report': report,
+            'scraped_at': scraped_at
+        })
+    METRICS.count('write.bytes', written)
+    
+    with METRICS.timer('codegen'):
+        kits_code = generate_kits_array_code(kits)
+    with METRICS.timer('write.code'):
+        code_changed = write_if_changed(code_file, kits_code)
+    
+    print(f"{data_file} - {len(products)} products")
+    print(f"{code_file} - {len(kits)} kits for price-anchoring.tsx" + ("" if code_changed else " (unchanged)"))
+    if component_file and kits:
+        with METRICS.timer('write.component'):
+            changed = update_component(kits, component_file)
+        print(f"{component_file} - {len(kits)} kits upserted" + ("" if changed else " (already up to date)"))
+    
+    if catalog_file:
+        with METRICS.timer('write.catalog'), Catalog(catalog_file) as catalog:
+            added = catalog.add_products([dict(product, product_id=key, scraped_at=scraped_at)
+                                          for key, product in products.items()])
+        print(f"{catalog_file} - {added} products added to the catalog")
+    
+    return products, report
+
+def stream_scraped_products(results, download=True, use_cache=True, variants=True, workers=None,
+                            data_file='extracted_products.jsonl', code_file='kits_code.ts',
+                            catalog_file=CATALOG_FILE, dedup=True, component_file=None, manifest=True,
+                            batch_size=FLUSH_BATCH_SIZE):
+    """Like save_scraped_products, but flushes each product as it is finished
+
+    data_file gets one JSON line per page: its report entry, plus the product
+    record when it parsed. The kits array is streamed into code_file, and
+    catalog inserts and component upserts go in batches of batch_size, so
+    memory stays flat however many products results yields. data_file and
+    code_file are replaced atomically once results runs out.
+    Returns the number of products and of failed pages.
+    """
+    scraped_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    counts = {'products': 0, 'failed': 0}
+    batch = []
+    catalog = Catalog(catalog_file) if catalog_file else None
+    
+    def flush():
+        if not batch:
+            return
+        if catalog:
+            with METRICS.timer('write.catalog'):
+                catalog.add_products([dict(product, product_id=key, scraped_at=scraped_at) for key, product in batch])
+        if component_file:
+            with METRICS.timer('write.component'):
+                update_component([product['kit_data'] for key, product in batch], component_file)
+        batch.clear()
+    
+    data_tmp, code_tmp = f"{data_file}.tmp", f"{code_file}.tmp"
+    try:
+        with open(data_tmp, 'wb') as data_out, open(code_tmp, 'w', encoding='utf-8') as code_out:
+            code_out.write("const kits: Kit[] = [\n")
+            for entry, key, product in process_scraped_products(results, download=download, use_cache=use_cache,
+                                                                variants=variants, workers=workers,
+                                                                dedup=dedup, manifest=manifest):
+                line = dict(entry, **product, scraped_at=scraped_at) if product else entry
+                with METRICS.timer('write.json'):
+                    written = data_out.write(dumps(line) + b'\n')
+                METRICS.count('write.bytes', written)
+                if not product:
+                    counts['failed'] += 1
+                    continue
+                with METRICS.timer('codegen'):
+                    code_out.write((",\n" if counts['products'] else "") + format_kit(product['kit_data']))
+                counts['products'] += 1
+                batch.append((key, product))
+                if len(batch) >= batch_size:
+                    flush()
+            code_out.write("\n]\n")
+        flush()
+    finally:
+        if catalog:
+            catalog.close()
+    os.replace(data_tmp, data_file)
+    os.replace(code_tmp, code_file)
     
-    return code
+    print(f"\nSAVED RESULTS:")
+    print(f"{data_file} - {counts['products']} products, {counts['failed']} failed pages")
+    print(f"{code_file} - {counts['products']} kits for price-anchoring.tsx")
+    if component_file and counts['products']:
+        print(f"{component_file} - {counts['products']} kits upserted")
+    if catalog_file:
+        print(f"{catalog_file} - {counts['products']} products added to the catalog")
+    return counts['products'], counts['failed']
 
-def main():
-    """Main scraper function"""
-    html_file = 'html.html'
+def cancel_run(run_log, next_stage):
+    """Stop a superseded run before next_stage and log it"""
+    stages = ('download', 'generate', 'write')
+    for stage in stages[stages.index(next_stage):]:
+        run_log.skip(stage, "run superseded by a newer save")
+    run_log.write()
+    print("Run cancelled - a newer version of the page is waiting")
+    return None
+
+def main(parser=None, use_cache=True, target_width=TARGET_IMAGE_WIDTH, incremental=False, variants=True,
+         html_file='html.html', data_file='extracted_product_data.json', code_file='kit_code.ts',
+         cancel_check=None, catalog_file=CATALOG_FILE, dedup=True, component_file=None, manifest=True, url=None):
+    """Main scraper function
+
+    In incremental mode nothing is redone when html_file is byte-identical
+    to the last run with the same options, and after parsing only the stages
+    whose inputs changed (image set, prices, text or the options they use)
+    are rerun. cancel_check is polled between
+    stages; when it returns True the run stops without writing outputs.
+    Each completed run is appended to the catalog unless catalog_file is None;
+    data_file keeps the latest product as a JSON export. With component_file
+    the kit is upserted by id into that component's kits array. With
+    manifest the images are added to the content-hashed asset manifest
+    before the kit is generated, so the kit uses the hashed paths. url is
+    the address html_file was saved from; it picks the site profile and
+    resolves relative image URLs.
+    """
     
     if not os.path.exists(html_file):
         print(f"File {html_file} not found!")
-        print("Please save the product HTML content to html.html and try again.")
+        print(f"Please save the product HTML content to {html_file} and try again.")
         return
     
     print("WWE Product Scraper Started!")
     print("=" * 50)
     
+    METRICS.reset()
+    run_log = RunLog(html_file)
+    state = load_state() if incremental else {}
+    previous = state.get(html_file)
+    outputs_exist = os.path.exists(data_file) and os.path.exists(code_file)
+    
     # Read HTML file
     print(f"Reading {html_file}...")
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    with run_log.stage('read'):
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        html_bytes = html_content.encode('utf-8')
+        METRICS.count('read.bytes', len(html_bytes))
+        html_fingerprint = fingerprint(html_bytes)
+    # Options that change the parse or the stages after it; a change reruns them like a page edit
+    options = {'target_width': target_width, 'dedup': dedup, 'variants': variants, 'manifest': manifest}
+    options_fingerprint = fingerprint(options)
+    
+    if (incremental and previous and outputs_exist and previous['html'] == html_fingerprint
+            and previous.get('options') == options_fingerprint):
+        for stage in ('parse', 'download', 'generate', 'write'):
+            run_log.skip(stage, "input HTML unchanged")
+        run_log.write()
+        print(f"Nothing to do - {html_file} is unchanged since the last run")
+        return previous['kit_data']
     
     # Extract product information
     print("Extracting product information...")
-    product_info = extract_product_info(html_content)
+    with run_log.stage('parse'):
+        product_info = extract_product_info(html_content, parser=parser, target_width=target_width, url=url)
     
     print(f"\nPRODUCT FOUND:")
     print(f"  Name: {product_info['name']}")
@@ -416,74 +961,183 @@ def main():
     print(f"  Description: {product_info['description'][:100]}...")
     print(f"  Images found: {len(product_info['images'])}")
     
-    # Download images
+    if cancel_check and cancel_check():
+        return cancel_run(run_log, 'download')
+    
+    stages = stage_fingerprints(product_info, options)
+    changed = changed_stages(previous, stages) if incremental and outputs_exist else set(stages)
+    run_log.record['changed'] = sorted(changed)
+    
+    if not changed:
+        for stage in ('download', 'generate', 'write'):
+            run_log.skip(stage, "extracted product and options unchanged")
+        previous['html'] = html_fingerprint
+        previous['options'] = options_fingerprint
+        save_state(state)
+        run_log.write()
+        print("Nothing to do - only irrelevant markup changed since the last run")
+        return previous['kit_data']
+    
+    # Download images, unless the image set is unchanged and still on disk
     print(f"\nDOWNLOADING IMAGES:")
-    saved_images = save_product_images(product_info)
+    download_summary = {}
+    reusable = previous and 'images' not in changed and all(
+        os.path.exists(img['local_path']) for img in previous['saved_images'])
+    if reusable:
+        saved_images = previous['saved_images']
+        if not manifest:
+            # Reused records may still carry hashed names from a run with the manifest on
+            for img in saved_images:
+                img.pop('asset', None)
+        download_summary = previous.get('download_summary', {})
+        run_log.skip('download', "image set unchanged")
+    else:
+        with run_log.stage('download'):
+            cache = ImageCache() if use_cache else None
+            journal = DownloadJournal()
+            saved_images = save_product_images(product_info, summary=download_summary, cache=cache,
+                                               journal=journal)
+            if cache:
+                cache.save()
+                cache.report()
+        if dedup:
+            with run_log.stage('dedup'):
+                saved_images = filter_images(saved_images, journal=journal)
+        journal.finish()
+        if variants:
+            with run_log.stage('variants'):
+                build_variants(saved_images)
+    
+    if manifest and saved_images:
+        with run_log.stage('manifest'):
+            update_asset_manifest([(product_info['name'], saved_images)])
     
     if saved_images:
         print(f"Successfully downloaded {len(saved_images)} images")
     else:
         print("No images were downloaded, using original URLs")
     
+    if cancel_check and cancel_check():
+        return cancel_run(run_log, 'generate')
+    
     # Generate kit data (automatic values based on product)
     print(f"\nGENERATING KIT DATA:")
     
-    # Auto-detect kit info from product name
-    product_name_lower = product_info['name'].lower()
-    
-    if 'john cena' in product_name_lower:
-        kit_id = "john-cena"
-        wrestler_name = "John Cena"
-        kit_price = 49.99
-        kit_original_price = 110.99
-    elif 'cody rhodes' in product_name_lower:
-        kit_id = "cody-rhodes"
-        wrestler_name = "Cody Rhodes"
-        kit_price = 49.99
-        kit_original_price = 149.99
-    else:
-        kit_id = "custom-kit"
-        wrestler_name = "WWE Superstar"
-        kit_price = 49.99
-        kit_original_price = max(product_info['original_price'] * 2, 99.99)
-    
-    print(f"  Kit ID: {kit_id}")
-    print(f"  Wrestler: {wrestler_name}")
-    print(f"  Kit Price: ${kit_price}")
-    print(f"  Original Price: ${kit_original_price}")
-    
-    kit_data = generate_kit_data(product_info, saved_images, kit_id, wrestler_name, kit_price, kit_original_price)
-    
-    # Generate TypeScript code
-    ts_code = generate_price_anchoring_code(kit_data)
+    with run_log.stage('generate'):
+        # Auto-detect kit info from product name
+        kit_id, wrestler_name, kit_price, kit_original_price = detect_kit(product_info)
+        
+        print(f"  Kit ID: {kit_id}")
+        print(f"  Wrestler: {wrestler_name}")
+        print(f"  Kit Price: ${kit_price}")
+        print(f"  Original Price: ${kit_original_price}")
+        
+        kit_data = generate_kit_data(product_info, saved_images, kit_id, wrestler_name, kit_price, kit_original_price)
+        
+        # Generate TypeScript code
+        with METRICS.timer('codegen'):
+            ts_code = generate_price_anchoring_code(kit_data)
     
     # Save results
     print(f"\nSAVING RESULTS:")
     
-    # Save raw data
-    with open('extracted_product_data.json', 'w', encoding='utf-8') as f:
+    with run_log.stage('write'):
+        # Save raw data
         result_data = {
             'product_info': product_info,
             'saved_images': saved_images,
             'kit_data': kit_data,
+            'download_summary': download_summary,
             'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
         }
-        json.dump(result_data, f, indent=2, ensure_ascii=False)
+        with METRICS.timer('write.json'):
+            METRICS.count('write.bytes', write_json(data_file, result_data))
+        
+        # Save TypeScript code, leaving the file untouched when nothing changed
+        with METRICS.timer('write.code'):
+            write_if_changed(code_file, ts_code)
+        component_changed = False
+        if component_file:
+            with METRICS.timer('write.component'):
+                component_changed = update_component([kit_data], component_file)
+        
+        if catalog_file:
+            with METRICS.timer('write.catalog'), Catalog(catalog_file) as catalog:
+                catalog.add_products([dict(result_data, product_id=clean_filename(product_info['name']) or 'unknown-product',
+                                           source=html_file)])
     
-    # Save TypeScript code
-    with open('kit_code.ts', 'w', encoding='utf-8') as f:
-        f.write(ts_code)
+    if incremental:
+        state[html_file] = {
+            'html': html_fingerprint,
+            'options': options_fingerprint,
+            'stages': stages,
+            'saved_images': saved_images,
+            'download_summary': download_summary,
+            'kit_data': kit_data,
+        }
+        save_state(state)
+    run_log.write()
+    
+    print(f"{data_file} - Complete scraped data")
+    print(f"{code_file} - Ready-to-use TypeScript code")
+    if catalog_file:
+        print(f"{catalog_file} - Product history (python catalog.py --help)")
     
-    print(f"extracted_product_data.json - Complete scraped data")
-    print(f"kit_code.ts - Ready-to-use TypeScript code")
+    if component_file:
+        print(f"{component_file} - kit {kit_data['id']} " + ("upserted" if component_changed else "already up to date"))
     
     print(f"\nNEXT STEPS:")
-    print(f"1. Copy the code from kit_code.ts")
-    print(f"2. Add it to the kits array in price-anchoring.tsx")
-    print(f"3. Images are saved in public/{clean_filename(product_info['name'])}/")
-    print(f"4. Update your component to use the new kit!")
+    if component_file:
+        print(f"1. The kit is in the kits array of {component_file}")
+    else:
+        print(f"1. Copy the code from {code_file}")
+        print(f"   (or rerun with --update-component to upsert it into price-anchoring.tsx)")
+    print(f"2. Images are saved in public/{clean_filename(product_info['name'])}/")
+    print(f"3. Update your component to use the new kit!")
     
     return kit_data
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="WWE product scraper")
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB', help="scrape every HTML file in a directory or glob")
+    parser.add_argument('--workers', type=int, default=None, help="parser processes for batch mode")
+    parser.add_argument('--no-images', action='store_true', help="skip image downloads in batch mode")
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=None,
+                        help="HTML parser backend (default: fastest installed)")
+    parser.add_argument('--no-cache', action='store_true', help="download every image in full, bypassing the image cache")
+    parser.add_argument('--image-width', type=int, default=TARGET_IMAGE_WIDTH,
+                        help="preferred width when a page offers several sizes of one image")
+    parser.add_argument('--no-variants', action='store_true',
+                        help="skip generating resized WebP/AVIF variants of downloaded images")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip the run, or individual stages, when their inputs are unchanged")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="keep near-duplicate and undersized images instead of dropping them")
+    parser.add_argument('--no-catalog', action='store_true', help="do not append results to the catalog database")
+    parser.add_argument('--no-manifest', action='store_true',
+                        help="do not publish content-hashed images to the asset manifest")
+    parser.add_argument('--update-component', nargs='?', const=COMPONENT_FILE, default=None, metavar='TSX',
+                        help=f"upsert the generated kits by id into the kits array (default: {COMPONENT_FILE})")
+    parser.add_argument('--url', help="page URL the HTML was saved from, used to resolve relative image URLs")
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help="write stage metrics: Prometheus text for *.prom, otherwise appended JSON lines")
+    parser.add_argument('--profile', metavar='PATH', help="dump cProfile stats for the whole run to PATH")
+    args = parser.parse_args()
+    catalog_file = None if args.no_catalog else CATALOG_FILE
+    
+    with profiled(args.profile):
+        if args.batch:
+            batch_main(args.batch, workers=args.workers, download=not args.no_images, parser=args.parser,
+                       use_cache=not args.no_cache, target_width=args.image_width, variants=not args.no_variants,
+                       catalog_file=catalog_file, dedup=not args.no_dedup, component_file=args.update_component,
+                       manifest=not args.no_manifest)
+        else:
+            main(parser=args.parser, use_cache=not args.no_cache, target_width=args.image_width,
+                 incremental=args.incremental, variants=not args.no_variants, catalog_file=catalog_file,
+                 dedup=not args.no_dedup, component_file=args.update_component, manifest=not args.no_manifest,
+                 url=args.url)
+    
+    METRICS.report()
+    if args.metrics_file:
+        METRICS.write(args.metrics_file, mode='batch' if args.batch else 'single')
+        print(f"Metrics written to {args.metrics_file}") 
\ No newline at end of file
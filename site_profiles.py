@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Site profiles - registry of per-storefront extraction profiles and the cheap
+head-of-document sniff that picks one for a page
+"""
+
+import argparse
+import re
+from urllib.parse import urlsplit
+
+from extractor import DEFAULT_PROFILE, FIELD_RULES, SiteProfile
+
+# Only the start of the page is sniffed; og:url and the canonical link sit in <head>
+SNIFF_CHARS = 16 * 1024
+
+# Fanatics-run storefronts (NFL Shop, MLB Shop, ...) share one PDP template
+FANATICS_RULES = {
+    'name': [
+        ('h1[data-talos="labelPdpProductTitle"]', 'text'),
+        ('.product-title-container h1', 'text'),
+        ('meta[property="og:title"]', 'content'),
+        ('title', 'text'),
+    ],
+    'price': [
+        ('[data-talos="pdpProductPrice"] .lowest .money-value', 'price'),
+        ('[data-talos="pdpProductPrice"] .money-value', 'price'),
+    ],
+    'original_price': [
+        ('[data-talos="pdpProductPrice"] .regular-price .money-value', 'price'),
+        ('[data-talos="pdpProductPrice"] .strike-through .money-value', 'price'),
+    ],
+    'description': [
+        ('.product-description-container .description-box-content', 'text'),
+        ('meta[property="og:description"]', 'content'),
+    ],
+}
+
+FANATICS_PROFILE = SiteProfile(
+    'fanatics', FANATICS_RULES, 'https://www.fanatics.com',
+    domains=('fanatics.com', 'fanatics.co.uk', 'fansedge.com', 'nflshop.com', 'mlbshop.com', 'nhlshop.com'),
+    signatures=('data-talos=', 'images.footballfanatics.com', 'fanatics.frgimages.com'),
+    price_markers=('pdp-price', 'data-talos="pdpProductPrice"'),
+    img_skip=('thumb', 'icon', 'logo', 'sprite', 'favicon', 'badge', 'payment'),
+)
+
+# Unknown storefronts get the full generic rule list; relative URLs resolve
+# against the page's own URL or origin, and are dropped when neither is known
+GENERIC_PROFILE = SiteProfile('generic', FIELD_RULES)
+
+# Checked in order: a domain or signature claimed by an earlier profile wins
+PROFILES = [DEFAULT_PROFILE, FANATICS_PROFILE]
+
+ORIGIN_MARKERS = ('og:url', 'canonical')
+ORIGIN_URL_RE = re.compile(r'''(?:content|href)\s*=\s*["'](https?://[^/"'?#]+)''', re.IGNORECASE)
+
+def compile_dispatch(profiles):
+    """Build the domain-suffix pattern and signature table for a list of profiles"""
+    domains = {}
+    signatures = {}
+    for profile in profiles:
+        for domain in profile.domains:
+            domains.setdefault(domain.lower(), profile)
+        for signature in profile.signatures:
+            signatures.setdefault(signature, profile)
+    domain_re = re.compile(r'(?:^|\.)(' + '|'.join(re.escape(domain) for domain in
+                                                 sorted(domains, key=len, reverse=True)) + r')$')
+    return domains, domain_re, signatures
+
+_DOMAINS, _DOMAIN_RE, _SIGNATURES = compile_dispatch(PROFILES)
+
+def page_origin(head):
+    """Return scheme://host from the page's og:url or canonical link, or None"""
+    for marker in ORIGIN_MARKERS:
+        # Find the literal, then read only the tag around it
+        at = head.find(marker)
+        while at != -1:
+            start = head.rfind('<', 0, at)
+            end = head.find('>', at)
+            match = ORIGIN_URL_RE.search(head, start, end) if start != -1 and end != -1 else None
+            if match:
+                return match.group(1)
+            at = head.find(marker, at + 1)
+    return None
+
+def profile_for_host(host):
+    """Return the profile registered for a host name or any of its parent domains"""
+    match = _DOMAIN_RE.search((host or '').lower().split(':')[0])
+    return _DOMAINS[match.group(1)] if match else None
+
+def select_profile(html_content, url=None):
+    """Pick the extraction profile and base URL for a page
+
+    The page URL, when known, decides by domain and is itself the base, so
+    root- and path-relative links resolve as a browser would. Otherwise only
+    the head of the document is read: first the origin in og:url/canonical,
+    then the literal signatures of each profile. Pages nothing recognizes
+    get the generic profile. Returns (profile, base_url).
+    """
+    origin = None
+    if url:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+    head = html_content[:SNIFF_CHARS]
+    if not origin:
+        origin = page_origin(head)
+    base_url = url or origin
+    if origin:
+        profile = profile_for_host(urlsplit(origin).netloc)
+        if profile:
+            return profile, base_url
+    # A handful of str.find calls beat a regex alternation over the head
+    found = [(at, signature) for signature, at in
+             ((signature, head.find(signature)) for signature in _SIGNATURES) if at != -1]
+    if found:
+        profile = _SIGNATURES[min(found)[1]]
+        return profile, base_url or profile.base_url
+    return GENERIC_PROFILE, base_url
+
+def report():
+    """Print hit rates and dead selectors for every profile that extracted a page"""
+    for profile in PROFILES + [GENERIC_PROFILE]:
+        profile.report()
+
+def main():
+    from scraper import extract_product_info, find_html_files
+
+    parser = argparse.ArgumentParser(description="Show which site profile each saved page gets and its rule hit rates")
+    parser.add_argument('source', nargs='?', default='html.html', help="HTML file, directory or glob")
+    parser.add_argument('--profile', choices=[profile.name for profile in PROFILES + [GENERIC_PROFILE]],
+                        help="force this profile instead of sniffing")
+    parser.add_argument('--parser', default=None, help="parser backend")
+    args = parser.parse_args()
+
+    forced = {profile.name: profile for profile in PROFILES + [GENERIC_PROFILE]}.get(args.profile)
+    for html_file in find_html_files(args.source):
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        profile, base_url = select_profile(html_content)
+        product_info = extract_product_info(html_content, parser=args.parser, structured=False, profile=forced)
+        print(f"{(forced or profile).name:10} {base_url or '-':30} {html_file}: {product_info['name']!r} "
+              f"${product_info['price']}")
+    report()
+
+if __name__ == "__main__":
+    main()
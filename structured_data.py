@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured data extractor - reads JSON-LD Product/Offer blocks and embedded
+app-state JSON straight out of the raw HTML, without building a DOM
+"""
+
+import json
+
+FANATICS_IMAGE_BASE = 'https://images.footballfanatics.com/'
+
+JSON_LD_MARKER = 'application/ld+json'
+
+# Assignment prefixes of embedded app-state JSON blobs
+APP_STATE_MARKERS = (
+    'var __platform_data__=',
+    'window.__INITIAL_STATE__=',
+    'window.__PRELOADED_STATE__=',
+    '<script id="__NEXT_DATA__" type="application/json">',
+)
+
+_decoder = json.JSONDecoder()
+
+def find_json_ld(html_content):
+    """Yield every parsed JSON-LD block in the page"""
+    start = 0
+    while True:
+        marker = html_content.find(JSON_LD_MARKER, start)
+        if marker == -1:
+            return
+        open_end = html_content.find('>', marker)
+        close = html_content.find('</script>', open_end)
+        if open_end == -1 or close == -1:
+            return
+        start = close
+        try:
+            yield json.loads(html_content[open_end + 1:close])
+        except ValueError:
+            continue
+
+def find_app_state(html_content):
+    """Yield every embedded app-state JSON object found after a known marker"""
+    for marker in APP_STATE_MARKERS:
+        position = html_content.find(marker)
+        if position == -1:
+            continue
+        brace = html_content.find('{', position + len(marker))
+        if brace == -1:
+            continue
+        try:
+            state, _ = _decoder.raw_decode(html_content, brace)
+        except ValueError:
+            continue
+        yield state
+
+def iter_products(data):
+    """Yield schema.org Product objects from a JSON-LD document, including @graph entries"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_products(item)
+    elif isinstance(data, dict):
+        types = data.get('@type')
+        types = types if isinstance(types, list) else [types]
+        if 'Product' in types:
+            yield data
+        if '@graph' in data:
+            yield from iter_products(data['@graph'])
+
+def to_price(value):
+    """Convert a JSON price value ('24.99', 24.99, '$1,024.99') to a float, or None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace('$', '').replace('€', '').replace(',', '').strip())
+        except ValueError:
+            return None
+    return None
+
+def offer_price(offers):
+    """Return the first price found in a Product's offers"""
+    offers = offers if isinstance(offers, list) else [offers]
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        for candidate in (offer.get('price'), offer.get('lowPrice'),
+                          (offer.get('priceSpecification') or {}).get('price')):
+            price = to_price(candidate)
+            if price is not None:
+                return price
+    return None
+
+def product_from_json_ld(product):
+    """Map a schema.org Product onto product_info fields"""
+    fields = {}
+    # Fields given as objects or lists are left for the DOM to fill
+    if isinstance(product.get('name'), str) and product['name'].strip():
+        fields['name'] = product['name'].strip()
+    if isinstance(product.get('description'), str) and product['description'].strip():
+        fields['description'] = product['description'].strip()
+    brand = product.get('brand')
+    if isinstance(brand, dict):
+        brand = brand.get('name')
+    if isinstance(brand, str) and brand:
+        fields['brand'] = brand
+    if isinstance(product.get('category'), str) and product['category']:
+        fields['category'] = product['category']
+    price = offer_price(product.get('offers') or [])
+    if price is not None:
+        fields['price'] = price
+
+    images = product.get('image') or []
+    images = images if isinstance(images, list) else [images]
+    images = [img['url'] if isinstance(img, dict) else img for img in images
+              if isinstance(img, str) or (isinstance(img, dict) and 'url' in img)]
+    if images:
+        fields['images'] = images
+    return fields
+
+def product_from_platform_data(state):
+    """Map Fanatics' __platform_data__ PDP state onto product_info fields"""
+    pdp = (state.get('pdp-data') or {}).get('pdp')
+    if not isinstance(pdp, dict):
+        return {}
+    fields = {}
+    if pdp.get('title'):
+        fields['name'] = pdp['title'].strip()
+    if pdp.get('description'):
+        fields['description'] = pdp['description'].strip()
+    if isinstance(pdp.get('details'), list):
+        fields['details'] = [detail for detail in pdp['details'] if isinstance(detail, str)]
+    if (pdp.get('brandResource') or {}).get('value'):
+        fields['brand'] = pdp['brandResource']['value']
+    categories = [c.get('categoryName') for c in pdp.get('categories') or [] if c.get('categoryName')]
+    if categories:
+        fields['category'] = ' > '.join(categories)
+
+    prices = pdp.get('price') or {}
+    sale = to_price(((prices.get('sale') or {}).get('money') or {}).get('userCurrencyValue'))
+    regular = to_price(((prices.get('regular') or {}).get('money') or {}).get('userCurrencyValue'))
+    if sale is not None or regular is not None:
+        fields['price'] = sale if sale is not None else regular
+        fields['original_price'] = regular if regular is not None else sale
+
+    media = [item['url'] for item in pdp.get('media') or [] if isinstance(item, dict) and item.get('url')]
+    if media:
+        fields['images'] = [url if url.startswith(('http:', 'https:', '//')) else FANATICS_IMAGE_BASE + url
+                            for url in media]
+    return fields
+
+def extract_structured_data(html_content):
+    """Collect product fields from JSON-LD and embedded app state
+
+    JSON-LD fills fields first; app state adds what JSON-LD lacks and
+    supplies sale/regular prices, which JSON-LD offers do not distinguish.
+    """
+    fields = {}
+    for document in find_json_ld(html_content):
+        for product in iter_products(document):
+            for key, value in product_from_json_ld(product).items():
+                fields.setdefault(key, value)
+
+    for state in find_app_state(html_content):
+        if not isinstance(state, dict):
+            continue
+        app_fields = product_from_platform_data(state)
+        for key, value in app_fields.items():
+            if key in ('price', 'original_price'):
+                fields[key] = value
+            else:
+                fields.setdefault(key, value)
+    return fields
+
+def is_complete(fields):
+    """True when structured data alone is enough to skip the DOM parse"""
+    return bool(fields.get('name') and fields.get('price') and fields.get('images'))
@@ -0,0 +1,86 @@
+import os
+
+from PIL import Image
+
+from asset_manifest import AssetManifest, asset_slug, source_path
+from image_variants import process_image, srcset_entries
+from records import ProductInfo, SavedImage
+from scraper import generate_kit_data
+
+NAME = 'Loungefly John Cena Farewell Tour 2025 Mini Backpack'
+
+def saved_product(public_dir, variants=True):
+    folder = os.path.join(public_dir, 'Loungefly-Mini-Backpa')
+    os.makedirs(folder)
+    local_path = os.path.join(folder, 'Loungefly-Mini-Backpa-01.jpg')
+    Image.linear_gradient('L').convert('RGB').resize((800, 600)).save(local_path, 'JPEG')
+    image = SavedImage(original_url='https://cdn.example.com/a.jpg', local_path=local_path,
+                       public_path='/Loungefly-Mini-Backpa/Loungefly-Mini-Backpa-01.jpg',
+                       filename='Loungefly-Mini-Backpa-01.jpg')
+    if variants:
+        result = process_image(local_path, image['public_path'], widths=(320, 640), formats=('webp',))
+        image['width'], image['height'], image['bytes'] = result['width'], result['height'], result['bytes']
+        image['variants'] = result['variants']
+        image['srcset'] = srcset_entries(result['variants'])
+    return image
+
+def test_asset_slug_cuts_at_word_boundary():
+    assert asset_slug(NAME, 40) == 'loungefly-john-cena-farewell-tour-2025'
+
+def test_kit_uses_hashed_paths(tmp_path):
+    public_dir = str(tmp_path / 'public')
+    image = saved_product(public_dir)
+    manifest = AssetManifest(str(tmp_path / 'asset_manifest.json'), public_dir)
+    manifest.add_products([(NAME, [image])])
+    manifest.save()
+
+    entry = manifest.images[image['public_path']]
+    assert entry['width'] == 800 and entry['height'] == 600
+    assert entry['placeholder'].startswith('data:image/')
+    assert entry['src'].startswith('/assets/loungefly-mini-backpa-')
+    assert os.path.exists(source_path(entry['src'], public_dir))
+
+    product_info = ProductInfo(name=NAME, price=50.0, original_price=60.0, description='', brand='',
+                               category='', images=['https://cdn.example.com/a.jpg'], details=[])
+    kit = generate_kit_data(product_info, [image], 'kit', 'John Cena', 50.0, 60.0)
+    assert kit['images'] == [image['asset']['src']]
+    assert kit['images'][0].startswith('/assets/') and kit['images'][0].endswith('.webp')
+    for entries in kit['srcSets'][0].values():
+        for candidate in entries.split(', '):
+            path = candidate.split(' ')[0]
+            assert path.startswith('/assets/')
+            assert os.path.exists(source_path(path, public_dir))
+
+def test_rerun_publishes_nothing_new(tmp_path):
+    public_dir = str(tmp_path / 'public')
+    image = saved_product(public_dir, variants=False)
+    manifest_file = str(tmp_path / 'asset_manifest.json')
+    first = AssetManifest(manifest_file, public_dir)
+    first.add_products([(NAME, [image])])
+    first.save()
+    second = AssetManifest(manifest_file, public_dir)
+    second.add_products([(NAME, [image])])
+    assert second.published == 0 and second.decoded == 0
+    assert second.images == first.images
+
+def test_build_from_public_tree_reproduces_kit_paths(tmp_path):
+    public_dir = str(tmp_path / 'public')
+    image = saved_product(public_dir)
+    scraped = AssetManifest(str(tmp_path / 'scraped.json'), public_dir)
+    scraped.add_products([(NAME, [image])])
+    scraped.save()
+    with open(tmp_path / 'scraped.json', 'rb') as f:
+        first = f.read()
+    scraped.save()
+    with open(tmp_path / 'scraped.json', 'rb') as f:
+        assert f.read() == first
+
+    # The build only has public/: no data files, no earlier manifest
+    built = AssetManifest(str(tmp_path / 'built.json'), public_dir)
+    built.add_tree()
+    built_entry = built.images[image['public_path']]
+    scraped_entry = dict(scraped.images[image['public_path']])
+    assert scraped_entry.pop('product') == NAME
+    assert built_entry == scraped_entry
+    assert built_entry['fallback'] == image['asset']['src']
+    assert built_entry['srcset'] == image['asset']['srcset']
@@ -0,0 +1,38 @@
+import threading
+
+from auto_scraper import HTMLFileHandler, ScraperWorker, watch_root, watch_roots
+
+def test_watch_root_of_a_glob_in_a_subdirectory():
+    assert watch_root('html.html') == ('.', False)
+    assert watch_root('data/*.html') == ('data', False)
+    assert watch_root('data/**/*.html') == ('data', True)
+    assert watch_root('*/page.html') == ('.', True)
+
+def test_watch_roots_skip_directories_under_a_recursive_watch():
+    assert watch_roots(['data/*.html', 'data/**/*.html', 'data/sub/page.html', 'html.html']) == {
+        'data': True, '.': False}
+
+def test_double_star_also_matches_the_top_directory():
+    handler = HTMLFileHandler(None, patterns=('data/**/*.html',))
+    assert handler.matches('data/page.html')
+    assert handler.matches('data/tees/page.html')
+    assert not handler.matches('other/page.html')
+
+def test_stop_does_not_block_on_a_full_queue():
+    worker = ScraperWorker(max_queued=1)
+    started = threading.Event()
+
+    def slow_run(path, generation, first_event, last_event):
+        started.set()
+        worker.stopping.wait(5)
+
+    worker.run_scraper = slow_run
+    worker.submit('a.html', 0, 0)
+    assert started.wait(5)
+    worker.submit('b.html', 0, 0)
+    assert worker.queue.full()
+
+    stopper = threading.Thread(target=worker.stop)
+    stopper.start()
+    stopper.join(5)
+    assert not stopper.is_alive()
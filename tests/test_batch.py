@@ -0,0 +1,32 @@
+import json
+
+from scraper import batch_main, find_html_files
+
+PAGE = '''<html><body><h1 class="product-title">{name}</h1>
+<img src="https://cdn.example.com/{slug}.jpg"></body></html>'''
+
+def write_pages(tmp_path):
+    (tmp_path / 'b.html').write_text(PAGE.format(name='Cody Rhodes Tee', slug='b'), encoding='utf-8')
+    (tmp_path / 'a.htm').write_text(PAGE.format(name='Cody Rhodes Tee', slug='a'), encoding='utf-8')
+    (tmp_path / 'broken.html').write_bytes(b'\xff\xfe not utf-8 \xff')
+    (tmp_path / 'notes.txt').write_text('not a page', encoding='utf-8')
+
+def test_find_html_files_takes_a_directory_or_a_glob(tmp_path):
+    write_pages(tmp_path)
+    (tmp_path / 'folder.html').mkdir()
+    assert [path.split('/')[-1] for path in find_html_files(str(tmp_path))] == ['a.htm', 'b.html', 'broken.html']
+    assert [path.split('/')[-1] for path in find_html_files(str(tmp_path / 'b*'))] == ['b.html', 'broken.html']
+
+def test_batch_keys_duplicate_names_apart_and_reports_failures(tmp_path):
+    write_pages(tmp_path)
+    data_file, code_file = tmp_path / 'data.json', tmp_path / 'kits.ts'
+    products = batch_main(str(tmp_path), workers=1, download=False, variants=False, manifest=False,
+                          data_file=str(data_file), code_file=str(code_file), catalog_file=None)
+    assert list(products) == ['Cody-Rhodes-Tee', 'Cody-Rhodes-Tee-2']
+
+    data = json.loads(data_file.read_text(encoding='utf-8'))
+    failed = [entry for entry in data['report'] if entry['error']]
+    assert [entry['source'].split('/')[-1] for entry in failed] == ['broken.html']
+    assert failed[0]['error'].startswith('UnicodeDecodeError')
+    kits = code_file.read_text(encoding='utf-8')
+    assert 'id: "cody-rhodes"' in kits and 'id: "cody-rhodes-2"' in kits
@@ -0,0 +1,24 @@
+import json
+
+from benchmark import compare_results
+
+def write_suite(path, pages):
+    path.write_text(json.dumps({'pages': pages}), encoding='utf-8')
+    return str(path)
+
+def test_regressions_respect_each_metric_direction(tmp_path):
+    base = write_suite(tmp_path / 'base.json', {
+        'html.html': {'parse_ms': 10.0, 'images_per_second': 100.0, 'download_bytes': 1000, 'main_seconds': 0.5},
+    })
+    new = write_suite(tmp_path / 'new.json', {
+        'html.html': {'parse_ms': 11.5, 'images_per_second': 85.0, 'download_bytes': 800, 'main_seconds': 0.54},
+        'other.html': {'parse_ms': 99.0},
+    })
+    regressions = compare_results(base, new, threshold=0.10)
+    assert [(item['page'], item['metric']) for item in regressions] == [('html.html', 'parse_ms'),
+                                                                        ('html.html', 'images_per_second')]
+    assert regressions[0]['change'] == 0.15
+
+def test_identical_runs_have_no_regressions(tmp_path):
+    pages = {'html.html': {'parse_ms': 10.0, 'images_per_second': 100.0, 'main_peak_kb': 0}}
+    assert compare_results(write_suite(tmp_path / 'a.json', pages), write_suite(tmp_path / 'b.json', pages)) == []
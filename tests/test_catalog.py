@@ -0,0 +1,58 @@
+import pytest
+
+from catalog import Catalog
+
+def scrape(product_id, wrestler, price, scraped_at, original_price=99.99):
+    return {
+        'product_id': product_id,
+        'product_info': {'name': product_id.replace('-', ' ').title(), 'price': price,
+                         'original_price': original_price},
+        'saved_images': [],
+        'kit_data': {'id': product_id, 'wrestler': wrestler, 'price': price, 'originalPrice': original_price},
+        'scraped_at': scraped_at,
+    }
+
+@pytest.fixture
+def catalog(tmp_path):
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        yield catalog
+
+def test_price_changes_skip_unchanged_snapshots(catalog):
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-01 10:00:00'),
+                          scrape('cena-hat', 'John Cena', 24.99, '2026-01-01 10:00:00')])
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-02 10:00:00'),
+                          scrape('cena-hat', 'John Cena', 19.99, '2026-01-02 10:00:00')])
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 29.99, '2026-01-03 10:00:00')])
+
+    changes = catalog.price_changes()
+    assert [(change['product_id'], change['previous_price'], change['price']) for change in changes] == [
+        ('cena-hat', 24.99, 19.99), ('cody-tee', 34.99, 29.99)]
+    assert [change['product_id'] for change in catalog.price_changes(since='2026-01-03')] == ['cody-tee']
+
+def test_original_price_change_counts_as_a_change(catalog):
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-01 10:00:00')])
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-02 10:00:00', original_price=89.99)])
+    [change] = catalog.price_changes()
+    assert (change['previous_original_price'], change['original_price']) == (99.99, 89.99)
+
+def test_add_price_snapshot_extends_the_history(catalog):
+    assert not catalog.add_price_snapshot('cody-tee', 29.99, 99.99)
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-01 10:00:00')])
+    assert catalog.add_price_snapshot('cody-tee', 29.99, 99.99, scraped_at='2026-01-05 10:00:00')
+
+    assert [snapshot['price'] for snapshot in catalog.price_history('cody-tee')] == [34.99, 29.99]
+    assert catalog.products()[0]['last_seen'] == '2026-01-05 10:00:00'
+    [change] = catalog.price_changes()
+    assert (change['previous_price'], change['price']) == (34.99, 29.99)
+
+def test_kits_for_wrestler_returns_the_latest_kit_per_product(catalog):
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 34.99, '2026-01-01 10:00:00'),
+                          scrape('cody-belt', 'Cody Rhodes', 449.99, '2026-01-01 10:00:00'),
+                          scrape('cena-hat', 'John Cena', 24.99, '2026-01-01 10:00:00')])
+    catalog.add_products([scrape('cody-tee', 'Cody Rhodes', 29.99, '2026-01-02 10:00:00')])
+
+    kits = catalog.kits_for_wrestler('cody rhodes')
+    assert [(kit['id'], kit['price']) for kit in kits] == [('cody-tee', 29.99), ('cody-belt', 449.99)]
+    assert kits[0]['scraped_at'] == '2026-01-02 10:00:00'
+    assert len(catalog.kits_for_wrestler('Cody Rhodes', latest_only=False)) == 3
+    assert catalog.kits_for_wrestler('The Rock') == []
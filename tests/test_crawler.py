@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import crawler
+from benchmark import fake_image_server
+
+PRODUCT_PAGE = '''<html><head><script type="application/ld+json">
+{"@type": "Product", "name": "Cody Rhodes Tee", "offers": {"price": "24.99"},
+ "image": "https://cdn.example.com/cody-rhodes-tee.jpg"}
+</script></head><body></body></html>'''
+
+LISTING_PAGE = '<a href="/tees/p-1">Tee</a> <a href="/tees/p-2">Tee</a> <a href="/tees/p-1">Tee again</a>'
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Product pages, a listing, a 404 and a page that fails twice before it loads"""
+
+    hits = Counter()
+    times = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            self.times.append(time.monotonic())
+            hits = self.hits[self.path]
+        if self.path.startswith('/missing'):
+            self.reply(404, 'not found')
+        elif self.path == '/flaky/p-9' and hits <= 2:
+            self.reply(503, 'busy', {'Retry-After': '0'})
+        elif self.path == '/listing':
+            self.reply(200, LISTING_PAGE)
+        else:
+            self.reply(200, PRODUCT_PAGE)
+
+    def reply(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    StubHandler.hits.clear()
+    StubHandler.times.clear()
+    with fake_image_server(StubHandler) as base_url:
+        yield base_url
+
+def crawl(urls, listings=(), **options):
+    return asyncio.run(crawler.Crawler(**options).run(urls, listings))
+
+def test_retries_transient_errors(server):
+    [(url, product_info, seconds, error)] = crawl([f"{server}/flaky/p-9"], rate=100, burst=10)
+    assert error is None
+    assert product_info['name'] == 'Cody Rhodes Tee'
+    assert StubHandler.hits['/flaky/p-9'] == 3
+
+def test_404_product_is_a_failure_without_retries(server):
+    [(url, product_info, seconds, error)] = crawl([f"{server}/missing/p-1"], rate=100, burst=10)
+    assert product_info is None
+    assert 'HTTP 404' in error
+    assert StubHandler.hits['/missing/p-1'] == 1
+
+def test_failed_listing_does_not_stop_the_crawl(server):
+    results = crawl([], [f"{server}/missing", f"{server}/listing"], rate=100, burst=10)
+    by_url = {url: (product_info, error) for url, product_info, seconds, error in results}
+    assert 'HTTP 404' in by_url[f"{server}/missing"][1]
+    assert by_url[f"{server}/tees/p-1"][0]['name'] == 'Cody Rhodes Tee'
+    assert by_url[f"{server}/tees/p-2"][1] is None
+    assert len(results) == 3
+
+def test_crawl_main_reports_failed_listing(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = crawler.crawl_main([], [f"{server}/missing"], rate=100, download=False, variants=False)
+    assert products == {}
+
+def test_rate_limit_spaces_requests_per_host(server):
+    rate, burst, pages = 10.0, 1, 5
+    results = crawl([f"{server}/tees/p-{n}" for n in range(pages)], rate=rate, burst=burst)
+    assert all(error is None for url, product_info, seconds, error in results)
+    # After the burst, each request waits for a token: (pages - burst) / rate seconds at least
+    assert StubHandler.times[-1] - StubHandler.times[0] >= (pages - burst) / rate * 0.9
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from benchmark import FakeImageHandler, fake_image_bytes, fake_image_server
+from image_cache import ImageCache
+from scraper import download_image, get_session
+
+class RecordingHandler(FakeImageHandler):
+    """FakeImageHandler that records whether each request was conditional"""
+
+    conditional = []
+
+    def do_GET(self):
+        self.conditional.append('If-None-Match' in self.headers)
+        super().do_GET()
+
+class AlwaysNotModifiedHandler(FakeImageHandler):
+    """A broken server that answers 304 even to unconditional requests"""
+
+    def do_GET(self):
+        self.send_response(304)
+        self.end_headers()
+
+class NotFoundHandler(FakeImageHandler):
+    def do_GET(self):
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+class ClosingSpy:
+    """Session wrapper recording whether every response it handed out was closed"""
+
+    def __init__(self):
+        self.session = get_session()
+        self.closed = []
+
+    def get(self, *args, **kwargs):
+        response = self.session.get(*args, **kwargs)
+        index = len(self.closed)
+        self.closed.append(False)
+        close = response.close
+
+        def record_close():
+            self.closed[index] = True
+            close()
+        response.close = record_close
+        return response
+
+@pytest.fixture
+def server():
+    RecordingHandler.conditional.clear()
+    with fake_image_server(RecordingHandler) as base_url:
+        yield base_url
+
+def test_not_modified_is_served_from_cache(server, tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    url = f"{server}/tee-front.jpg"
+    assert download_image(url, str(tmp_path / 'a.jpg'), session=get_session(), cache=cache)
+    assert download_image(url, str(tmp_path / 'b.jpg'), session=get_session(), cache=cache)
+    assert RecordingHandler.conditional == [False, True]
+    assert cache.stats['hits'] == 1
+    with open(tmp_path / 'b.jpg', 'rb') as f:
+        assert f.read() == fake_image_bytes('/tee-front.jpg')
+
+def test_damaged_blob_on_304_refetches_in_full(server, tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    url = f"{server}/tee-front.jpg"
+    assert download_image(url, str(tmp_path / 'a.jpg'), session=get_session(), cache=cache)
+    blob = cache.blob_path(cache.lookup(url)['sha256'])
+    size = os.path.getsize(blob)
+    with open(blob, 'wb') as f:
+        f.write(b'\0' * size)
+
+    assert download_image(url, str(tmp_path / 'b.jpg'), session=get_session(), cache=cache)
+    # One conditional request answered 304, then one unconditional GET
+    assert RecordingHandler.conditional == [False, True, False]
+    with open(tmp_path / 'b.jpg', 'rb') as f:
+        assert f.read() == fake_image_bytes('/tee-front.jpg')
+    assert cache.restore(url, str(tmp_path / 'c.jpg'))
+
+def test_304_without_a_cached_copy_writes_nothing(tmp_path):
+    with fake_image_server(AlwaysNotModifiedHandler) as base_url:
+        cache = ImageCache(str(tmp_path / 'cache'))
+        filepath = str(tmp_path / 'a.jpg')
+        assert not download_image(f"{base_url}/tee-front.jpg", filepath, max_retries=1,
+                                  session=get_session(), cache=cache)
+    assert not os.path.exists(filepath)
+
+def test_responses_are_closed_on_304_and_errors(server, tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    url = f"{server}/tee-front.jpg"
+    spy = ClosingSpy()
+    assert download_image(url, str(tmp_path / 'a.jpg'), session=spy, cache=cache)
+    assert download_image(url, str(tmp_path / 'b.jpg'), session=spy, cache=cache)
+    with fake_image_server(NotFoundHandler) as base_url:
+        assert not download_image(f"{base_url}/gone.jpg", str(tmp_path / 'c.jpg'), max_retries=1, session=spy)
+    assert spy.closed == [True, True, True]
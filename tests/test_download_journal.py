@@ -0,0 +1,90 @@
+import hashlib
+import os
+
+from benchmark import FakeImageHandler, fake_image_bytes, fake_image_server
+from download_journal import DownloadJournal
+from scraper import download_image, get_session
+
+class RangeHandler(FakeImageHandler):
+    """FakeImageHandler that honours Range requests guarded by a matching If-Range"""
+
+    ranges = []
+
+    def do_GET(self):
+        body = fake_image_bytes(self.path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        requested = self.headers.get('Range')
+        self.ranges.append(requested)
+        if not requested or self.headers.get('If-Range') != etag:
+            return super().do_GET()
+        start = int(requested.split('=')[1].rstrip('-'))
+        self.send_response(206)
+        self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.send_header('Content-Length', str(len(body) - start))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+def test_journal_survives_a_restart(tmp_path):
+    journal_file = str(tmp_path / 'journal.json')
+    done, partial = str(tmp_path / 'a.jpg'), str(tmp_path / 'b.jpg')
+    with open(done, 'wb') as f:
+        f.write(b'x' * 10)
+    journal = DownloadJournal(journal_file)
+    assert not journal.resumed
+    journal.mark_complete(done, 'https://cdn.example.com/a.jpg', 10)
+    journal.mark_partial(partial, 'https://cdn.example.com/b.jpg', etag='"b"', total=100)
+
+    resumed = DownloadJournal(journal_file)
+    assert resumed.resumed
+    assert resumed.is_complete(done, 'https://cdn.example.com/a.jpg')
+    assert not resumed.is_complete(done, 'https://cdn.example.com/other.jpg')
+    assert resumed.resumable(partial, 'https://cdn.example.com/b.jpg')['etag'] == '"b"'
+    assert resumed.resumable(done, 'https://cdn.example.com/a.jpg') is None
+
+    # A file changed on disk since the journal saw it is no longer complete
+    with open(done, 'wb') as f:
+        f.write(b'x' * 5)
+    assert not resumed.is_complete(done, 'https://cdn.example.com/a.jpg')
+
+def test_finish_keeps_the_journal_only_while_work_is_outstanding(tmp_path):
+    journal_file = str(tmp_path / 'journal.json')
+    journal = DownloadJournal(journal_file)
+    journal.mark_complete('a.jpg', 'https://cdn.example.com/a.jpg', 10)
+    journal.mark_failed('b.jpg', 'https://cdn.example.com/b.jpg', 'timeout')
+    assert journal.finish() == {'complete': 1, 'dropped': 0, 'partial': 0, 'failed': 1}
+    assert os.path.exists(journal_file)
+
+    journal.mark_complete('b.jpg', 'https://cdn.example.com/b.jpg', 10)
+    assert journal.finish()['failed'] == 0
+    assert not os.path.exists(journal_file)
+
+def test_partial_download_resumes_with_a_range_request(tmp_path):
+    RangeHandler.ranges.clear()
+    body = fake_image_bytes('/tee-front.jpg')
+    filepath = str(tmp_path / 'tee.jpg')
+    with open(f"{filepath}.part", 'wb') as f:
+        f.write(body[:1000])
+    with fake_image_server(RangeHandler) as base_url:
+        url = f"{base_url}/tee-front.jpg"
+        journal = DownloadJournal(str(tmp_path / 'journal.json'))
+        journal.mark_partial(filepath, url, etag=f'"{hashlib.md5(body).hexdigest()}"', total=len(body))
+        assert download_image(url, filepath, session=get_session(), journal=journal)
+    assert RangeHandler.ranges == ['bytes=1000-']
+    with open(filepath, 'rb') as f:
+        assert f.read() == body
+    assert journal.is_complete(filepath, url)
+    assert not os.path.exists(f"{filepath}.part")
+
+def test_changed_image_is_fetched_from_the_start(tmp_path):
+    body = fake_image_bytes('/tee-front.jpg')
+    filepath = str(tmp_path / 'tee.jpg')
+    with open(f"{filepath}.part", 'wb') as f:
+        f.write(b'stale bytes of an older image')
+    with fake_image_server(RangeHandler) as base_url:
+        url = f"{base_url}/tee-front.jpg"
+        journal = DownloadJournal(str(tmp_path / 'journal.json'))
+        journal.mark_partial(filepath, url, etag='"older"')
+        assert download_image(url, filepath, session=get_session(), journal=journal)
+    with open(filepath, 'rb') as f:
+        assert f.read() == body
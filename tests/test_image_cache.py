@@ -0,0 +1,49 @@
+import os
+
+from image_cache import ImageCache
+
+def downloaded(tmp_path, name, content):
+    path = tmp_path / f"{name}.part"
+    path.write_bytes(content)
+    return str(path)
+
+def test_same_bytes_from_two_urls_share_one_blob(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Jan 2026 10:00:00 GMT'}
+    a = cache.store('https://cdn.example.com/a.jpg', downloaded(tmp_path, 'a', b'jpeg' * 100), headers,
+                    str(tmp_path / 'out' / 'a.jpg'))
+    b = cache.store('https://cdn.example.com/b.jpg', downloaded(tmp_path, 'b', b'jpeg' * 100), {},
+                    str(tmp_path / 'out' / 'b.jpg'))
+    assert a['sha256'] == b['sha256']
+    assert cache.stats['deduplicated'] == 1
+    assert len(os.listdir(os.path.dirname(cache.blob_path(a['sha256'])))) == 1
+    assert (tmp_path / 'out' / 'b.jpg').read_bytes() == b'jpeg' * 100
+
+    assert cache.conditional_headers('https://cdn.example.com/a.jpg') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 05 Jan 2026 10:00:00 GMT'}
+    assert cache.conditional_headers('https://cdn.example.com/new.jpg') == {}
+
+def test_index_survives_a_restart_and_restores_files(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'))
+    cache.store('https://cdn.example.com/a.jpg', downloaded(tmp_path, 'a', b'a' * 50), {'ETag': '"a"'},
+                str(tmp_path / 'a.jpg'))
+    cache.save()
+
+    reopened = ImageCache(str(tmp_path / 'cache'))
+    assert reopened.restore('https://cdn.example.com/a.jpg', str(tmp_path / 'copy.jpg'))
+    assert (tmp_path / 'copy.jpg').read_bytes() == b'a' * 50
+    assert reopened.stats == dict(reopened.stats, hits=1, bytes_saved=50)
+    # An identical file already in place is not rewritten
+    assert reopened.restore('https://cdn.example.com/a.jpg', str(tmp_path / 'copy.jpg'))
+    assert reopened.stats['unchanged_files'] == 1
+
+def test_least_recently_used_blobs_are_evicted(tmp_path):
+    cache = ImageCache(str(tmp_path / 'cache'), max_bytes=250)
+    for n, name in enumerate(('old', 'mid', 'new')):
+        entry = cache.store(f"https://cdn.example.com/{name}.jpg", downloaded(tmp_path, name, bytes([n]) * 100),
+                            {}, str(tmp_path / f"{name}.jpg"))
+        entry['last_used'] = n
+    cache.save()
+    assert cache.stats['evicted'] == 1
+    assert cache.lookup('https://cdn.example.com/old.jpg') is None
+    assert cache.lookup('https://cdn.example.com/new.jpg')
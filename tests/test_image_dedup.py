@@ -0,0 +1,46 @@
+import os
+
+from PIL import Image
+
+from download_journal import DownloadJournal
+from image_dedup import HashIndex, filter_images
+
+def saved_image(path):
+    return {'local_path': str(path), 'filename': os.path.basename(path),
+            'original_url': f"https://cdn.example.com/{os.path.basename(path)}"}
+
+def test_undecodable_images_are_kept(tmp_path):
+    path = tmp_path / 'product-01.jxl'
+    path.write_bytes(b'\xff\x0a' + os.urandom(4096))
+    images = [saved_image(path)]
+    kept = filter_images(images, index=HashIndex(str(tmp_path / 'phash.json')))
+    assert kept == images
+    assert path.exists()
+
+def test_duplicates_and_undersized_images_are_dropped(tmp_path):
+    large, small, thumb = tmp_path / 'a-01.png', tmp_path / 'a-02.png', tmp_path / 'a-03.png'
+    picture = Image.linear_gradient('L').convert('RGB')
+    picture.resize((800, 800)).save(large)
+    picture.resize((400, 400)).save(small)
+    picture.resize((100, 100)).save(thumb)
+    images = [saved_image(small), saved_image(large), saved_image(thumb)]
+    kept = filter_images(images, index=HashIndex(str(tmp_path / 'phash.json')))
+    assert [img['filename'] for img in kept] == ['a-01.png']
+    assert large.exists() and not small.exists() and not thumb.exists()
+
+def test_dropped_files_are_marked_in_the_journal(tmp_path):
+    large, thumb = tmp_path / 'a-01.png', tmp_path / 'a-02.png'
+    picture = Image.linear_gradient('L').convert('RGB')
+    picture.resize((800, 800)).save(large)
+    picture.resize((100, 100)).save(thumb)
+    journal = DownloadJournal(str(tmp_path / 'journal.json'))
+    images = [saved_image(large), saved_image(thumb)]
+    for img in images:
+        journal.mark_complete(img['local_path'], img['original_url'], os.path.getsize(img['local_path']))
+    journal.mark_failed(str(tmp_path / 'a-03.png'), 'https://cdn.example.com/a-03.png', 'timeout')
+
+    filter_images(images, index=HashIndex(str(tmp_path / 'phash.json')), journal=journal)
+    resumed = DownloadJournal(str(tmp_path / 'journal.json'))
+    assert resumed.is_dropped(str(thumb), images[1]['original_url'])
+    assert resumed.is_complete(str(large), images[0]['original_url'])
+    assert resumed.finish() == {'complete': 1, 'dropped': 1, 'partial': 0, 'failed': 1}
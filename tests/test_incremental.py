@@ -0,0 +1,39 @@
+import json
+
+from incremental import RUN_LOG_FILE, stage_fingerprints
+from scraper import main
+
+PAGE = '<html><body><h1 class="product-title">Cody Rhodes Tee</h1><p class="price">$34.99</p></body></html>'
+
+def last_run():
+    with open(RUN_LOG_FILE, encoding='utf-8') as f:
+        return json.loads(f.readlines()[-1])
+
+def run(**options):
+    return main(incremental=True, catalog_file=None, html_file='page.html', data_file='data.json',
+                code_file='kit.ts', **options)
+
+def test_options_are_part_of_the_stage_fingerprints():
+    product_info = {'name': 'Tee', 'images': ['https://cdn.example.com/tee.jpg']}
+    base = stage_fingerprints(product_info, {'dedup': True, 'variants': True, 'manifest': True})
+    no_variants = stage_fingerprints(product_info, {'dedup': True, 'variants': False, 'manifest': True})
+    no_manifest = stage_fingerprints(product_info, {'dedup': True, 'variants': True, 'manifest': False})
+    assert {stage for stage in base if base[stage] != no_variants[stage]} == {'images'}
+    assert {stage for stage in base if base[stage] != no_manifest[stage]} == {'assets'}
+
+def test_changed_options_rerun_an_unchanged_page(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'page.html').write_text(PAGE, encoding='utf-8')
+    run()
+    run()
+    assert last_run()['stages']['parse']['action'] == 'skipped'
+
+    run(variants=False)
+    record = last_run()
+    assert record['stages']['parse']['action'] == 'ran'
+    assert record['changed'] == ['images']
+
+    run(variants=False, target_width=400)
+    assert last_run()['stages']['parse']['action'] == 'ran'
+    run(variants=False, target_width=400)
+    assert last_run()['stages']['parse']['action'] == 'skipped'
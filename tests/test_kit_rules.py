@@ -0,0 +1,61 @@
+import pytest
+
+from kit_rules import KitRules, load_rules
+
+RULES = {
+    'default': {'id': 'custom-kit', 'wrestler': 'WWE Superstar', 'price': 49.99,
+                'original_price': {'multiplier': 2, 'minimum': 99.99}, 'items': ['{product_name}', 'Badge']},
+    'wrestlers': [
+        {'id': 'cody-rhodes', 'name': 'Cody Rhodes', 'aliases': ['cody rhodes', 'american nightmare'],
+         'price': 39.99, 'original_price': 149.99},
+        {'id': 'the-rock', 'name': 'The Rock', 'aliases': ['the rock', 'dwayne johnson']},
+        {'id': 'stone-cold', 'name': 'Stone Cold Steve Austin', 'aliases': ['stone cold', 'austin 3 16']},
+    ],
+}
+
+def product(name, price=None, original_price=None):
+    return {'name': name, 'price': price, 'original_price': original_price}
+
+def test_aliases_match_any_spelling():
+    rules = KitRules(RULES)
+    assert rules.classify(product("American Nightmare™ Tee"))['id'] == 'cody-rhodes'
+    assert rules.classify(product("Austin 3:16 Skull T-Shirt"))['id'] == 'stone-cold'
+    assert rules.classify(product("DWAYNE-JOHNSON Brahma Bull Hat"))['wrestler'] == 'The Rock'
+    # Aliases match whole words only
+    assert rules.classify(product("Rockstar Energy Tee"))['id'] == 'custom-kit'
+
+def test_wrestler_prices_override_the_default():
+    kit = KitRules(RULES).classify(product("Cody Rhodes Tee", 34.99, 34.99))
+    assert (kit['price'], kit['original_price']) == (39.99, 149.99)
+    assert kit['items'] == ['Cody Rhodes Tee', 'Badge']
+
+@pytest.mark.parametrize('price, original_price, expected', [
+    (24.99, None, 99.99),  # the minimum wins over 2 x 24.99
+    (59.99, None, 119.98),  # 2 x the store price
+    (59.99, 79.99, 159.98),  # the store's own original price is the base
+    (None, None, 99.99),
+])
+def test_relative_original_price_uses_multiplier_and_minimum(price, original_price, expected):
+    kit = KitRules(RULES).classify(product("Roman Reigns Tee", price, original_price))
+    assert kit['id'] == 'custom-kit'
+    assert kit['original_price'] == expected
+
+def test_wrestler_without_prices_inherits_the_default_rule():
+    kit = KitRules(RULES).classify(product("The Rock Tee", 59.99))
+    assert (kit['id'], kit['price'], kit['original_price']) == ('the-rock', 49.99, 119.98)
+
+def test_shared_alias_is_rejected():
+    rules = dict(RULES, wrestlers=RULES['wrestlers'] + [{'id': 'rocky', 'name': 'Rocky', 'aliases': ['The Rock']}])
+    with pytest.raises(ValueError):
+        KitRules(rules)
+
+def test_unmatched_names_are_counted_once_per_classification():
+    rules = KitRules(RULES)
+    rules.classify(product("Mystery Tee"))
+    rules.classify(product("Mystery Tee"), record=False)
+    rules.classify(product("Cody Rhodes Tee"))
+    assert rules.unmatched == {'Mystery Tee': 1}
+    assert rules.matched == {'cody-rhodes': 1}
+
+def test_shipped_rules_load():
+    assert load_rules().classify(product("Cenation Hat"))['id'] == 'john-cena'
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from catalog import Catalog
+from listing_stream import HAS_LXML, iter_listing_products
+from scraper import stream_scraped_products
+from ts_emitter import format_kits_array
+
+PARSERS = ['html.parser'] + (['lxml'] if HAS_LXML else [])
+
+CARD = '''<li class="product-card">
+  <a href="/en/tees/p-{n}"><img src="/icons/heart.svg"><img data-src="//cdn.example.com/tee-{n}.jpg" alt="Alt {n}"></a>
+  <div class="product-card-title"><a href="/en/tees/p-{n}">Cody Rhodes Tee {n}</a></div>
+  <div class="price-row"><span class="money-value">$3{d}.99</span>
+    <span class="regular-price"><span class="money-value">$4{d}.99</span></span></div>
+</li>
+'''
+
+def listing_chunks(cards, size):
+    """Yield a synthetic listing page in size-character chunks, splitting tags and text"""
+    html = '<html><body><ul class="product-grid">\n'
+    html += ''.join(CARD.format(n=n, d=n % 10) for n in range(cards))
+    html += '<li class="promo"><span class="price">$1.00</span></li></ul></body></html>'
+    for start in range(0, len(html), size):
+        yield html[start:start + size]
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_chunked_listing_yields_every_card(parser):
+    products = list(iter_listing_products(listing_chunks(250, 37), 'https://shop.example.com', parser))
+    assert len(products) == 250
+    first = products[7]
+    assert first['name'] == 'Cody Rhodes Tee 7'
+    assert first['price'] == 37.99
+    assert first['original_price'] == 47.99
+    assert first['url'] == 'https://shop.example.com/en/tees/p-7'
+    assert list(first['images']) == ['https://cdn.example.com/tee-7.jpg']
+
+def test_lxml_and_html_parser_agree():
+    if not HAS_LXML:
+        pytest.skip("lxml not installed")
+    lxml_products = list(iter_listing_products(listing_chunks(100, 11), 'https://shop.example.com', 'lxml'))
+    python_products = list(iter_listing_products(listing_chunks(100, 11), 'https://shop.example.com', 'html.parser'))
+    assert [dict(product) for product in lxml_products] == [dict(product) for product in python_products]
+
+def test_streamed_products_are_flushed_as_json_lines(tmp_path):
+    products = iter_listing_products(listing_chunks(12, 64), 'https://shop.example.com', 'html.parser')
+    results = [(product['url'], product, 0.0, None) for product in products]
+    results.insert(3, ('broken.html', None, 0.0, 'ValueError: no product'))
+    data_file, code_file = tmp_path / 'listing.jsonl', tmp_path / 'kits.ts'
+
+    added, failed = stream_scraped_products(iter(results), download=False, data_file=str(data_file),
+                                            code_file=str(code_file), catalog_file=str(tmp_path / 'catalog.db'),
+                                            batch_size=5)
+    assert (added, failed) == (12, 1)
+    with open(data_file, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 13
+    assert lines[3] == {'source': 'broken.html', 'seconds': 0.0, 'error': 'ValueError: no product', 'product': None}
+    kits = [line['kit_data'] for line in lines if line['product']]
+    assert code_file.read_text(encoding='utf-8') == format_kits_array(kits)
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        assert len(catalog.products()) == 12
@@ -0,0 +1,31 @@
+from metrics import METRICS, Metrics
+from scraper import batch_main
+
+PAGE = '''<html><body><h1 class="product-title">Cody Rhodes Tee {n}</h1>
+<img src="https://cdn.example.com/tee-{n}.jpg"></body></html>'''
+
+def test_merge_adds_counts_and_keeps_the_largest_max():
+    metrics = Metrics()
+    metrics.observe('extract.dom', 0.5)
+    metrics.count('download.bytes', 10)
+    other = Metrics()
+    other.observe('extract.dom', 0.25)
+    other.observe('extract.dom', 0.75)
+    other.count('download.bytes', 5)
+    metrics.merge(other.snapshot())
+    snapshot = metrics.snapshot()
+    assert snapshot['timers']['extract.dom'] == {'count': 3, 'seconds': 1.5, 'max_seconds': 0.75}
+    assert snapshot['counters'] == {'download.bytes': 15}
+
+def test_batch_keeps_the_worker_extract_timers(tmp_path):
+    for n in range(3):
+        (tmp_path / f"page-{n}.html").write_text(PAGE.format(n=n), encoding='utf-8')
+    METRICS.reset()
+    products = batch_main(str(tmp_path), workers=2, download=False, variants=False, manifest=False,
+                          data_file=str(tmp_path / 'data.json'), code_file=str(tmp_path / 'kits.ts'),
+                          catalog_file=None)
+    assert len(products) == 3
+    timers = METRICS.snapshot()['timers']
+    assert timers['extract.dom']['count'] == 3
+    assert timers['extract.dedupe_variants']['count'] == 3
+    assert timers['parse.page']['count'] == 3
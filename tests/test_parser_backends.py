@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from benchmark import check_parity, legacy_scan_image_urls
+from extractor import PARSER_BACKENDS, scan_image_urls
+from scraper import extract_product_info
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entities, nested inline markup, valueless attributes and unquoted values are where parsers differ
+SMALL_PAGE = '''<!DOCTYPE html><html><head><title>Tee &amp; Towel | Shop</title>
+<meta property="og:image" content="//cdn.example.com/product-og.jpg">
+<style>.hero { background-image: url('/media/product-back.jpg') }</style></head><body>
+<div class="product-detail"><h1 class="product-title">Cody Rhodes <em>Tee</em> &amp; Towel</h1>
+<span class="price-current" hidden>$1,024.99</span>
+<div class="product-description"><p>Soft <b>cotton</b> tee</p> &amp; towel</div>
+<img data-src="/media/product-front.jpg" loading=lazy><img src="/media/icon-cart.png">
+</div></body></html>'''
+
+def fixture_pages():
+    pages = [('small', SMALL_PAGE)]
+    with open(os.path.join(ROOT, 'html.html'), 'r', encoding='utf-8') as f:
+        pages.append(('html.html', f.read()))
+    return pages
+
+@pytest.mark.parametrize('name, html_content', fixture_pages(), ids=[name for name, html in fixture_pages()])
+@pytest.mark.parametrize('backend', sorted(set(PARSER_BACKENDS) - {'html.parser'}))
+def test_backend_matches_html_parser(backend, name, html_content):
+    url = 'https://shop.example.com/tees/p-1' if name == 'small' else None
+    reference = extract_product_info(html_content, max_images=None, parser='html.parser', structured=False, url=url)
+    product_info = extract_product_info(html_content, max_images=None, parser=backend, structured=False, url=url)
+    assert dict(product_info) == dict(reference)
+    assert product_info['name'] and product_info['price'] and product_info['images']
+
+@pytest.mark.parametrize('backend', sorted(PARSER_BACKENDS))
+def test_backend_matches_multipass_reference(backend):
+    with open(os.path.join(ROOT, 'html.html'), 'r', encoding='utf-8') as f:
+        html_content = f.read()
+    assert check_parity(html_content, parser=backend) == []
+
+def test_raw_scan_upgrades_to_https_like_the_legacy_scan():
+    html = ('<img src="http://cdn.example.com/a.jpg"><img src="//cdn.example.com/b.png?w=400">'
+            '<a href="https://cdn.example.com/c.webp">c</a> HTTP://CDN.example.com/d.JPG')
+    urls = scan_image_urls(html)
+    assert urls == ['https://cdn.example.com/a.jpg', 'https://cdn.example.com/b.png?w=400',
+                    'https://cdn.example.com/c.webp', 'https://CDN.example.com/d.JPG']
+    assert set(urls) == set(legacy_scan_image_urls(html))
@@ -0,0 +1,62 @@
+import json
+import os
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from benchmark import fake_image_server
+from price_monitor import PriceMonitor
+
+PAGE = '<html><body><h1 class="product-title">Cody Rhodes Tee</h1>%s</body></html>'
+
+class PriceHandler(BaseHTTPRequestHandler):
+    """Serves the product page with whatever price block the test sets"""
+
+    price_html = ''
+
+    def do_GET(self):
+        data = (PAGE % self.price_html).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def monitor(tmp_path):
+    with fake_image_server(PriceHandler) as base_url:
+        url = f"{base_url}/tees/p-1"
+        yield url, PriceMonitor([url], state_file=str(tmp_path / 'state.json'),
+                                feed_file=str(tmp_path / 'deltas.jsonl'),
+                                webhook_file=str(tmp_path / 'webhook.json'), catalog_file=None,
+                                interval=0, jitter=0)
+
+def test_price_change_is_emitted(monitor, tmp_path):
+    url, price_monitor = monitor
+    PriceHandler.price_html = '<span class="price-current">$24.99</span>'
+    assert price_monitor.run_once() == []
+    PriceHandler.price_html = '<span class="price-current">$19.99</span>'
+    [change] = price_monitor.run_once()
+    assert (change['old_price'], change['price']) == (24.99, 19.99)
+    with open(tmp_path / 'deltas.jsonl', 'r', encoding='utf-8') as f:
+        assert [json.loads(line)['price'] for line in f] == [19.99]
+
+def test_missing_price_is_a_failed_parse_not_a_drop(monitor, tmp_path):
+    url, price_monitor = monitor
+    PriceHandler.price_html = '<span class="price-current">$24.99</span>'
+    price_monitor.run_once()
+    PriceHandler.price_html = ''
+    assert price_monitor.run_once() == []
+    entry = price_monitor.state[url]
+    assert entry['price'] == 24.99
+    assert entry['failures'] == 1
+    assert not os.path.exists(tmp_path / 'deltas.jsonl')
+    assert not os.path.exists(tmp_path / 'webhook.json')
+
+    # The price comes back unchanged: still no delta
+    PriceHandler.price_html = '<span class="price-current">$24.99</span>'
+    assert price_monitor.run_once() == []
+    assert price_monitor.state[url]['failures'] == 0
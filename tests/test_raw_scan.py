@@ -0,0 +1,27 @@
+from benchmark import compiled_token_filter, legacy_token_filter
+from extractor import filter_image_urls, has_token, scan_image_urls
+
+def test_scan_keeps_document_order_queries_and_repeats():
+    html = ('<div style="background:url(\'//cdn.example.com/b.webp?w=640&amp;h=480\')"></div>'
+            '<img src="https://cdn.example.com/a.jpeg"><img srcset="//cdn.example.com/b.webp?w=640&amp;h=480 2x">'
+            '<a href="https://cdn.example.com/page.html">page</a>')
+    assert scan_image_urls(html) == ['https://cdn.example.com/b.webp?w=640&amp;h=480',
+                                     'https://cdn.example.com/a.jpeg',
+                                     'https://cdn.example.com/b.webp?w=640&amp;h=480']
+
+def test_has_token_is_a_substring_check():
+    assert has_token('https://cdn.example.com/site-logo.png', ('icon', 'logo'))
+    assert not has_token('https://cdn.example.com/product.png', ('icon', 'logo'))
+    assert not has_token('anything', ())
+
+def test_compiled_filters_match_the_legacy_checks():
+    urls = ['https://cdn.example.com/product-front.jpg', 'https://cdn.example.com/thumb/product.jpg',
+            'https://cdn.example.com/favicon-32x32.png', 'https://cdn.example.com/photo.gif',
+            'https://cdn.example.com/image-16x16.webp', 'https://cdn.example.com/banner.svg',
+            'data:image/png;base64,AAAA']
+    assert compiled_token_filter(urls) == legacy_token_filter(urls) == [
+        'https://cdn.example.com/product-front.jpg', 'https://cdn.example.com/photo.gif', 'data:image/png;base64,AAAA']
+    assert filter_image_urls(urls) == ['https://cdn.example.com/product-front.jpg',
+                                       'https://cdn.example.com/thumb/product.jpg',
+                                       'https://cdn.example.com/photo.gif',
+                                       'https://cdn.example.com/banner.svg']
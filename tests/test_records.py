@@ -0,0 +1,31 @@
+import json
+import pickle
+
+import pytest
+
+from records import KitData, ProductInfo, SavedImage, dumps, json_default
+
+def test_records_read_like_dicts():
+    image = SavedImage(original_url='https://cdn.example.com/a.jpg', filename='a.jpg')
+    assert image['filename'] == 'a.jpg'
+    assert image.get('srcset') is None and 'srcset' not in image
+    with pytest.raises(KeyError):
+        image['srcset']
+    with pytest.raises(KeyError):
+        image['unknown'] = 1
+    assert image == {'original_url': 'https://cdn.example.com/a.jpg', 'filename': 'a.jpg'}
+    assert not hasattr(image, '__dict__')
+
+def test_unset_fields_are_left_out_of_json():
+    kit = KitData(id='cody-rhodes', items=['Tee'], price=49.99)
+    assert json.loads(dumps(kit)) == {'id': 'cody-rhodes', 'price': 49.99, 'items': ['Tee']}
+    assert json.loads(json.dumps({'kit': kit}, default=json_default)) == {'kit': kit.to_dict()}
+    # The 'items' field shadows dict.items(), but iteration still yields field names
+    assert list(kit) == ['id', 'price', 'items']
+
+def test_pickled_product_info_keeps_interned_images():
+    info = ProductInfo(name='Tee', images=['https://cdn.example.com/' + 'a.jpg'])
+    copy = pickle.loads(pickle.dumps(info))
+    assert copy == info
+    assert isinstance(copy['images'], tuple)
+    assert copy['images'][0] is info['images'][0]
@@ -0,0 +1,23 @@
+from scraper import extract_product_info
+from site_profiles import GENERIC_PROFILE, select_profile
+
+GENERIC_PAGE = '''<html><head><meta property="og:image" content="/media/og-tee.jpg"></head><body>
+<h1 class="product-title">Cody Rhodes Tee</h1>
+<img src="/media/product-front.jpg"> <img src="images/product-back.jpg">
+</body></html>'''
+
+def test_generic_profile_uses_the_fetch_url_as_base():
+    profile, base_url = select_profile(GENERIC_PAGE, 'https://store.example.com/tees/p-1')
+    assert profile is GENERIC_PROFILE
+    assert base_url == 'https://store.example.com/tees/p-1'
+
+def test_generic_profile_resolves_relative_images_against_the_fetch_url():
+    product_info = extract_product_info(GENERIC_PAGE, url='https://store.example.com/tees/p-1', structured=False)
+    assert set(product_info['images']) == {'https://store.example.com/media/og-tee.jpg',
+                                           'https://store.example.com/media/product-front.jpg',
+                                           'https://store.example.com/tees/images/product-back.jpg'}
+
+def test_generic_profile_without_a_base_drops_relative_images():
+    product_info = extract_product_info(GENERIC_PAGE, structured=False)
+    assert product_info['name'] == 'Cody Rhodes Tee'
+    assert list(product_info['images']) == []
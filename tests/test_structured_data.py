@@ -0,0 +1,30 @@
+from scraper import extract_product_info
+from structured_data import product_from_json_ld
+
+PAGE = '''<html><head><script type="application/ld+json">
+{"@type": "Product", "name": %s, "description": %s, "offers": {"price": "24.99"},
+ "image": ["//cdn.example.com/a.jpg", "/img/b.jpg", "data:image/png;base64,AAAA",
+           "https://cdn.example.com/favicon.png"]}
+</script></head><body><h1 class="product-title">DOM Name</h1></body></html>'''
+
+def test_fast_path_images_are_resolved_and_filtered():
+    html = PAGE % ('"Cody Rhodes Tee"', '"Soft cotton"')
+    product_info = extract_product_info(html, url='https://shop.example.com/products/1')
+    assert product_info['name'] == 'Cody Rhodes Tee'
+    assert list(product_info['images']) == ['https://cdn.example.com/a.jpg', 'https://shop.example.com/img/b.jpg']
+
+def test_fast_path_drops_images_it_cannot_resolve():
+    html = PAGE % ('"Cody Rhodes Tee"', '"Soft cotton"')
+    product_info = extract_product_info(html)
+    assert all(url.startswith('https://') for url in product_info['images'])
+
+def test_non_string_name_falls_back_to_dom():
+    html = PAGE % ('{"@value": "Cody Rhodes Tee"}', '["Soft", "cotton"]')
+    product_info = extract_product_info(html, url='https://shop.example.com/products/1')
+    assert product_info['name'] == 'DOM Name'
+    assert product_info['price'] == 24.99
+
+def test_product_from_json_ld_skips_non_string_fields():
+    fields = product_from_json_ld({'name': ['a'], 'description': {'text': 'b'}, 'brand': {'name': 'WWE'},
+                                   'category': ['Apparel']})
+    assert fields == {'brand': 'WWE'}
@@ -0,0 +1,31 @@
+from ts_emitter import find_kit_objects, upsert_kits
+
+KIT = {
+    'id': 'cody-rhodes', 'name': 'Cody Rhodes Kit', 'wrestler': 'Cody Rhodes', 'price': 49,
+    'originalPrice': 59.99, 'savings': 10, 'description': 'Tee and towel',
+    'items': ['Tee', 'Towel'], 'images': ['/cody-rhodes/1.jpg'],
+}
+
+ONE_LINE_SOURCE = '''const kits: Kit[] = [
+  { id: 'cody-rhodes', name: 'Old', wrestler: 'Cody Rhodes', price: 1, originalPrice: 2, savings: 1, description: '', items: [], images: [] },
+  { "id": "john-cena", name: 'Cena', wrestler: 'John Cena', price: 1, originalPrice: 2, savings: 1, description: '', items: [], images: [] }
+]
+'''
+
+def test_one_line_kits_are_found_by_id():
+    array_open, array_close, objects = find_kit_objects(ONE_LINE_SOURCE)
+    assert [kit_id for start, end, kit_id in objects] == ['cody-rhodes', 'john-cena']
+
+def test_one_line_kit_is_replaced_not_duplicated():
+    updated = upsert_kits(ONE_LINE_SOURCE, [KIT])
+    assert updated.count('id: "cody-rhodes"') == 1 and "'cody-rhodes'" not in updated
+    assert "name: 'Old'" not in updated
+    assert '"Cody Rhodes Kit"' in updated
+    assert updated.index('"Cody Rhodes Kit"') < updated.index('john-cena')
+    assert upsert_kits(updated, [KIT]) == updated
+
+def test_multi_line_kit_is_replaced():
+    multi_line = upsert_kits('const kits: Kit[] = []\n', [KIT])
+    updated = upsert_kits(multi_line, [dict(KIT, price=39)])
+    assert updated.count('"cody-rhodes"') == 1
+    assert 'price: 39,' in updated
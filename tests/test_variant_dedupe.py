@@ -0,0 +1,31 @@
+from extractor import canonical_image_url, dedupe_image_variants
+from scraper import extract_product_info
+
+def test_renditions_collapse_to_the_smallest_wide_enough_one():
+    urls = ['https://cdn.example.com/tee.jpg?w=300&v=2',
+            'https://cdn.example.com/other.jpg',
+            'https://cdn.example.com/tee.jpg?v=2&w=1200',
+            'https://cdn.example.com/tee.jpg?width=1000&v=2',
+            'https://cdn.example.com/other.jpg?w=200']
+    assert dedupe_image_variants(urls, target_width=900) == ['https://cdn.example.com/tee.jpg?width=1000&v=2',
+                                                            'https://cdn.example.com/other.jpg']
+
+def test_without_a_wide_enough_rendition_the_largest_wins():
+    urls = ['https://cdn.example.com/tee.jpg?w=300', 'https://cdn.example.com/tee.jpg?w=600']
+    assert dedupe_image_variants(urls, target_width=900) == ['https://cdn.example.com/tee.jpg?w=600']
+
+def test_escaped_ampersands_share_an_asset_key():
+    url, asset_key, width = canonical_image_url('https://CDN.example.com/tee.jpg?v=2&amp;w=400')
+    assert (url, width) == ('https://CDN.example.com/tee.jpg?v=2&w=400', 400)
+    assert asset_key == canonical_image_url('https://cdn.example.com/tee.jpg?w=1200&v=2')[1]
+
+def test_variants_are_collapsed_before_the_image_cap():
+    # Twelve renditions of one shot followed by two more shots: all three shots fit under the cap
+    renditions = ''.join(f'<img src="https://cdn.example.com/product-front.jpg?w={100 * n}">' for n in range(1, 13))
+    html = (f'<html><body><h1 class="product-title">Cody Rhodes Tee</h1>{renditions}'
+            '<img src="https://cdn.example.com/product-back.jpg"><img src="https://cdn.example.com/product-side.jpg">'
+            '</body></html>')
+    images = list(extract_product_info(html, structured=False)['images'])
+    assert images == ['https://cdn.example.com/product-front.jpg?w=900',
+                      'https://cdn.example.com/product-back.jpg',
+                      'https://cdn.example.com/product-side.jpg']
@@ -0,0 +1,88 @@
+import gzip
+import os
+
+from PIL import Image
+
+from asset_manifest import AssetManifest, precompress, source_path
+from image_variants import process_image, srcset_entries
+from records import SavedImage
+from verify_assets import (check_precompressed, expected_images, relink_assets, repair_precompressed,
+                           restore_hashed, verify_images)
+
+NAME = 'Cody Rhodes Tee'
+
+def published_manifest(tmp_path):
+    public_dir = str(tmp_path / 'public')
+    folder = os.path.join(public_dir, 'Cody-Rhodes-Tee')
+    os.makedirs(folder)
+    local_path = os.path.join(folder, 'Cody-Rhodes-Tee-01.jpg')
+    Image.effect_noise((400, 300), 60).convert('RGB').save(local_path, 'JPEG')
+    image = SavedImage(original_url=None, local_path=local_path,
+                       public_path='/Cody-Rhodes-Tee/Cody-Rhodes-Tee-01.jpg', filename='Cody-Rhodes-Tee-01.jpg')
+    result = process_image(local_path, image['public_path'], widths=(200,), formats=('webp',))
+    image['width'], image['height'], image['bytes'] = result['width'], result['height'], result['bytes']
+    image['variants'] = result['variants']
+    image['srcset'] = srcset_entries(result['variants'])
+    manifest = AssetManifest(str(tmp_path / 'asset_manifest.json'), public_dir)
+    manifest.add_products([(NAME, [image])])
+    manifest.save()
+    return public_dir, manifest, image
+
+def bad_paths(items):
+    bad, strays, folders = verify_images(items, workers=2)
+    return {item['public_path'] for item, problems in bad}, bad
+
+def test_hashed_files_are_verified_and_restored(tmp_path):
+    public_dir, manifest, image = published_manifest(tmp_path)
+    entry = manifest.images[image['public_path']]
+    items = expected_images([(NAME, [image])], public_dir, manifest.images)
+    hashed = {item['public_path'] for item in items if item.get('hashed')}
+    assert hashed == {entry['src'], entry['variants'][0]['public_path']}
+    assert bad_paths(items)[0] == set()
+
+    # Published files may be hard links to their source; damage only the hashed copy
+    hashed_path = source_path(entry['src'], public_dir)
+    with open(hashed_path, 'rb') as f:
+        data = f.read()
+    os.remove(hashed_path)
+    with open(hashed_path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    os.remove(source_path(entry['variants'][0]['public_path'], public_dir))
+    found, bad = bad_paths(items)
+    assert found == {entry['src'], entry['variants'][0]['public_path']}
+
+    restored = restore_hashed(bad, public_dir)
+    assert len(restored) == 2
+    assert bad_paths(items)[0] == set()
+
+def test_relink_rewrites_kit_references(tmp_path):
+    kit_file = tmp_path / 'kit_code.ts'
+    kit_file.write_text('images: ["/assets/tee-aaaaaaaaaaaa.jpg", "/assets/tee-200w-bbbbbbbbbbbb.webp"]',
+                        encoding='utf-8')
+    old = {'/tee/1.jpg': {'src': '/assets/tee-aaaaaaaaaaaa.jpg',
+                          'variants': [{'format': 'webp', 'width': 200,
+                                        'public_path': '/assets/tee-200w-bbbbbbbbbbbb.webp'}]}}
+    new = {'/tee/1.jpg': {'src': '/assets/tee-cccccccccccc.jpg',
+                          'variants': [{'format': 'webp', 'width': 200,
+                                        'public_path': '/assets/tee-200w-bbbbbbbbbbbb.webp'}]}}
+    renames = relink_assets(old, new, {'/tee/1.jpg'}, [str(kit_file)])
+    assert renames == {'/assets/tee-aaaaaaaaaaaa.jpg': '/assets/tee-cccccccccccc.jpg'}
+    assert kit_file.read_text(encoding='utf-8') == \
+        'images: ["/assets/tee-cccccccccccc.jpg", "/assets/tee-200w-bbbbbbbbbbbb.webp"]'
+
+def test_precompressed_siblings_are_checked_and_rebuilt(tmp_path):
+    source = tmp_path / 'logo.svg'
+    source.write_text('<svg>' + '<rect/>' * 500 + '</svg>', encoding='utf-8')
+    precompress([str(source)])
+    assert check_precompressed(str(tmp_path)) == []
+
+    with open(f"{source}.gz", 'wb') as f:
+        f.write(gzip.compress(b'<svg></svg>'))
+    orphan = tmp_path / 'gone.svg.gz'
+    orphan.write_bytes(gzip.compress(b'<svg/>'))
+    problems = check_precompressed(str(tmp_path))
+    assert problems == [(str(orphan), 'source missing'), (f"{source}.gz", 'stale')]
+
+    repair_precompressed(problems)
+    assert check_precompressed(str(tmp_path)) == []
+    assert not orphan.exists()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TypeScript emitter - renders kit data as escaped, validated TypeScript and
+upserts kits by id into the kits array of components/price-anchoring.tsx
+"""
+
+import json
+import math
+import os
+import re
+
+COMPONENT_FILE = os.path.join('components', 'price-anchoring.tsx')
+KITS_ARRAY_RE = re.compile(r'const\s+kits\s*:\s*Kit\[\]\s*=\s*\[')
+# The id key opens a line or follows '{' or ',', so one-line kits `{ id: 'x', ... }` match too
+KIT_ID_RE = re.compile(r'''(?:^|[{,])\s*(?:id|"id"|'id')\s*:\s*(["'])((?:\\.|(?!\1).)*)\1''', re.M)
+
+# Kit interface fields: (key, type, required)
+KIT_FIELDS = (
+    ('id', str, True),
+    ('name', str, True),
+    ('wrestler', str, True),
+    ('price', (int, float), True),
+    ('originalPrice', (int, float), True),
+    ('savings', (int, float), True),
+    ('description', str, True),
+    ('items', list, True),
+    ('images', list, True),
+    ('srcSets', list, False),
+)
+
+def ts_string(value):
+    """Return value as a double-quoted TypeScript string literal"""
+    # JSON string escaping is valid TS; the two JS line terminators are escaped too
+    return json.dumps(str(value), ensure_ascii=False).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+def ts_number(value, decimals=None):
+    """Return value as a TypeScript number literal"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"Not a finite number: {value!r}")
+    if decimals is not None:
+        return f"{value:.{decimals}f}"
+    return repr(value) if isinstance(value, float) else str(value)
+
+def validate_kit(kit_data):
+    """Raise ValueError unless kit_data matches the Kit interface"""
+    for key, expected, required in KIT_FIELDS:
+        if key not in kit_data or kit_data[key] is None:
+            if required:
+                raise ValueError(f"Kit {kit_data.get('id')!r} is missing {key}")
+            continue
+        value = kit_data[key]
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(f"Kit {kit_data.get('id')!r}: {key} has type {type(value).__name__}")
+    if not kit_data['id']:
+        raise ValueError("Kit id must not be empty")
+    for key in ('items', 'images'):
+        if not all(isinstance(item, str) for item in kit_data[key]):
+            raise ValueError(f"Kit {kit_data['id']!r}: every entry of {key} must be a string")
+    for src_set in kit_data.get('srcSets') or []:
+        if not isinstance(src_set, dict) or not all(isinstance(v, str) for v in src_set.values()):
+            raise ValueError(f"Kit {kit_data['id']!r}: srcSets entries must map formats to strings")
+
+def ts_key(key):
+    """Object key as written in TS: bare when it is an identifier, quoted otherwise"""
+    return key if re.match(r'^[A-Za-z_$][\w$]*$', key) else ts_string(key)
+
+def format_kit(kit_data, indent='  '):
+    """Render one kit as a TypeScript object literal"""
+    validate_kit(kit_data)
+    inner = indent * 2
+    entry = indent * 3
+    lines = [
+        f"{indent}{{",
+        f"{inner}id: {ts_string(kit_data['id'])},",
+        f"{inner}name: {ts_string(kit_data['name'])},",
+        f"{inner}wrestler: {ts_string(kit_data['wrestler'])},",
+        f"{inner}price: {ts_number(kit_data['price'])},",
+        f"{inner}originalPrice: {ts_number(kit_data['originalPrice'], 2)},",
+        f"{inner}savings: {ts_number(kit_data['savings'])},",
+        f"{inner}description: {ts_string(kit_data['description'])},",
+        f"{inner}items: [",
+        ',\n'.join(f"{entry}{ts_string(item)}" for item in kit_data['items']),
+        f"{inner}],",
+        f"{inner}images: [",
+        ',\n'.join(f"{entry}{ts_string(img)}" for img in kit_data['images']),
+        f"{inner}]" + (',' if kit_data.get('srcSets') else ''),
+    ]
+    if kit_data.get('srcSets'):
+        lines.append(f"{inner}srcSets: [")
+        lines.append(',\n'.join(
+            f"{entry}{{ " + ', '.join(f"{ts_key(fmt)}: {ts_string(srcset)}" for fmt, srcset in src_set.items()) + " }"
+            for src_set in kit_data['srcSets']))
+        lines.append(f"{inner}]")
+    lines.append(f"{indent}}}")
+    return '\n'.join(line for line in lines if line)
+
+def format_kits_array(kits):
+    """Render a complete `const kits: Kit[] = [...]` declaration"""
+    body = ',\n'.join(format_kit(kit_data) for kit_data in kits)
+    return f"const kits: Kit[] = [\n{body}\n]\n"
+
+def skip_literal(source, i):
+    """Return the index just past the string or comment starting at source[i], or i"""
+    char = source[i]
+    if char in '"\'`':
+        i += 1
+        while i < len(source) and source[i] != char:
+            i += 2 if source[i] == '\\' else 1
+        return i + 1
+    if source.startswith('//', i):
+        end = source.find('\n', i)
+        return len(source) if end == -1 else end
+    if source.startswith('/*', i):
+        end = source.find('*/', i + 2)
+        return len(source) if end == -1 else end + 2
+    return i
+
+def find_kit_objects(source):
+    """Locate the kits array and its top-level object literals
+
+    Returns (array_open, array_close, [(start, end, id), ...]) as offsets
+    into source, where array_open is just after '[' and array_close is the
+    index of the closing ']'. Strings and comments are skipped while
+    matching brackets, so braces inside values do not confuse the scan.
+    """
+    match = KITS_ARRAY_RE.search(source)
+    if not match:
+        raise ValueError("No `const kits: Kit[] = [` array found")
+    array_open = i = match.end()
+    depth = 0
+    objects = []
+    start = None
+    while i < len(source):
+        skipped = skip_literal(source, i)
+        if skipped != i:
+            i = skipped
+            continue
+        char = source[i]
+        if char in '[{(':
+            if depth == 0 and char == '{':
+                start = i
+            depth += 1
+        elif char in ']})':
+            if depth == 0:
+                return array_open, i, objects
+            depth -= 1
+            if depth == 0 and char == '}':
+                id_match = KIT_ID_RE.search(source, start, i)
+                objects.append((start, i + 1, id_match.group(2) if id_match else None))
+        i += 1
+    raise ValueError("Unterminated kits array")
+
+def upsert_kits(source, kits):
+    """Return source with kits replaced by id or appended to the kits array
+
+    Objects whose id is not being upserted keep their exact text, so the
+    change is limited to the kits that were actually regenerated.
+    """
+    array_open, array_close, objects = find_kit_objects(source)
+    rendered = {kit_data['id']: format_kit(kit_data) for kit_data in kits}
+
+    edits = []  # (start, end, replacement), applied back to front
+    for start, end, kit_id in objects:
+        if kit_id in rendered:
+            # The object span starts at '{'; the rendered text carries its own indent
+            text = rendered.pop(kit_id).lstrip()
+            if source[start:end] != text:
+                edits.append((start, end, text))
+
+    if rendered:
+        additions = ',\n'.join(rendered.values())
+        if objects:
+            last_end = objects[-1][1]
+            edits.append((last_end, last_end, ',\n' + additions))
+        else:
+            edits.append((array_open, array_close, '\n' + additions + '\n'))
+
+    for start, end, text in sorted(edits, reverse=True):
+        source = source[:start] + text + source[end:]
+    return source
+
+def write_if_changed(path, content):
+    """Atomically write content to path unless the file already holds it; returns True if written"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+def update_component(kits, component_file=COMPONENT_FILE):
+    """Upsert kits into the component's kits array; returns True if the file changed"""
+    with open(component_file, 'r', encoding='utf-8') as f:
+        source = f.read()
+    return write_if_changed(component_file, upsert_kits(source, kits))
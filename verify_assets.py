@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verify assets - checks every downloaded product image and every content-hashed
+copy the kits serve against the recorded sizes, hashes and dimensions, detects
+truncated or undecodable files from their headers, checks the precompressed
+siblings, and re-fetches or re-publishes only the bad ones
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_manifest import (ASSET_MANIFEST_FILE, HAS_BROTLI, PUBLIC_DIR, precompress, read_data_file, source_path,
+                            update_asset_manifest)
+from image_cache import ImageCache, file_sha256
+from ts_emitter import COMPONENT_FILE
+
+if HAS_BROTLI:
+    import brotli
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+VERIFY_WORKERS = 16  # Folder scans are I/O and hashlib bound, both release the GIL
+HEAD_BYTES = 32
+TAIL_BYTES = 512  # JPEG writers may pad a few bytes after the end-of-image marker
+STRAY_SUFFIXES = ('.part', '.tmp')
+KIT_FILES = (COMPONENT_FILE, 'kit_code.ts', 'kits_code.ts')  # Generated files that reference hashed assets
+
+def sniff_format(head):
+    """Return the image format named by a file's magic bytes, or None"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'avif'
+    return None
+
+def is_truncated(fmt, head, tail, size):
+    """Check the format's end marker (or declared length) without decoding pixels"""
+    if fmt == 'jpeg':
+        return b'\xff\xd9' not in tail
+    if fmt == 'png':
+        return not tail.endswith(b'IEND\xaeB`\x82')
+    if fmt == 'gif':
+        return not tail.rstrip(b'\x00').endswith(b';')
+    if fmt == 'webp':
+        return int.from_bytes(head[4:8], 'little') + 8 > size
+    return False
+
+def check_image(path, expected, full_hash=True):
+    """Return the problems found with one image file; an empty list means it is intact
+
+    Size, magic bytes, end marker and the decoded header are checked first.
+    The file is hashed only when those pass and a hash was recorded.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return ['missing']
+    if size == 0:
+        return ['empty file']
+
+    problems = []
+    if expected.get('bytes') and size != expected['bytes']:
+        problems.append(f"{size} bytes, expected {expected['bytes']}")
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        f.seek(max(0, size - TAIL_BYTES))
+        tail = f.read()
+    fmt = sniff_format(head)
+    if fmt is None:
+        problems.append('not an image')
+        return problems
+    if is_truncated(fmt, head, tail, size):
+        problems.append(f"truncated {fmt}")
+    if HAS_PILLOW:
+        try:
+            with Image.open(path) as img:
+                width, height = img.size
+        except Exception as e:
+            problems.append(f"undecodable header: {e}")
+        else:
+            if expected.get('width') and (width, height) != (expected['width'], expected['height']):
+                problems.append(f"{width}x{height}, expected {expected['width']}x{expected['height']}")
+    if full_hash and not problems and expected.get('sha256') and file_sha256(path) != expected['sha256']:
+        problems.append('hash mismatch')
+    return problems
+
+def expected_images(products, public_dir=PUBLIC_DIR, manifest_images=None, cache=None):
+    """Build the expected record of every saved image of (product name, saved images) pairs
+
+    The asset manifest is the first source for hash, size and dimensions,
+    then the saved image record itself, then the image cache entry of the
+    original URL (which records what was actually downloaded). Images in
+    the manifest but in no data file are added without a URL.
+    """
+    manifest_images = manifest_images or {}
+    items = []
+    for name, saved_images in products:
+        for image in saved_images:
+            recorded = manifest_images.get(image['public_path'], {})
+            cached = cache.lookup(image['original_url']) if cache and image.get('original_url') else None
+            items.append({
+                'product': name,
+                'public_path': image['public_path'],
+                'path': source_path(image['public_path'], public_dir),
+                'url': image.get('original_url'),
+                'sha256': recorded.get('sha256') or (cached and cached['sha256']),
+                'bytes': recorded.get('bytes') or image.get('bytes') or (cached and cached['size']),
+                'width': recorded.get('width') or image.get('width'),
+                'height': recorded.get('height') or image.get('height'),
+            })
+    # Images only the manifest knows about (static art, other runs) are checked but cannot be re-fetched
+    listed = {item['public_path'] for item in items}
+    for public_path, recorded in manifest_images.items():
+        if public_path not in listed:
+            items.append(dict(recorded, product=recorded.get('product'), public_path=public_path,
+                              path=source_path(public_path, public_dir), url=None))
+    for public_path, recorded in manifest_images.items():
+        for item in hashed_items(public_path, recorded, public_dir):
+            if item['public_path'] not in listed:
+                listed.add(item['public_path'])
+                items.append(item)
+    return items
+
+def hashed_items(public_path, recorded, public_dir=PUBLIC_DIR):
+    """Expected records of the content-hashed files a kit serves for one manifest image
+
+    The hashed original and each hashed variant carry their recorded hash,
+    size and dimensions, plus the unhashed file they were published from.
+    srcset paths of manifests written before variants were recorded only
+    get the structural checks.
+    """
+    if not recorded.get('src'):
+        return []
+    items = [{'product': recorded.get('product'), 'public_path': recorded['src'], 'source': public_path,
+              'sha256': recorded.get('sha256'), 'bytes': recorded.get('bytes'),
+              'width': recorded.get('width'), 'height': recorded.get('height')}]
+    for variant in recorded.get('variants', ()):
+        items.append({'product': recorded.get('product'), 'public_path': variant['public_path'],
+                      'source': variant.get('source'), 'sha256': variant.get('sha256'),
+                      'bytes': variant.get('bytes'), 'width': variant['width'], 'height': variant.get('height')})
+    known = {item['public_path'] for item in items}
+    for srcset in recorded.get('srcset', {}).values():
+        for candidate in srcset.split(', '):
+            path = candidate.split(' ')[0]
+            if path not in known:
+                known.add(path)
+                items.append({'product': recorded.get('product'), 'public_path': path, 'source': None})
+    for item in items:
+        item.update(path=source_path(item['public_path'], public_dir), url=None, hashed=True)
+    return items
+
+def verify_folder(folder, items, full_hash=True):
+    """Check the images of one product folder; returns (item, problems) pairs and stray partial files"""
+    results = [(item, check_image(item['path'], item, full_hash)) for item in items]
+    strays = []
+    if os.path.isdir(folder):
+        strays = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(STRAY_SUFFIXES))
+    return results, strays
+
+def verify_images(items, workers=VERIFY_WORKERS, full_hash=True):
+    """Check every image, one product folder per task; returns the bad (item, problems) pairs and strays"""
+    folders = {}
+    for item in items:
+        folders.setdefault(os.path.dirname(item['path']), []).append(item)
+    bad = []
+    strays = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(verify_folder, folder, folder_items, full_hash)
+                   for folder, folder_items in folders.items()]
+        for future in futures:
+            results, folder_strays = future.result()
+            bad.extend((item, problems) for item, problems in results if problems)
+            strays.extend(folder_strays)
+    return bad, strays, len(folders)
+
+def drop_bad_blob(cache, url):
+    """Forget a cached copy that is itself damaged, so a 304 cannot restore it"""
+    entry = cache.lookup(url)
+    if entry and check_image(cache.blob_path(entry['sha256']), {'sha256': entry['sha256'], 'bytes': entry['size']}):
+        cache.discard(url)
+
+def repair_images(bad, cache=None, workers=None):
+    """Re-fetch bad or missing images through download_image; returns the items now intact"""
+    from scraper import MAX_DOWNLOAD_WORKERS, download_image, get_session
+
+    fetchable = [item for item, problems in bad if item['url']]
+    for item, problems in bad:
+        if not item['url']:
+            print(f"  Cannot repair {item['public_path']} - no original URL recorded")
+    if cache:
+        for item in fetchable:
+            drop_bad_blob(cache, item['url'])
+
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=workers or MAX_DOWNLOAD_WORKERS) as executor:
+        futures = [executor.submit(download_image, item['url'], item['path'], session=session, cache=cache)
+                   for item in fetchable]
+        downloaded = [item for item, future in zip(fetchable, futures) if future.result()]
+
+    # The remote copy is the reference now: only the structural checks apply
+    repaired = []
+    for item in downloaded:
+        problems = check_image(item['path'], {})
+        if problems:
+            print(f"  Still bad after re-fetch: {item['public_path']}: {', '.join(problems)}")
+        else:
+            repaired.append(item)
+    return repaired
+
+def restore_hashed(bad, public_dir=PUBLIC_DIR):
+    """Re-publish damaged hashed files from their unhashed source, keeping the hashed name
+
+    Only a source that still has the recorded content is copied, so the
+    name keeps matching the bytes and the kits need no change.
+    """
+    restored = []
+    for item, problems in bad:
+        source = item.get('source') and source_path(item['source'], public_dir)
+        if not source or not item.get('sha256') or not os.path.exists(source) \
+                or file_sha256(source) != item['sha256']:
+            print(f"  Cannot restore {item['public_path']} - no source with the recorded content")
+            continue
+        tmp_path = f"{item['path']}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, item['path'])
+        if not check_image(item['path'], item):
+            restored.append(item)
+    return restored
+
+def relink_assets(old_images, new_images, names, paths):
+    """Point generated kits at the new hashed names of re-fetched images whose content changed
+
+    Hashed names are unique, so a plain text replacement in the data and
+    kit files is exact. Returns the {old src: new src} renames applied.
+    """
+    renames = {}
+    for public_path in names:
+        old, new = old_images.get(public_path), new_images.get(public_path)
+        if not old or not new:
+            continue
+        for key in ('src', 'fallback'):
+            if old.get(key) and new.get(key) and old[key] != new[key]:
+                renames[old[key]] = new[key]
+        new_variants = {(v['format'], v['width']): v['public_path'] for v in new.get('variants', ())}
+        for variant in old.get('variants', ()):
+            target = new_variants.get((variant['format'], variant['width']))
+            if target and target != variant['public_path']:
+                renames[variant['public_path']] = target
+    if not renames:
+        return renames
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        updated = text
+        for old_src, new_src in renames.items():
+            updated = updated.replace(old_src, new_src)
+        if updated != text:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+            os.replace(tmp_path, path)
+            print(f"  Re-linked {path} to the new hashed names")
+    return renames
+
+def check_precompressed(root):
+    """Return (compressed file, problem) for every .gz/.br under root that does not decode to its source
+
+    .br files cannot be checked without brotli and are skipped.
+    """
+    decoders = {'.gz': gzip.decompress}
+    if HAS_BROTLI:
+        decoders['.br'] = brotli.decompress
+    problems = []
+    for dirpath, dirs, files in os.walk(root):
+        for name in files:
+            suffix = os.path.splitext(name)[1]
+            if suffix not in decoders:
+                continue
+            path = os.path.join(dirpath, name)
+            source = path[:-len(suffix)]
+            if not os.path.exists(source):
+                problems.append((path, 'source missing'))
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    data = decoders[suffix](f.read())
+            except Exception as e:
+                problems.append((path, f"undecodable: {e}"))
+                continue
+            with open(source, 'rb') as f:
+                if data != f.read():
+                    problems.append((path, 'stale'))
+    return sorted(problems)
+
+def repair_precompressed(problems):
+    """Delete bad compressed siblings and re-encode the sources that still exist"""
+    sources = set()
+    for path, problem in problems:
+        os.remove(path)
+        source = os.path.splitext(path)[0]
+        if os.path.exists(source):
+            sources.add(source)
+    precompress(sorted(sources))
+
+def load_manifest_images(manifest_file):
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('images', {})
+    except (OSError, ValueError) as e:
+        print(f"    Ignoring unreadable asset manifest {manifest_file}: {e}")
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify downloaded and published images and repair damaged ones")
+    parser.add_argument('data_files', nargs='*', default=['extracted_product_data.json'],
+                        help="scraper data files listing the saved images")
+    parser.add_argument('--public', default=PUBLIC_DIR, help="static directory holding the images")
+    parser.add_argument('--manifest', default=ASSET_MANIFEST_FILE, help="asset manifest with recorded hashes")
+    parser.add_argument('--repair', action='store_true',
+                        help="re-fetch bad or missing images and re-publish bad hashed or precompressed files")
+    parser.add_argument('--kit-files', nargs='*', default=list(KIT_FILES),
+                        help="generated kit files re-linked when a repair changes a hashed name")
+    parser.add_argument('--quick', action='store_true', help="skip hashing; check sizes and headers only")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore the image cache for expected hashes and re-fetch in full")
+    parser.add_argument('--workers', type=int, default=VERIFY_WORKERS, help="folders checked concurrently")
+    args = parser.parse_args()
+
+    products = []
+    for data_file in args.data_files:
+        if not os.path.exists(data_file):
+            print(f"Skipping {data_file} - not found")
+            continue
+        products.extend(read_data_file(data_file))
+
+    cache = None if args.no_cache else ImageCache()
+    manifest_images = load_manifest_images(args.manifest)
+    items = expected_images(products, args.public, manifest_images, cache)
+
+    started = time.perf_counter()
+    bad, strays, folders = verify_images(items, args.workers, full_hash=not args.quick)
+    compressed = check_precompressed(args.public)
+    elapsed = time.perf_counter() - started
+    for item, problems in bad:
+        print(f"  BAD {item['public_path']}: {', '.join(problems)}")
+    for path, problem in compressed:
+        print(f"  BAD {path}: {problem}")
+    for path in strays:
+        print(f"  Leftover partial file: {path}")
+    print(f"Checked {len(items)} images in {folders} folders in {elapsed:.2f}s - {len(bad)} bad, "
+          f"{len(compressed)} bad precompressed files")
+
+    if (bad or compressed) and args.repair:
+        originals = [(item, problems) for item, problems in bad if not item.get('hashed')]
+        repaired = repair_images(originals, cache) if originals else []
+        if cache:
+            cache.save()
+        if repaired and manifest_images:
+            # Re-record the fetched files; an image whose remote content changed gets a new
+            # hashed name, and the generated kits are pointed at it
+            names = {item['public_path'] for item in repaired}
+            manifest = update_asset_manifest([(name, [image for image in saved_images if image['public_path'] in names])
+                                              for name, saved_images in products], args.manifest, args.public)
+            kit_files = [path for path in list(args.data_files) + list(args.kit_files) if os.path.exists(path)]
+            renames = relink_assets(manifest_images, manifest.images, names, kit_files)
+            repaired.extend(item for item, problems in bad if item.get('hashed') and item['public_path'] in renames)
+        # Damaged hashed files whose source is intact (again) are re-published under the same name
+        restored = restore_hashed([(item, problems) for item, problems in bad
+                                   if item.get('hashed') and item not in repaired], args.public)
+        repaired.extend(restored)
+        print(f"Repaired {len(repaired)} of {len(bad)} images")
+        bad = [(item, problems) for item, problems in bad if item not in repaired]
+        if compressed:
+            repair_precompressed(compressed)
+            compressed = check_precompressed(args.public)
+            print(f"Re-encoded precompressed files - {len(compressed)} still bad")
+
+    sys.exit(1 if bad or compressed else 0)
+
+if __name__ == "__main__":
+    main()